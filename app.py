@@ -1,13 +1,31 @@
 import sys
 import os
-import csv
+import threading
+import time
+import multiprocessing
+from functools import partial
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QFileDialog, QTableWidget, QTableWidgetItem,
-    QLabel, QComboBox, QTextEdit, QHeaderView, QAbstractItemView, QDialog
+    QPushButton, QFileDialog, QTableView,
+    QLabel, QComboBox, QPlainTextEdit, QHeaderView, QAbstractItemView, QDialog,
+    QProgressBar, QSpinBox, QCheckBox, QLineEdit
 )
-from PyQt6.QtCore import Qt
-from iptcinfo3 import IPTCInfo
+from PyQt6.QtCore import Qt, QObject, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QTextCursor
+
+import iptc_core
+import metrics
+from file_index import FileIndex
+from journal import CheckpointJournal, FingerprintJournal, UndoJournal, checkpoint_key, writer_mode
+from manifest import Manifest, guess_column, norm
+from manifest_store import STORE_MIN_BYTES, ManifestStore
+from csv_model import CsvTableModel, StoreTableModel
+import log_sink
+
+# Jumlah baris maksimum di widget log / ring buffer
+LOG_CAPACITY = 10000
+# Interval flush log ke widget (ms)
+LOG_FLUSH_MS = 250
 
 
 class CustomMessageBox(QDialog):
@@ -39,9 +57,149 @@ class CustomMessageBox(QDialog):
         dialog.exec()
 
 
-def norm(s: str) -> str:
-    """Normalisasi teks header: trim + lower + hilangkan spasi ganda."""
-    return " ".join((s or "").strip().split()).lower()
+class BatchWorker(QObject):
+    """Menjalankan batch IPTC di QThread terpisah.
+
+    Semua komunikasi ke GUI lewat signal (queued), jadi event loop GUI
+    tidak pernah dipompa dari dalam loop pemrosesan.
+    """
+    progress = pyqtSignal(int, int)           # done, total
+    file_done = pyqtSignal(object)            # iptc_core.RowResult
+    message = pyqtSignal(str)                 # pesan log lain dari worker
+    finished = pyqtSignal(int, int, int, bool)  # processed, skipped, errors, cancelled
+
+    def __init__(self, rows, columns, folder, workers=1, writer=iptc_core.write_iptc_data,
+                 recursive=False, total=None, incremental=False, manifest_path=None,
+                 resume=False, metrics_path=None, mode="iptc", target=None, undo=False):
+        super().__init__()
+        self._undo = undo
+        self._mode = mode
+        self._target = target
+        self._metrics_path = metrics_path
+        self._incremental = incremental
+        self._manifest_path = manifest_path
+        self._resume_run = resume
+        self._rows = rows
+        self._total = total
+        self._columns = columns
+        self._folder = folder
+        self._recursive = recursive
+        self._workers = workers
+        self._writer = writer
+        self._cancel = threading.Event()
+        self._resume = threading.Event()
+        self._resume.set()
+
+    def run(self):
+        counts = {iptc_core.OK: 0, iptc_core.SKIPPED: 0, iptc_core.ERROR: 0}
+        total = self._total if self._total is not None else len(self._rows)
+        done = 0
+        journal = None
+        checkpoint = None
+        undo = None
+        recorder = metrics.Recorder() if self._metrics_path else None
+        completed = False
+
+        try:
+            # Scan folder sekali, di thread worker
+            with (recorder or metrics.NULL).time("index"):
+                index = FileIndex(self._folder, recursive=self._recursive)
+            if self._incremental:
+                # Koneksi SQLite harus dibuat di thread yang memakainya
+                journal = FingerprintJournal(mode=self._mode, target=self._target)
+            if self._manifest_path:
+                key = checkpoint_key(self._manifest_path, self._columns, self._folder)
+                checkpoint = CheckpointJournal(key, resume=self._resume_run)
+                if self._resume_run:
+                    # Baris yang sudah selesai tidak dilaporkan lagi, progress mulai dari sini
+                    done = len(checkpoint.completed)
+                    self.message.emit(f"Resuming: {done} rows already completed")
+            if self._undo:
+                undo = UndoJournal()
+                batch = undo.begin_batch(self._folder, self._manifest_path or "")
+                self.message.emit(f"Undo batch {batch}; roll back with: python rollback.py {batch}")
+            results = iptc_core.process_rows(self._rows, self._columns, self._folder,
+                                             writer=self._writer, workers=self._workers,
+                                             index=index, journal=journal, checkpoint=checkpoint,
+                                             recorder=recorder, undo=undo)
+            for result in results:
+                counts[result.status] += 1
+                done += 1
+                self.file_done.emit(result)
+                self.progress.emit(done, total)
+
+                # Pause: tunggu di sini sampai resume() atau cancel()
+                self._resume.wait()
+                if self._cancel.is_set():
+                    break
+            else:
+                completed = True
+            results.close()
+        except Exception as e:
+            counts[iptc_core.ERROR] += 1
+            self.message.emit(f"Error: {str(e)}")
+        finally:
+            if journal is not None:
+                journal.close()
+            if checkpoint is not None:
+                if completed and not counts[iptc_core.ERROR]:
+                    checkpoint.discard()
+                else:
+                    checkpoint.close()
+            if undo is not None:
+                undo.close()
+
+        if recorder is not None:
+            recorder.finish()
+            try:
+                recorder.write_json(self._metrics_path)
+                self.message.emit(f"Metrics: {self._metrics_path}")
+            except OSError as e:
+                self.message.emit(f"Error: could not write metrics: {e}")
+
+        self.finished.emit(counts[iptc_core.OK], counts[iptc_core.SKIPPED],
+                           counts[iptc_core.ERROR], self._cancel.is_set())
+
+    def pause(self):
+        self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    def cancel(self):
+        self._cancel.set()
+        self._resume.set()
+
+    def is_paused(self):
+        return not self._resume.is_set()
+
+
+class ManifestLoader(QObject):
+    """Import manifest besar ke ManifestStore di QThread terpisah."""
+    progress = pyqtSignal(int, int)   # baris diimport, perkiraan total
+    loaded = pyqtSignal(object)       # ManifestStore
+    failed = pyqtSignal(str)
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._cancel = threading.Event()
+
+    def run(self):
+        try:
+            store = ManifestStore(self.path, progress=self._progress)
+        except Exception as e:
+            self.failed.emit("" if self._cancel.is_set() else str(e))
+            return
+        self.loaded.emit(store)
+
+    def _progress(self, done, total):
+        if self._cancel.is_set():
+            raise RuntimeError("cancelled")
+        self.progress.emit(done, total)
+
+    def cancel(self):
+        self._cancel.set()
 
 
 class IPTCWriterApp(QMainWindow):
@@ -91,31 +249,132 @@ class IPTCWriterApp(QMainWindow):
 
         main_layout.addLayout(mapping_layout)
 
-        # Process button
+        # Write options
+        options_layout = QHBoxLayout()
+        self.backup_check = QCheckBox("Keep backup (~)")
+        self.backup_check.setToolTip("Keep the original file as <name>~ next to the updated image")
+        self.fsync_check = QCheckBox("fsync after write")
+        self.fsync_check.setToolTip("Flush each file to disk before replacing the original (slower, safer)")
+        self.recursive_check = QCheckBox("Include subfolders")
+        self.recursive_check.setToolTip("Also match CSV filenames against images in subfolders")
+        options_layout.addWidget(self.recursive_check)
+        self.incremental_check = QCheckBox("Skip unchanged files")
+        self.incremental_check.setToolTip(
+            "Skip files whose metadata was already written by an earlier run and that have not changed since")
+        options_layout.addWidget(self.incremental_check)
+        self.exif_check = QCheckBox("Also write EXIF")
+        self.exif_check.setToolTip(
+            "Write EXIF ImageDescription, UserComment and XPKeywords in the same pass as IPTC")
+        options_layout.addWidget(self.exif_check)
+        self.padding_check = QCheckBox("In-place edits")
+        self.padding_check.setToolTip(
+            f"Reserve {iptc_core.DEFAULT_PADDING} bytes in the metadata segments so later edits "
+            "overwrite them in place instead of rewriting the whole file")
+        options_layout.addWidget(self.padding_check)
+        self.xmp_check = QCheckBox("XMP sidecar only")
+        self.xmp_check.setToolTip(
+            "Write title, description and keywords to <name>.xmp next to each image "
+            "instead of rewriting the images")
+        self.xmp_check.toggled.connect(self.on_xmp_toggled)
+        options_layout.addWidget(self.xmp_check)
+        options_layout.addWidget(self.backup_check)
+        self.undo_check = QCheckBox("Undo journal")
+        self.undo_check.setToolTip(
+            "Record the original metadata segments (a few KB per file) so the batch can be "
+            "rolled back with rollback.py")
+        options_layout.addWidget(self.undo_check)
+        options_layout.addWidget(self.fsync_check)
+        self.metrics_check = QCheckBox("Record stage metrics")
+        self.metrics_check.setToolTip("Save per-stage timings as JSON next to the run log")
+        options_layout.addWidget(self.metrics_check)
+        options_layout.addStretch(1)
+        main_layout.addLayout(options_layout)
+
+        # Process / pause / cancel buttons
+        process_layout = QHBoxLayout()
         self.process_button = QPushButton("Process Images")
         self.process_button.clicked.connect(self.process_images)
         self.process_button.setEnabled(False)
-        main_layout.addWidget(self.process_button)
+        self.resume_button = QPushButton("Resume")
+        self.resume_button.setToolTip("Continue the last run for this CSV, folder and column mapping")
+        self.resume_button.clicked.connect(lambda: self.process_images(resume=True))
+        self.resume_button.setEnabled(False)
+        self.pause_button = QPushButton("Pause")
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.pause_button.setEnabled(False)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_processing)
+        self.cancel_button.setEnabled(False)
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, os.cpu_count() or 1)
+        self.workers_spin.setValue(1)
+        self.workers_spin.setToolTip("Number of worker processes used to write files")
+        process_layout.addWidget(QLabel("Workers:"))
+        process_layout.addWidget(self.workers_spin)
+        process_layout.addWidget(self.process_button, stretch=1)
+        process_layout.addWidget(self.resume_button)
+        process_layout.addWidget(self.pause_button)
+        process_layout.addWidget(self.cancel_button)
+        main_layout.addLayout(process_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        main_layout.addWidget(self.progress_bar)
 
         # Log display
-        self.log_display = QTextEdit()
+        self.log_sink = log_sink.LogSink(capacity=LOG_CAPACITY)
+        self.log_display = QPlainTextEdit()
         self.log_display.setReadOnly(True)
-        main_layout.addWidget(QLabel("Log:"))
+        self.log_display.setMaximumBlockCount(LOG_CAPACITY)
+        self.log_level_combo = QComboBox()
+        for text, level in [
+            ("All messages", log_sink.INFO),
+            ("Warnings and errors", log_sink.WARNING),
+            ("Errors only", log_sink.ERROR),
+        ]:
+            self.log_level_combo.addItem(text, level)
+        self.log_level_combo.currentIndexChanged.connect(self.change_log_level)
+        log_header = QHBoxLayout()
+        log_header.addWidget(QLabel("Log:"))
+        log_header.addStretch(1)
+        log_header.addWidget(self.log_level_combo)
+        main_layout.addLayout(log_header)
         main_layout.addWidget(self.log_display)
 
+        # Log ditampilkan per batch oleh timer, bukan per pesan
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(LOG_FLUSH_MS)
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_timer.start()
+
         # CSV data table
-        self.csv_table = QTableWidget()
+        self.csv_table = QTableView()
         self.csv_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.csv_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        main_layout.addWidget(QLabel("CSV Data Preview:"))
+        self.csv_table.verticalHeader().setDefaultSectionSize(
+            self.csv_table.fontMetrics().height() + 6)
+        self.csv_model = None
+        self.find_edit = QLineEdit()
+        self.find_edit.setPlaceholderText("Find filename")
+        self.find_edit.setToolTip("Jump to the first row whose filename starts with this text (Enter)")
+        self.find_edit.returnPressed.connect(self.find_filename)
+        preview_header = QHBoxLayout()
+        preview_header.addWidget(QLabel("CSV Data Preview:"))
+        preview_header.addStretch(1)
+        preview_header.addWidget(self.find_edit)
+        main_layout.addLayout(preview_header)
         main_layout.addWidget(self.csv_table)
 
         # State
         self.selected_folder = None
         self.selected_csv = None
-        self.csv_data = []
+        self.manifest = None
         self.headers = []
         self.norm_headers = []  # header yang dinormalisasi
+        self.worker_thread = None
+        self.worker = None
+        self.loader_thread = None
+        self.loader = None
 
     def select_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Folder with JPG Files")
@@ -136,27 +395,77 @@ class IPTCWriterApp(QMainWindow):
 
     def load_csv_data(self, file_path):
         try:
-            # Deteksi dialect dan BOM
-            with open(file_path, "rb") as f:
-                raw = f.read()
-            text = raw.decode("utf-8-sig")  # buang BOM jika ada
-
-            sniffer = csv.Sniffer()
-            try:
-                dialect = sniffer.sniff(text.splitlines()[0] if text else ",")
-            except Exception:
-                dialect = csv.excel
-                dialect.delimiter = ','
-
-            reader = csv.reader(text.splitlines(), dialect)
-            self.csv_data = [list(map(lambda x: (x or "").strip(), row)) for row in reader]
+            if self.manifest is not None and hasattr(self.manifest, "close"):
+                self.manifest.close()
+            self.manifest = None
+            self.csv_model = None
+            self.csv_table.setModel(None)
+            if os.path.getsize(file_path) >= STORE_MIN_BYTES:
+                # Manifest besar: import sekali ke SQLite di thread lain, run berikutnya langsung dibuka
+                self.start_indexing(file_path)
+                return
+            # Deteksi dialect dan BOM; baris data dibaca lazy
+            self.show_manifest(Manifest(file_path))
+        except Exception as e:
+            self.log(f"Error loading CSV: {str(e)}")
+            CustomMessageBox.show(self, "Error", f"Failed to load CSV file:\n{str(e)}")
 
-            if not self.csv_data:
+    def start_indexing(self, file_path):
+        self.loader_thread = QThread(self)
+        self.loader = ManifestLoader(file_path)
+        self.loader.moveToThread(self.loader_thread)
+        self._index_start = time.perf_counter()
+
+        queued = Qt.ConnectionType.QueuedConnection
+        self.loader_thread.started.connect(self.loader.run)
+        self.loader.progress.connect(self.on_progress, queued)
+        self.loader.loaded.connect(self.on_manifest_indexed, queued)
+        self.loader.failed.connect(self.on_manifest_index_failed, queued)
+        self.loader.loaded.connect(self.loader_thread.quit)
+        self.loader.failed.connect(self.loader_thread.quit)
+        self.loader_thread.finished.connect(self.loader.deleteLater)
+        self.loader_thread.finished.connect(self.loader_thread.deleteLater)
+
+        self.log(f"Indexing large CSV: {file_path}")
+        self.csv_button.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.check_process_ready()
+        self.loader_thread.start()
+
+    def finish_indexing(self):
+        self.loader = None
+        self.loader_thread = None
+        self.csv_button.setEnabled(self.worker is None)
+        self.check_process_ready()
+
+    def on_manifest_indexed(self, store):
+        if self.loader is None:
+            store.close()
+            return
+        self.finish_indexing()
+        if store.imported:
+            self.log(f"Indexed {store.count} CSV rows in {time.perf_counter() - self._index_start:.1f} s")
+        self.progress_bar.setValue(0)
+        self.show_manifest(store)
+
+    def on_manifest_index_failed(self, message):
+        self.finish_indexing()
+        self.progress_bar.setValue(0)
+        if message:
+            self.log(f"Error loading CSV: {message}")
+            CustomMessageBox.show(self, "Error", f"Failed to load CSV file:\n{message}")
+
+    def show_manifest(self, manifest):
+        try:
+            if not manifest.headers:
+                if isinstance(manifest, ManifestStore):
+                    manifest.close()
                 self.log("CSV file is empty")
                 CustomMessageBox.show(self, "Empty CSV", "CSV file is empty.")
                 return
 
-            self.headers = self.csv_data[0]
+            self.manifest = manifest
+            self.headers = manifest.headers
             self.norm_headers = [norm(h) for h in self.headers]
 
             # Update combo boxes
@@ -165,20 +474,19 @@ class IPTCWriterApp(QMainWindow):
                 combo.addItems(self.headers)
 
             # Default selections (best-guess, case-insensitive)
-            def try_select(combo: QComboBox, candidates):
-                for cand in candidates:
-                    if cand in self.norm_headers:
-                        combo.setCurrentIndex(self.norm_headers.index(cand))
-                        return
+            for field, combo in [
+                ("filename", self.filename_combo),
+                ("title", self.title_combo),
+                ("description", self.description_combo),
+                ("keywords", self.keywords_combo),
+            ]:
+                col = guess_column(self.headers, field)
+                if col >= 0:
+                    combo.setCurrentIndex(col)
                 # fallback ke index 0 bila ada
-                if combo.count() > 0 and combo.currentIndex() < 0:
+                elif combo.count() > 0 and combo.currentIndex() < 0:
                     combo.setCurrentIndex(0)
 
-            try_select(self.filename_combo, ["filename", "file name", "file", "image", "image name"])
-            try_select(self.title_combo, ["title", "object name", "name"])
-            try_select(self.description_combo, ["description", "caption", "caption/abstract"])
-            try_select(self.keywords_combo, ["keywords", "tags", "tag"])
-
             self.populate_table()
 
         except Exception as e:
@@ -186,37 +494,56 @@ class IPTCWriterApp(QMainWindow):
             CustomMessageBox.show(self, "Error", f"Failed to load CSV file:\n{str(e)}")
 
     def populate_table(self):
-        if not self.csv_data:
+        if self.manifest is None:
             return
 
-        rows = len(self.csv_data) - 1
-        cols = len(self.headers)
-
-        self.csv_table.setRowCount(rows)
-        self.csv_table.setColumnCount(cols)
-        self.csv_table.setHorizontalHeaderLabels(self.headers)
-
-        for i, row in enumerate(self.csv_data[1:]):
-            for j in range(cols):
-                val = row[j] if j < len(row) else ""
-                item = QTableWidgetItem(val)
-                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                self.csv_table.setItem(i, j, item)
+        if isinstance(self.manifest, ManifestStore):
+            self.csv_model = StoreTableModel(self.manifest, self)
+        else:
+            # Model membaca baris dari manifest bertahap (fetchMore) saat di-scroll
+            self.csv_model = CsvTableModel(self.headers, self.manifest.rows(), self)
+        self.csv_table.setModel(self.csv_model)
+        if self.csv_model.canFetchMore():
+            self.csv_model.fetchMore()
 
         header = self.csv_table.horizontalHeader()
-        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        for col, width in enumerate(self.csv_model.sample_column_widths(self.csv_table.fontMetrics())):
+            header.resizeSection(col, width)
         header.setStretchLastSection(True)
 
+    def find_filename(self):
+        text = self.find_edit.text().strip()
+        if not text or self.csv_model is None:
+            return
+        row = self.csv_model.find_row(text, max(self.filename_combo.currentIndex(), 0))
+        if row < 0:
+            self.log(f"No row with a filename starting with: {text}")
+            return
+        index = self.csv_model.index(row, 0)
+        self.csv_table.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+        self.csv_table.selectRow(row)
+
     def check_process_ready(self):
-        ready = bool(self.selected_folder and self.selected_csv)
-        self.process_button.setEnabled(ready)
+        ready = bool(self.selected_folder and self.selected_csv and self.loader is None)
+        self.process_button.setEnabled(ready and self.worker is None)
+        self.resume_button.setEnabled(ready and self.worker is None)
 
     def log(self, message):
-        self.log_display.append(message)
-        QApplication.processEvents()
+        self.log_sink.write(message)
+
+    def flush_log(self):
+        lines = self.log_sink.drain()
+        if lines:
+            self.log_display.appendPlainText("\n".join(lines))
+
+    def change_log_level(self):
+        lines = self.log_sink.set_level(self.log_level_combo.currentData())
+        self.log_display.setPlainText("\n".join(lines))
+        self.log_display.moveCursor(QTextCursor.MoveOperation.End)
 
-    def process_images(self):
-        if not (self.selected_folder and self.csv_data and self.headers):
+    def process_images(self, resume=False):
+        if not (self.selected_folder and self.manifest and self.headers):
             return
 
         # Pastikan combo terpilih
@@ -230,96 +557,160 @@ class IPTCWriterApp(QMainWindow):
                 CustomMessageBox.show(self, "Mapping Missing", f"Select a column for {label}.")
                 return
 
-        filename_col = self.filename_combo.currentIndex()
-        title_col = self.title_combo.currentIndex()
-        description_col = self.description_combo.currentIndex()
-        keywords_col = self.keywords_combo.currentIndex()
-
-        processed_count = 0
-        error_count = 0
-
-        for i, row in enumerate(self.csv_data[1:], start=2):  # start=2 untuk nomor baris real di CSV (termasuk header)
-            # Safety untuk row pendek
-            max_need = max(filename_col, title_col, description_col, keywords_col)
-            if len(row) <= max_need:
-                self.log(f"Warning: Row {i} doesn't have enough columns, skipping")
-                error_count += 1
-                continue
-
-            filename = (row[filename_col] or "").strip()
-            if not filename:
-                self.log(f"Warning: Row {i} has empty filename, skipping")
-                error_count += 1
-                continue
-
-            # Normalize filename (trim spasi & kutip)
-            filename = filename.strip().strip('"\'')
-
-            title = row[title_col].strip() if title_col < len(row) else ""
-            description = row[description_col].strip() if description_col < len(row) else ""
-            keywords = row[keywords_col].strip() if keywords_col < len(row) else ""
-
-            file_path = os.path.join(self.selected_folder, filename)
-
-            if not os.path.exists(file_path):
-                self.log(f"Warning: File not found: {filename} (row {i}), skipping")
-                error_count += 1
-                continue
-
-            if not filename.lower().endswith((".jpg", ".jpeg")):
-                self.log(f"Warning: Not a JPG: {filename} (row {i}), skipping")
-                error_count += 1
-                continue
+        columns = iptc_core.ColumnMap(
+            filename=self.filename_combo.currentIndex(),
+            title=self.title_combo.currentIndex(),
+            description=self.description_combo.currentIndex(),
+            keywords=self.keywords_combo.currentIndex(),
+        )
 
-            try:
-                self.write_iptc_data(file_path, title, description, keywords)
-                self.log(f"OK: {filename}")
-                processed_count += 1
-            except Exception as e:
-                self.log(f"Error processing {filename}: {str(e)}")
-                error_count += 1
-
-        self.log(f"Processing complete. {processed_count} files processed, {error_count} errors.")
+        # Log lengkap (dan metrics) tiap batch disimpan di folder logs
+        log_dir = os.path.join(iptc_core.STATE_DIR, "logs")
+        os.makedirs(log_dir, exist_ok=True)
+        run_name = log_sink.new_run_name(log_dir)
+        metrics_path = None
+        if self.metrics_check.isChecked():
+            metrics_path = os.path.join(log_dir, run_name + ".metrics.json")
+
+        self.worker_thread = QThread(self)
+        write_exif = self.exif_check.isChecked()
+        if self.xmp_check.isChecked():
+            # Import di sini: ElementTree dan template XMP hanya untuk mode XMP
+            import xmp
+            writer = partial(xmp.write_xmp, fsync=self.fsync_check.isChecked())
+            mode = writer_mode("xmp")
+            target = xmp.sidecar_path
+        else:
+            padding = iptc_core.DEFAULT_PADDING if self.padding_check.isChecked() else 0
+            writer = partial(
+                iptc_core.write_metadata if write_exif else iptc_core.write_iptc_data,
+                fsync=self.fsync_check.isChecked(),
+                backup=self.backup_check.isChecked(),
+                padding=padding,
+            )
+            mode = writer_mode("iptc", fields=iptc_core.FIELD_MAP if write_exif else iptc_core.IPTC_FIELD_MAP,
+                               padding=padding, strict=False, utf8=False)
+            target = None
+        self.worker = BatchWorker(self.manifest.rows(), columns, self.selected_folder,
+                                  workers=self.workers_spin.value(), writer=writer,
+                                  recursive=self.recursive_check.isChecked(),
+                                  total=self.manifest.estimate_rows(),
+                                  incremental=self.incremental_check.isChecked(),
+                                  manifest_path=self.manifest.path, resume=resume,
+                                  metrics_path=metrics_path,
+                                  mode=mode, target=target,
+                                  undo=self.undo_check.isChecked() and not self.xmp_check.isChecked())
+        self.worker.moveToThread(self.worker_thread)
+
+        queued = Qt.ConnectionType.QueuedConnection
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.file_done.connect(self.on_file_done, queued)
+        self.worker.message.connect(self.log, queued)
+        self.worker.progress.connect(self.on_progress, queued)
+        self.worker.finished.connect(self.on_batch_finished, queued)
+        self.worker.finished.connect(self.worker_thread.quit)
+        self.worker_thread.finished.connect(self.worker.deleteLater)
+        self.worker_thread.finished.connect(self.worker_thread.deleteLater)
+
+        if self.csv_model is not None:
+            self.csv_model.clear_status()
+
+        log_path = os.path.join(log_dir, run_name + ".log")
+        self.log_sink.open_file(log_path)
+        self.log(f"Log file: {log_path}")
+
+        self.set_running(True)
+        self.progress_bar.setValue(0)
+        self.worker_thread.start()
+
+    def on_xmp_toggled(self, checked, running=False):
+        # Opsi yang hanya berlaku saat gambar ditulis ulang
+        for check in (self.exif_check, self.padding_check, self.backup_check):
+            check.setEnabled(not running and not checked)
+
+    def set_running(self, running):
+        self.process_button.setEnabled(not running)
+        self.resume_button.setEnabled(not running)
+        self.folder_button.setEnabled(not running)
+        self.workers_spin.setEnabled(not running)
+        self.recursive_check.setEnabled(not running)
+        self.incremental_check.setEnabled(not running)
+        self.xmp_check.setEnabled(not running)
+        self.undo_check.setEnabled(not running)
+        self.on_xmp_toggled(self.xmp_check.isChecked(), running)
+        self.fsync_check.setEnabled(not running)
+        self.metrics_check.setEnabled(not running)
+        self.csv_button.setEnabled(not running)
+        self.pause_button.setEnabled(running)
+        self.pause_button.setText("Pause")
+        self.cancel_button.setEnabled(running)
+
+    def toggle_pause(self):
+        if self.worker is None:
+            return
+        if self.worker.is_paused():
+            self.worker.resume()
+            self.pause_button.setText("Pause")
+            self.log("Resumed")
+        else:
+            self.worker.pause()
+            self.pause_button.setText("Resume")
+            self.log("Paused")
+
+    def cancel_processing(self):
+        if self.worker is not None:
+            self.cancel_button.setEnabled(False)
+            self.worker.cancel()
+
+    def on_file_done(self, result):
+        self.log(result.message)
+        if self.csv_model is not None:
+            self.csv_model.set_status(result.row, result.status, result.message)
+
+    def on_progress(self, done, total):
+        # total dari manifest hanya perkiraan
+        self.progress_bar.setMaximum(max(total, done))
+        self.progress_bar.setValue(done)
+
+    def on_batch_finished(self, processed_count, skipped_count, error_count, cancelled):
+        self.worker = None
+        self.worker_thread = None
+        self.set_running(False)
+        self.check_process_ready()
+
+        title = "Processing Cancelled" if cancelled else "Processing Complete"
+        status = "cancelled" if cancelled else "complete"
+        unchanged = f", {skipped_count} unchanged" if skipped_count else ""
+        self.log(f"Processing {status}. {processed_count} files processed{unchanged}, {error_count} errors.")
+        self.flush_log()
+        self.log_sink.close_file()
         CustomMessageBox.show(
-            self, "Processing Complete",
-            f"Successfully processed: {processed_count} files\nErrors: {error_count}"
+            self, title,
+            f"Successfully processed: {processed_count} files\n"
+            + (f"Unchanged (skipped): {skipped_count} files\n" if skipped_count else "")
+            + f"Errors: {error_count}"
         )
 
-
-
     def write_iptc_data(self, image_path, title, description, keywords):
-        try:
-            info = IPTCInfo(image_path, force=True, inp_charset='utf-8', out_charset='utf-8')
-
-            if title:
-                info['object name'] = title
-
-            if description:
-                info['caption/abstract'] = description
-
-            if keywords:
-                cleaned = keywords.replace(";", ",")
-                keyword_list = [kw.strip() for kw in cleaned.split(",") if kw.strip()]
-                info['keywords'] = keyword_list
-
-            # Simpan perubahan
-            info.save_as(image_path)
-            print(f"Saved IPTC to: {image_path}")
-
-            # Hapus file setelah berhasil simpan
-            if os.path.exists(image_path):
-                os.remove(image_path+'~')
-                print(f"Deleted file: {image_path+'~'}")
-
-        except Exception as e:
-            print(f"Error writing IPTC data for {image_path}: {e}")
-
-
-        except Exception as e:
-            raise Exception(f"Failed to write IPTC data: {str(e)}")
+        iptc_core.write_iptc_data(image_path, title, description, keywords)
+
+    def closeEvent(self, event):
+        # Hentikan worker dengan rapi sebelum window ditutup
+        if self.loader_thread is not None:
+            self.loader.cancel()
+            self.loader_thread.quit()
+            self.loader_thread.wait()
+        if self.worker_thread is not None:
+            self.worker.finished.disconnect(self.on_batch_finished)
+            self.worker.cancel()
+            self.worker_thread.quit()
+            self.worker_thread.wait()
+        self.log_sink.close_file()
+        super().closeEvent(event)
 
 
 def main():
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = IPTCWriterApp()
     window.show()
@@ -0,0 +1,249 @@
+"""Benchmark jalur tulis IPTC dan EXIF dengan korpus JPEG sintetis.
+
+Contoh:
+    python bench.py --count 200 --sizes 1024x768,4000x3000 --existing-app13 \\
+        --keywords 30 --output bench-new.json
+    python bench.py --count 200 --compare bench-old.json
+
+Korpus dibuat dengan Pillow (noise acak supaya ukuran file realistis).
+Setiap target menulis ke salinan korpus yang baru, dan hanya waktu
+pemanggilan writer yang diukur.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+KEYWORD_POOL = [
+    "nature", "landscape", "water", "mountains", "street", "urban", "city", "portrait",
+    "cat", "pet", "sunset", "travel", "food", "architecture", "people", "night",
+]
+
+
+def parse_size(text):
+    w, _, h = text.lower().partition("x")
+    return int(w), int(h)
+
+
+def make_keywords(rng, count):
+    return ", ".join(f"{rng.choice(KEYWORD_POOL)}{i}" for i in range(count))
+
+
+def generate_corpus(folder, count, sizes, keywords=10, existing_app1=False,
+                    existing_app13=False, quality=90, seed=0):
+    """Buat `count` JPEG di folder; kembalikan list (path, title, description, keywords)."""
+    from PIL import Image
+
+    import iptc_core
+
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    jobs = []
+    # Noise dibuat sekali per ukuran lalu dipakai ulang
+    images = {}
+    for size in sizes:
+        images[size] = Image.frombytes("RGB", size, rng.randbytes(size[0] * size[1] * 3))
+
+    for i in range(count):
+        size = sizes[i % len(sizes)]
+        path = os.path.join(folder, f"bench_{i:06d}.jpg")
+        kwargs = {"quality": quality}
+        if existing_app1:
+            exif = Image.Exif()
+            exif[0x010e] = f"existing description {i}"
+            exif[0x0131] = "bench.py"
+            kwargs["exif"] = exif.tobytes()
+        images[size].save(path, "JPEG", **kwargs)
+        if existing_app13:
+            iptc_core.write_iptc_data(path, f"Old title {i}", "Old caption", make_keywords(rng, keywords))
+        jobs.append((path, f"Title {i}", f"Caption for image {i}", make_keywords(rng, keywords)))
+    return jobs
+
+
+def target_iptc_core():
+    import iptc_core
+    return iptc_core.write_iptc_data
+
+
+def target_iptcinfo3():
+    import iptc_core
+    return iptc_core.write_iptc_data_iptcinfo3
+
+
+def target_combined():
+    """IPTC + EXIF dalam satu kali tulis (iptc_core.write_metadata)."""
+    import iptc_core
+    return iptc_core.write_metadata
+
+
+def target_exif_app():
+    """EXIFWriterApp.write_exif_data (perlu PyQt6 dan piexif)."""
+    from exif_data import EXIFWriterApp
+    return lambda path, t, d, k: EXIFWriterApp.write_exif_data(None, path, t, d, k)
+
+
+TARGETS = {
+    "iptc-core": target_iptc_core,
+    "iptcinfo3": target_iptcinfo3,
+    "exif": target_exif_app,
+    "combined": target_combined,
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_target(writer, jobs, workdir, repeat=1):
+    """Jalankan writer untuk semua job; kembalikan ringkasan timing."""
+    latencies = []
+    total_bytes = 0
+    errors = 0
+    for _ in range(repeat):
+        if os.path.exists(workdir):
+            shutil.rmtree(workdir)
+        os.makedirs(workdir)
+        work = []
+        for path, title, description, keywords in jobs:
+            dst = os.path.join(workdir, os.path.basename(path))
+            shutil.copyfile(path, dst)
+            work.append((dst, title, description, keywords))
+
+        for path, title, description, keywords in work:
+            size = os.path.getsize(path)
+            start = time.perf_counter()
+            try:
+                writer(path, title, description, keywords)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+            total_bytes += size
+
+    elapsed = sum(latencies)
+    latencies.sort()
+    return {
+        "files": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "files_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "mb_per_sec": total_bytes / 1e6 / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def git_revision():
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        import subprocess
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=here,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def print_table(results, baseline=None):
+    header = f"{'target':<12}{'files/s':>10}{'MB/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    if baseline:
+        header += f"{'vs base':>10}"
+    print(header)
+    for name, r in results.items():
+        line = (f"{name:<12}{r['files_per_sec']:>10.1f}{r['mb_per_sec']:>10.1f}"
+                f"{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['errors']:>8}")
+        base = (baseline or {}).get(name)
+        if base and base.get("files_per_sec"):
+            line += f"{r['files_per_sec'] / base['files_per_sec']:>9.2f}x"
+        print(line)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bench.py", description="Benchmark the IPTC/EXIF write paths.")
+    parser.add_argument("--count", type=int, default=100, help="number of images in the corpus")
+    parser.add_argument("--sizes", default="1024x768",
+                        help="comma separated WxH image sizes, used round-robin (default: %(default)s)")
+    parser.add_argument("--keywords", type=int, default=10, help="keywords per image")
+    parser.add_argument("--existing-app1", action="store_true", help="give every image an EXIF APP1 segment")
+    parser.add_argument("--existing-app13", action="store_true", help="give every image an IPTC APP13 segment")
+    parser.add_argument("--quality", type=int, default=90, help="JPEG quality of the corpus")
+    parser.add_argument("--targets", default="iptc-core,iptcinfo3",
+                        help=f"comma separated targets from: {', '.join(TARGETS)} (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the corpus per target")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="directory for the corpus (default: a temporary directory)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", metavar="JSON", help="earlier --output file to compare against")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s]
+    targets = [t for t in args.targets.split(",") if t]
+    unknown = [t for t in targets if t not in TARGETS]
+    if unknown:
+        print(f"Error: unknown target(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    base = args.workdir or tempfile.mkdtemp(prefix="iptc-bench-")
+    corpus_dir = os.path.join(base, "corpus")
+    try:
+        start = time.perf_counter()
+        jobs = generate_corpus(corpus_dir, args.count, sizes, keywords=args.keywords,
+                               existing_app1=args.existing_app1, existing_app13=args.existing_app13,
+                               quality=args.quality, seed=args.seed)
+        corpus_bytes = sum(os.path.getsize(j[0]) for j in jobs)
+        print(f"Corpus: {len(jobs)} files, {corpus_bytes / 1e6:.1f} MB "
+              f"({time.perf_counter() - start:.1f}s to generate)", file=sys.stderr)
+
+        results = {}
+        for name in targets:
+            try:
+                writer = TARGETS[name]()
+            except ImportError as e:
+                print(f"Skipping {name}: {e}", file=sys.stderr)
+                continue
+            results[name] = run_target(writer, jobs, os.path.join(base, "work-" + name), args.repeat)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(base, ignore_errors=True)
+
+    report = {
+        "version": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "count": args.count, "sizes": args.sizes, "keywords": args.keywords,
+            "existing_app1": args.existing_app1, "existing_app13": args.existing_app13,
+            "quality": args.quality, "repeat": args.repeat, "seed": args.seed,
+            "corpus_bytes": corpus_bytes,
+        },
+        "results": results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f).get("results")
+    print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
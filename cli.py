@@ -0,0 +1,246 @@
+"""Batch IPTC tanpa GUI (untuk cron / pipeline ingest di server tanpa display).
+
+Contoh:
+    python cli.py /data/shoot manifest.csv --workers 8
+    python cli.py /data/shoot manifest.csv --title-column Judul --dry-run
+
+Tidak mengimport PyQt6 sama sekali.
+"""
+import argparse
+import sys
+from functools import partial
+
+import iptc_core
+import log_sink
+import metrics
+from file_index import FileIndex
+from journal import (DEFAULT_CHECKPOINT_DIR, DEFAULT_FINGERPRINT_PATH, DEFAULT_UNDO_PATH, CheckpointJournal,
+                     FingerprintJournal, UndoJournal, checkpoint_key, writer_mode)
+from manifest import Manifest, guess_column, norm
+from manifest_store import DEFAULT_CACHE_DIR, ManifestStore
+from pipeline import PipelineConfig
+
+FIELDS = ("filename", "title", "description", "keywords")
+
+
+def resolve_column(headers, field, name):
+    """Indeks kolom dari nama header (atau nomor kolom mulai 1); tebak bila None."""
+    if name is None:
+        col = guess_column(headers, field)
+        if col < 0:
+            raise ValueError(f"Could not guess the {field} column, use --{field}-column")
+        return col
+    norm_headers = [norm(h) for h in headers]
+    if norm(name) in norm_headers:
+        return norm_headers.index(norm(name))
+    if name.isdigit() and 1 <= int(name) <= len(headers):
+        return int(name) - 1
+    raise ValueError(f"Column not found for {field}: {name}")
+
+
+def stage_threads(value):
+    """Argumen --pipeline "R,E,W" -> (readers, encoders, writers)."""
+    try:
+        counts = tuple(int(n) for n in value.split(","))
+    except ValueError:
+        counts = ()
+    if len(counts) != 3 or min(counts) < 1:
+        raise argparse.ArgumentTypeError("expected three positive numbers, e.g. 2,1,2")
+    return counts
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Write IPTC title, description and keywords to JPG files from a CSV manifest.",
+    )
+    parser.add_argument("folder", help="folder with the JPG files")
+    parser.add_argument("manifest", help="CSV file with one row per image")
+    for field in FIELDS:
+        parser.add_argument(f"--{field}-column", metavar="NAME",
+                            help=f"CSV header (or 1-based column number) for {field}; guessed if omitted")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="number of worker processes (default: 1)")
+    parser.add_argument("--pipeline", type=stage_threads, metavar="R,E,W",
+                        help="overlap disk and CPU work: R threads read headers, E threads encode "
+                             "and W threads write, connected by bounded queues (e.g. 2,1,2)")
+    parser.add_argument("--index-manifest", action="store_true",
+                        help="import the CSV once into an SQLite cache and read rows from it on "
+                             "later runs (for manifests with millions of rows)")
+    parser.add_argument("--manifest-cache", metavar="DIR", default=DEFAULT_CACHE_DIR,
+                        help="directory of the --index-manifest cache (default: %(default)s)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="also match files in subfolders")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="check rows and files but do not write anything")
+    parser.add_argument("-i", "--incremental", action="store_true",
+                        help="skip files whose metadata is unchanged since the last successful write")
+    parser.add_argument("--journal", metavar="PATH", default=DEFAULT_FINGERPRINT_PATH,
+                        help="fingerprint journal used by --incremental (default: %(default)s)")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip rows completed by an earlier, interrupted run of the same "
+                             "manifest, folder and column mapping")
+    parser.add_argument("--checkpoint-dir", metavar="DIR", default=DEFAULT_CHECKPOINT_DIR,
+                        help="where progress checkpoints are kept (default: %(default)s)")
+    parser.add_argument("--exif", action="store_true",
+                        help="also write EXIF ImageDescription, UserComment and XPKeywords "
+                             "in the same pass")
+    parser.add_argument("--xmp", action="store_true",
+                        help="write dc:title, dc:description and dc:subject to an XMP sidecar "
+                             "(<name>.xmp) instead of rewriting the images")
+    parser.add_argument("--xmp-embed-below", type=int, default=0, metavar="BYTES",
+                        help="with --xmp, embed the XMP in images up to BYTES in size "
+                             "instead of writing a sidecar")
+    parser.add_argument("--strict", action="store_true",
+                        help="reject rows whose IPTC values exceed the IIM maximum lengths "
+                             "(e.g. 64 bytes for the title and each keyword)")
+    parser.add_argument("--iptc-utf8", action="store_true",
+                        help="declare UTF-8 in IPTC record 1:90 (CodedCharacterSet); "
+                             "some readers assume Latin-1 without it")
+    parser.add_argument("--padding", type=int, default=0, metavar="BYTES",
+                        help="reserve BYTES of padding in the metadata segments; later edits "
+                             "that fit are written in place instead of rewriting the file")
+    parser.add_argument("--undo", action="store_true",
+                        help="record the original metadata segments of every file so the batch "
+                             "can be rolled back with rollback.py")
+    parser.add_argument("--undo-journal", metavar="PATH", default=DEFAULT_UNDO_PATH,
+                        help="undo journal used by --undo (default: %(default)s)")
+    parser.add_argument("--backup", action="store_true",
+                        help="keep the previous version of each file as <name>~")
+    parser.add_argument("--fsync", action="store_true",
+                        help="flush each file to disk before replacing the original")
+    parser.add_argument("--log-file", metavar="PATH",
+                        help="also write the full log to PATH")
+    parser.add_argument("--metrics-json", metavar="PATH",
+                        help="write per-stage timings and counters as JSON to PATH")
+    parser.add_argument("--metrics-prom", metavar="PATH",
+                        help="write the same metrics in Prometheus text format "
+                             "(for the node_exporter textfile collector)")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="only print warnings, errors and the summary")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.pipeline and args.workers > 1:
+        parser.error("--pipeline and --workers cannot be combined")
+    if args.xmp and (args.exif or args.pipeline):
+        parser.error("--xmp cannot be combined with --exif or --pipeline")
+    if args.undo and args.xmp and not args.xmp_embed_below:
+        parser.error("--undo has nothing to record with --xmp sidecars")
+    recorder = metrics.Recorder() if args.metrics_json or args.metrics_prom else None
+
+    try:
+        manifest = Manifest(args.manifest)
+        if not manifest.headers:
+            raise ValueError("CSV file is empty")
+        columns = iptc_core.ColumnMap(*(
+            resolve_column(manifest.headers, field, getattr(args, f"{field}_column"))
+            for field in FIELDS
+        ))
+        if args.index_manifest:
+            with (recorder or metrics.NULL).time("manifest"):
+                manifest = ManifestStore(args.manifest, cache_dir=args.manifest_cache,
+                                         filename_column=columns.filename)
+        with (recorder or metrics.NULL).time("index"):
+            index = FileIndex(args.folder, recursive=args.recursive)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    pipeline = None
+    target = None  # file yang dicatat journal; default gambarnya
+    if args.dry_run:
+        writer = iptc_core.check_jpeg
+    elif args.xmp:
+        # Import di sini: ElementTree dan template XMP hanya untuk mode XMP
+        import xmp
+        writer = partial(xmp.write_xmp, embed_below=args.xmp_embed_below,
+                         fsync=args.fsync, backup=args.backup)
+        mode = writer_mode("xmp")
+        target = partial(xmp.output_path, embed_below=args.xmp_embed_below)
+    else:
+        writer = partial(iptc_core.write_metadata if args.exif else iptc_core.write_iptc_data,
+                         fsync=args.fsync, backup=args.backup, padding=args.padding,
+                         strict=args.strict, utf8=args.iptc_utf8)
+        mode = writer_mode("iptc", fields=iptc_core.FIELD_MAP if args.exif else iptc_core.IPTC_FIELD_MAP,
+                           padding=args.padding, strict=args.strict, utf8=args.iptc_utf8)
+        if args.pipeline:
+            options = iptc_core.WriteOptions(
+                fields=iptc_core.FIELD_MAP if args.exif else iptc_core.IPTC_FIELD_MAP,
+                fsync=args.fsync, backup=args.backup, padding=args.padding,
+                strict=args.strict, utf8=args.iptc_utf8)
+            pipeline = PipelineConfig(*args.pipeline, options=options)
+
+    # Dry run tidak menulis, jadi journal dan checkpoint tidak dipakai
+    journal = FingerprintJournal(args.journal, mode, target) if args.incremental and not args.dry_run else None
+    checkpoint = None
+    undo = None
+    if not args.dry_run:
+        checkpoint = CheckpointJournal(checkpoint_key(args.manifest, columns, args.folder),
+                                       folder=args.checkpoint_dir, resume=args.resume)
+        if args.undo:
+            undo = UndoJournal(args.undo_journal)
+            undo.begin_batch(args.folder, args.manifest)
+
+    sink = log_sink.LogSink(level=log_sink.WARNING if args.quiet else log_sink.INFO,
+                            path=args.log_file)
+    if args.resume and checkpoint is not None:
+        sink.write(f"Resuming: {len(checkpoint.completed)} rows already completed")
+
+    counts = {iptc_core.OK: 0, iptc_core.SKIPPED: 0, iptc_core.ERROR: 0}
+    results = iptc_core.process_rows(manifest.rows(), columns, args.folder, writer=writer,
+                                     workers=args.workers, index=index, journal=journal,
+                                     checkpoint=checkpoint, recorder=recorder, pipeline=pipeline,
+                                     undo=undo)
+    status = "failed"
+    try:
+        for result in results:
+            counts[result.status] += 1
+            sink.write(result.message)
+            for line in sink.drain():
+                print(line)
+        status = "complete"
+    except KeyboardInterrupt:
+        results.close()
+        status = "cancelled"
+    finally:
+        if journal is not None:
+            journal.close()
+        if checkpoint is not None:
+            if status == "complete" and not counts[iptc_core.ERROR]:
+                checkpoint.discard()
+            else:
+                checkpoint.close()
+        if undo is not None:
+            undo.close()
+        if args.index_manifest:
+            manifest.close()
+
+    verb = "checked" if args.dry_run else "processed"
+    error_count = counts[iptc_core.ERROR]
+    unchanged = f", {counts[iptc_core.SKIPPED]} unchanged" if counts[iptc_core.SKIPPED] else ""
+    sink.write(f"Processing {status}. {counts[iptc_core.OK]} files {verb}{unchanged}, {error_count} errors.",
+               log_sink.ERROR if error_count else log_sink.INFO)
+    if undo is not None:
+        sink.write(f"Undo batch {undo.batch} recorded; roll back with: python rollback.py {undo.batch}")
+    for line in sink.drain():
+        print(line)
+    sink.close_file()
+
+    if recorder is not None:
+        recorder.finish()
+        if args.metrics_json:
+            recorder.write_json(args.metrics_json)
+        if args.metrics_prom:
+            recorder.write_prometheus(args.metrics_prom)
+
+    if status == "cancelled":
+        return 130
+    return 1 if error_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.fixture
+def make_jpeg():
+    """make_jpeg(path, exif=None): JPEG kecil tanpa metadata.
+
+    exif: {tag: nilai} untuk IFD0, atau objek PIL.Image.Exif yang sudah diisi.
+    """
+    Image = pytest.importorskip("PIL.Image")
+
+    def make(path, exif=None):
+        kwargs = {}
+        if exif is not None:
+            if not isinstance(exif, Image.Exif):
+                tags, exif = exif, Image.Exif()
+                exif.update(tags)
+            kwargs["exif"] = exif.tobytes()
+        Image.new("RGB", (16, 16), (10, 20, 30)).save(str(path), "JPEG", **kwargs)
+
+    return make
@@ -0,0 +1,203 @@
+"""Model tabel Qt untuk preview CSV tanpa QTableWidgetItem per sel.
+
+Baris diambil bertahap dari iterator manifest lewat fetchMore, dan sel
+baru dibuat string-nya ketika view memintanya. StoreTableModel membaca
+per halaman dari ManifestStore, jadi semua baris langsung bisa di-scroll.
+"""
+import itertools
+from collections import OrderedDict
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtGui import QColor
+
+import iptc_core
+from manifest_store import filename_key
+
+
+class CsvTableModel(QAbstractTableModel):
+    BATCH_SIZE = 500
+    # Pesan tooltip yang disimpan (LRU); pesan lama tetap ada di log
+    MESSAGE_CAPACITY = 1000
+
+    # Status per baris disimpan 1 byte di bytearray (0 = belum diproses)
+    STATUS_CODES = {iptc_core.OK: 1, iptc_core.ERROR: 2, iptc_core.SKIPPED: 3}
+    CODE_STATUS = {code: status for status, code in STATUS_CODES.items()}
+
+    STATUS_COLORS = {
+        iptc_core.OK: QColor("#d7f5d7"),
+        iptc_core.ERROR: QColor("#f8d7d7"),
+        iptc_core.SKIPPED: QColor("#e4e4e4"),
+    }
+
+    def __init__(self, headers, rows, parent=None):
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._source = iter(rows)
+        self._rows = []
+        self._exhausted = False
+        self._status = bytearray()  # index baris -> kode status
+        self._messages = OrderedDict()  # index baris -> pesan, hanya yang terbaru
+
+    # --- ukuran & isi ---------------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.ItemDataRole.DisplayRole:
+            cells = self._cells(row)
+            col = index.column()
+            return cells[col] if col < len(cells) else ""
+        if role == Qt.ItemDataRole.BackgroundRole:
+            status = self.status(row)
+            return self.STATUS_COLORS.get(status) if status else None
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self._messages.get(row)
+        return None
+
+    def status(self, row):
+        """Status hasil proses untuk index baris, None bila belum diproses."""
+        return self.CODE_STATUS.get(self._status[row]) if row < len(self._status) else None
+
+    def _cells(self, row):
+        return self._rows[row]
+
+    def _loaded(self):
+        return len(self._rows)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._headers[section] if section < len(self._headers) else None
+        # Nomor baris real di CSV (header = baris 1)
+        return str(section + 2)
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    # --- loading bertahap -----------------------------------------------
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        batch = list(itertools.islice(self._source, self.BATCH_SIZE))
+        if len(batch) < self.BATCH_SIZE:
+            self._exhausted = True
+        if not batch:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(batch) - 1)
+        self._rows.extend(batch)
+        self.endInsertRows()
+
+    # --- status pemrosesan ----------------------------------------------
+
+    def set_status(self, csv_row, status, message=""):
+        """Tandai baris (nomor baris CSV) dengan status hasil proses."""
+        row = csv_row - 2
+        if row < 0:
+            return
+        if row >= len(self._status):
+            self._status.extend(bytes(row + 1 - len(self._status)))
+        self._status[row] = self.STATUS_CODES.get(status, 0)
+        if message:
+            self._messages[row] = message
+            self._messages.move_to_end(row)
+            if len(self._messages) > self.MESSAGE_CAPACITY:
+                self._messages.popitem(last=False)
+        else:
+            self._messages.pop(row, None)
+        if row < self._loaded():
+            self.dataChanged.emit(
+                self.index(row, 0), self.index(row, max(len(self._headers) - 1, 0)),
+                [Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ToolTipRole],
+            )
+
+    def clear_status(self):
+        if not self._status:
+            return
+        self._status = bytearray()
+        self._messages.clear()
+        if self._loaded():
+            self.dataChanged.emit(
+                self.index(0, 0), self.index(self._loaded() - 1, max(len(self._headers) - 1, 0)),
+                [Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ToolTipRole],
+            )
+
+    def sample_column_widths(self, metrics, sample=200, padding=24, max_width=400):
+        """Lebar kolom dari header + beberapa baris pertama saja (bukan ResizeToContents)."""
+        rows = [self._cells(i) for i in range(min(sample, self._loaded()))]
+        widths = []
+        for col, header in enumerate(self._headers):
+            texts = [header] + [r[col] for r in rows if col < len(r)]
+            width = max(metrics.horizontalAdvance(t) for t in texts) + padding
+            widths.append(min(width, max_width))
+        return widths
+
+    # --- cari nama file ---------------------------------------------------
+
+    def find_row(self, text, column):
+        """Index baris pertama yang nama filenya (kolom column) diawali text, -1 bila tidak ada.
+
+        Baris yang belum dimuat diambil lewat fetchMore sampai ketemu.
+        """
+        prefix = filename_key(text)
+        row = 0
+        while True:
+            for row in range(row, self._loaded()):
+                cells = self._cells(row)
+                if column < len(cells) and filename_key(cells[column]).startswith(prefix):
+                    return row
+            row = self._loaded()
+            if not self.canFetchMore():
+                return -1
+            self.fetchMore()
+
+
+class StoreTableModel(CsvTableModel):
+    """Model untuk ManifestStore: rowCount = semua baris, sel dibaca per halaman."""
+    PAGE_SIZE = 500
+    # Halaman yang disimpan (LRU), memori tetap kecil berapa pun jumlah barisnya
+    MAX_PAGES = 20
+
+    def __init__(self, store, parent=None):
+        super().__init__(store.headers, (), parent)
+        self._store = store
+        self._exhausted = True
+        self._pages = OrderedDict()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._store.count
+
+    def _loaded(self):
+        return self._store.count
+
+    def _cells(self, row):
+        number = row // self.PAGE_SIZE
+        page = self._pages.get(number)
+        if page is None:
+            page = self._store.page(number * self.PAGE_SIZE, self.PAGE_SIZE)
+            self._pages[number] = page
+            if len(self._pages) > self.MAX_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(number)
+        offset = row - number * self.PAGE_SIZE
+        return page[offset] if offset < len(page) else []
+
+    def find_row(self, text, column):
+        """Lewat index nama file di SQLite; kolom lain dicari baris per baris."""
+        if column != self._store.filename_column:
+            return super().find_row(text, column)
+        found = self._store.search(text, limit=1)
+        return found[0][0] - 2 if found else -1
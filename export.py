@@ -0,0 +1,159 @@
+"""Ekspor metadata IPTC (dan EXIF) yang ada di folder gambar ke CSV atau JSONL.
+
+Contoh:
+    python export.py /data/shoot current.csv --recursive --workers 8
+    python export.py /data/shoot current.jsonl --exif
+
+Kolom CSV sama dengan yang dikenali GUI dan cli.py (Filename, Title,
+Description, Keywords), jadi hasilnya bisa langsung dipakai lagi sebagai
+manifest. Hanya header tiap file yang dibaca (lihat metadata_reader).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Iterable, Iterator
+
+from file_index import JPEG_EXTS, scan
+from metadata_reader import EXIF_FIELDS, read_metadata
+
+COLUMNS = ["Filename", "Title", "Description", "Keywords"]
+EXIF_COLUMNS = list(EXIF_FIELDS.values())
+
+# Jumlah file per task untuk worker (mengurangi overhead antar proses)
+BATCH_SIZE = 256
+
+
+def read_batch(batch: list) -> list:
+    """Baca metadata untuk list (path relatif, path); error jadi string."""
+    out = []
+    for rel, path in batch:
+        try:
+            out.append((rel, read_metadata(path)))
+        except (OSError, ValueError) as e:
+            out.append((rel, str(e)))
+    return out
+
+
+def batches(items: Iterable, size: int = BATCH_SIZE) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def read_folder(folder: str, recursive: bool = False, workers: int = 1,
+                max_in_flight=None) -> Iterator[tuple]:
+    """Yield (path relatif, Metadata atau pesan error) untuk setiap JPEG, urut nama.
+
+    workers>1 membaca per batch di process pool; jumlah batch yang sedang
+    dikerjakan dibatasi max_in_flight (default 4 x workers) dan hasil
+    tetap keluar sesuai urutan.
+    """
+    files = sorted((rel, path) for rel, path in scan(folder, recursive)
+                   if rel.lower().endswith(JPEG_EXTS))
+    if workers <= 1:
+        for batch in batches(files):
+            yield from read_batch(batch)
+        return
+
+    # Import di sini: multiprocessing cukup mahal untuk startup
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    from iptc_core import pool_context
+
+    max_in_flight = max_in_flight or workers * 4
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as pool:
+        try:
+            for batch in batches(files):
+                pending.append(pool.submit(read_batch, batch))
+                if len(pending) >= max_in_flight:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def to_row(meta, exif: bool = False) -> dict:
+    row = {
+        "Title": meta.title,
+        "Description": meta.description,
+        "Keywords": ", ".join(meta.keywords),
+    }
+    if exif:
+        for name in EXIF_COLUMNS:
+            row[name] = meta.exif.get(name, "")
+    return row
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="export.py",
+        description="Export the IPTC title, description and keywords of JPG files to CSV or JSONL.",
+    )
+    parser.add_argument("folder", help="folder with the JPG files")
+    parser.add_argument("output", help="CSV or JSONL file to write ('-' for stdout)")
+    parser.add_argument("-f", "--format", choices=("csv", "jsonl"),
+                        help="output format (default: from the file extension, else csv)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="also export images in subfolders (Filename is the relative path)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="number of worker processes (default: 1)")
+    parser.add_argument("--exif", action="store_true",
+                        help="add ImageDescription, UserComment and XPKeywords columns")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    fmt = args.format or ("jsonl" if args.output.lower().endswith((".jsonl", ".ndjson")) else "csv")
+    columns = COLUMNS + (EXIF_COLUMNS if args.exif else [])
+
+    if not os.path.isdir(args.folder):
+        print(f"Error: not a folder: {args.folder}", file=sys.stderr)
+        return 2
+
+    if args.output == "-":
+        out = sys.stdout
+    else:
+        out = open(args.output, "w", encoding="utf-8", newline="")
+
+    count = errors = 0
+    try:
+        if fmt == "csv":
+            writer = csv.writer(out)
+            writer.writerow(columns)
+        for rel, meta in read_folder(args.folder, args.recursive, args.workers):
+            if isinstance(meta, str):
+                errors += 1
+                print(f"Error reading {rel}: {meta}", file=sys.stderr)
+                continue
+            row = to_row(meta, args.exif)
+            row["Filename"] = rel
+            if fmt == "csv":
+                writer.writerow([row[c] for c in columns])
+            else:
+                out.write(json.dumps({c: row[c] for c in columns}, ensure_ascii=False) + "\n")
+            count += 1
+    except KeyboardInterrupt:
+        print("Export cancelled.", file=sys.stderr)
+        return 130
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Exported {count} files, {errors} errors.", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
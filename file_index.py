@@ -0,0 +1,121 @@
+"""Indeks nama file satu folder, dibangun sekali dengan os.scandir.
+
+Dipakai untuk mencocokkan kolom filename di CSV ke file di disk tanpa
+os.path.exists per baris.
+"""
+import os
+import unicodedata
+from typing import Optional
+
+JPEG_EXTS = (".jpg", ".jpeg")
+# Prefix temp file dari atomic_rewrite, tidak ikut diindeks
+TEMP_PREFIX = ".iptc-"
+
+
+def fold(name: str) -> str:
+    """Normalisasi NFC + casefold untuk pencocokan tidak peka huruf besar/kecil."""
+    return unicodedata.normalize("NFC", name).casefold()
+
+
+def scan(folder: str, recursive: bool = False):
+    """Yield (path relatif dengan "/", path lengkap) untuk setiap file di folder.
+
+    Temp file atomic_rewrite dilewati; subfolder hanya dimasuki bila recursive.
+    """
+    stack = [("", folder)]
+    while stack:
+        prefix, current = stack.pop()
+        with os.scandir(current) as it:
+            for entry in it:
+                if entry.name.startswith(TEMP_PREFIX):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append((prefix + entry.name + "/", entry.path))
+                    continue
+                if entry.is_file():
+                    yield prefix + entry.name, entry.path
+
+
+class FileIndex:
+    """Peta nama file -> path lengkap untuk satu folder (opsional rekursif).
+
+    Key yang diindeks: path relatif (pakai "/") dan, untuk subfolder, juga
+    nama file-nya saja. Pencarian dicoba berurutan: persis, Unicode NFC,
+    case-insensitive, path di subfolder (hanya indeks non-rekursif, yang
+    tidak memuat subfolder), lalu tanpa ekstensi.
+    """
+
+    def __init__(self, folder: str, recursive: bool = False):
+        self.folder = folder
+        self.recursive = recursive
+        self._exact = {}
+        self._nfc = {}
+        self._folded = {}
+        self._stems = {}
+        self._folded_stems = {}
+        self.count = 0
+        self._scan()
+
+    def _add(self, key, path):
+        nfc = unicodedata.normalize("NFC", key)
+        folded = nfc.casefold()
+        for table, k in ((self._exact, key), (self._nfc, nfc), (self._folded, folded),
+                         (self._stems, os.path.splitext(nfc)[0]),
+                         (self._folded_stems, os.path.splitext(folded)[0])):
+            paths = table.setdefault(k, [])
+            if path not in paths:
+                paths.append(path)
+
+    def _scan(self):
+        for rel, path in scan(self.folder, self.recursive):
+            self.count += 1
+            self._add(rel, path)
+            if "/" in rel:
+                self._add(rel.rsplit("/", 1)[1], path)
+
+    def lookup(self, filename: str, ignore_case: bool = True,
+               ignore_extension: bool = True) -> list:
+        """Semua kandidat path untuk filename pada tingkat pencocokan pertama yang kena."""
+        key = filename.replace("\\", "/").lstrip("/")
+        if key.startswith("./"):
+            key = key[2:]
+
+        found = self._exact.get(key)
+        if found:
+            return found
+        nfc = unicodedata.normalize("NFC", key)
+        found = self._nfc.get(nfc)
+        if found:
+            return found
+        if ignore_case:
+            found = self._folded.get(fold(key))
+            if found:
+                return found
+        if "/" in key and not self.recursive:
+            found = self._subfolder_path(key)
+            if found:
+                return found
+        if ignore_extension:
+            stem = os.path.splitext(nfc)[0]
+            found = self._stems.get(stem)
+            if not found and ignore_case:
+                found = self._folded_stems.get(stem.casefold())
+            found = found or []
+            # RAW+JPEG: utamakan file JPEG bila ada beberapa ekstensi
+            jpegs = [p for p in found if p.lower().endswith(JPEG_EXTS)]
+            return jpegs or found
+        return []
+
+    def _subfolder_path(self, key: str) -> list:
+        """[folder/key] bila file itu ada; satu stat, hanya untuk nama dengan separator."""
+        rel = os.path.normpath(key)
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep) or os.path.isabs(rel):
+            return []
+        path = os.path.join(self.folder, rel)
+        return [path] if os.path.isfile(path) else []
+
+    def resolve(self, filename: str, **kwargs) -> Optional[str]:
+        """Path tunggal untuk filename, atau None bila tidak ada / ambigu."""
+        found = self.lookup(filename, **kwargs)
+        return found[0] if len(found) == 1 else None
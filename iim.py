@@ -0,0 +1,231 @@
+"""Encode/decode data IPTC-IIM (record 2) untuk blok 8BIM 0x0404.
+
+Semua dataset didefinisikan sekali di tabel DATASETS (nama, panjang
+maksimum, boleh berulang); header dataset di-pack dengan Struct yang sudah
+dikompilasi. Urutan dan aturan merge mengikuti iptcinfo3 supaya hasil tulis
+native sama persis dengan IPTCInfo.save_as.
+"""
+from struct import Struct
+from typing import NamedTuple
+
+TAG = 0x1c
+
+# Record 1 (envelope): 1:90 CodedCharacterSet, ESC % G = UTF-8
+ENVELOPE = 1
+CODED_CHARACTER_SET = 90
+UTF8_MARKER = b"\x1b%G"
+
+# Panjang maksimum tanpa extended dataset (bit 15 menandai extended length)
+MAX_LENGTH = 0x7fff
+
+HEADER = Struct("!BBBH")
+
+
+class Dataset(NamedTuple):
+    name: str
+    max_length: int
+    repeatable: bool
+
+
+# Dataset record 2 yang ditulis ulang oleh iptcinfo3 (c_datasets), dengan
+# panjang maksimum dan sifat berulang dari spesifikasi IIM 4.2
+DATASETS = {
+    5: Dataset("object name", 64, False),
+    7: Dataset("edit status", 64, False),
+    8: Dataset("editorial update", 2, False),
+    10: Dataset("urgency", 1, False),
+    12: Dataset("subject reference", 236, True),
+    15: Dataset("category", 3, False),
+    20: Dataset("supplemental category", 32, True),
+    22: Dataset("fixture identifier", 32, False),
+    25: Dataset("keywords", 64, True),
+    26: Dataset("content location code", 3, True),
+    27: Dataset("content location name", 64, True),
+    30: Dataset("release date", 8, False),
+    35: Dataset("release time", 11, False),
+    37: Dataset("expiration date", 8, False),
+    38: Dataset("expiration time", 11, False),
+    40: Dataset("special instructions", 256, False),
+    42: Dataset("action advised", 2, False),
+    45: Dataset("reference service", 10, True),
+    47: Dataset("reference date", 8, True),
+    50: Dataset("reference number", 8, True),
+    55: Dataset("date created", 8, False),
+    60: Dataset("time created", 11, False),
+    62: Dataset("digital creation date", 8, False),
+    63: Dataset("digital creation time", 11, False),
+    65: Dataset("originating program", 32, False),
+    70: Dataset("program version", 10, False),
+    75: Dataset("object cycle", 1, False),
+    80: Dataset("by-line", 32, True),
+    85: Dataset("by-line title", 32, True),
+    90: Dataset("city", 32, False),
+    92: Dataset("sub-location", 32, False),
+    95: Dataset("province/state", 32, False),
+    100: Dataset("country/primary location code", 3, False),
+    101: Dataset("country/primary location name", 64, False),
+    103: Dataset("original transmission reference", 32, False),
+    105: Dataset("headline", 256, False),
+    110: Dataset("credit line", 32, False),
+    115: Dataset("source", 32, False),
+    116: Dataset("copyright notice", 128, False),
+    118: Dataset("contact", 128, True),
+    120: Dataset("caption/abstract", 2000, False),
+    121: Dataset("local caption", 256, False),
+    122: Dataset("writer/editor", 32, True),
+    130: Dataset("image type", 2, False),
+    131: Dataset("image orientation", 1, False),
+    135: Dataset("language identifier", 3, False),
+}
+# Field custom Fotostation, tidak standar dan tanpa batas panjang
+DATASETS.update({n: Dataset(f"custom{n - 199}", MAX_LENGTH, False) for n in range(200, 220)})
+
+KNOWN_DATASETS = frozenset(DATASETS)
+# Dataset yang diperlakukan sebagai list saat merge, sama seperti iptcinfo3
+LIST_DATASETS = (20, 25, 118)
+
+OBJECT_NAME = 5
+KEYWORDS = 25
+CAPTION = 120
+
+RECORD_VERSION = HEADER.pack(TAG, 2, 0, 2) + b"\x00\x04"
+CHARSET_UTF8 = HEADER.pack(TAG, ENVELOPE, CODED_CHARACTER_SET, len(UTF8_MARKER)) + UTF8_MARKER
+
+
+class IIMError(ValueError):
+    """Nilai dataset tidak bisa (atau tidak boleh) ditulis."""
+
+
+def parse(data: bytes) -> list:
+    """Pecah stream IIM menjadi list (record, dataset, value)."""
+    out = []
+    append = out.append
+    offset = 0
+    end = len(data)
+    while offset + 5 <= end and data[offset] == TAG:
+        record = data[offset + 1]
+        dataset = data[offset + 2]
+        length = data[offset + 3] << 8 | data[offset + 4]
+        offset += 5
+        if length & 0x8000:
+            # Extended dataset: panjang disimpan di n byte berikutnya
+            n = length & 0x7fff
+            length = int.from_bytes(data[offset:offset + n], "big")
+            offset += n
+        append((record, dataset, data[offset:offset + length]))
+        offset += length
+    return out
+
+
+def decode(data: bytes) -> dict:
+    """Dataset record 2 sebagai {dataset: str}, dataset berulang sebagai list.
+
+    Teks didecode sebagai UTF-8; byte yang tidak valid diganti.
+    """
+    out = {}
+    for record, dataset, value in parse(data):
+        if record != 2 or dataset == 0:
+            continue
+        text = bytes(value).rstrip(b"\x00").decode("utf-8", errors="replace")
+        info = DATASETS.get(dataset)
+        if info is not None and info.repeatable:
+            out.setdefault(dataset, []).append(text)
+        else:
+            out[dataset] = text
+    return out
+
+
+def validate(data: dict) -> list:
+    """Pesan untuk setiap nilai yang melebihi panjang maksimum IIM."""
+    problems = []
+    for dataset, value in data.items():
+        info = DATASETS.get(dataset)
+        if info is None:
+            continue
+        values = value if isinstance(value, list) else [value]
+        for v in values:
+            if len(v) > info.max_length:
+                problems.append(f"IPTC {info.name} is {len(v)} bytes, maximum is {info.max_length}")
+    return problems
+
+
+def pack_value(dataset: int, value) -> bytes:
+    """Dataset record 2 (bytes atau list bytes) sebagai stream IIM; b"" bila kosong."""
+    if not value or dataset not in KNOWN_DATASETS:
+        return b""
+    pack = HEADER.pack
+    out = []
+    if isinstance(value, list):
+        seen = set()
+        for v in value:
+            if not v or v in seen:
+                continue
+            seen.add(v)
+            if len(v) > MAX_LENGTH:
+                raise IIMError(f"IPTC {DATASETS[dataset].name} is too long ({len(v)} bytes)")
+            out.append(pack(TAG, 2, dataset, len(v)))
+            out.append(v)
+    else:
+        if len(value) > MAX_LENGTH:
+            raise IIMError(f"IPTC {DATASETS[dataset].name} is too long ({len(value)} bytes)")
+        out.append(pack(TAG, 2, dataset, len(value)))
+        out.append(value)
+    return b"".join(out)
+
+
+def pack_updates(updates: dict, strict: bool = False) -> dict:
+    """updates {dataset: bytes | [bytes]} yang sudah di-pack, untuk merge_packed.
+
+    Tidak bergantung pada IIM lama, jadi bisa di-memoize per kombinasi
+    field. strict=True menolak nilai yang melebihi panjang maksimum (IIMError).
+    """
+    if strict:
+        problems = validate(updates)
+        if problems:
+            raise IIMError("; ".join(problems))
+    return {dataset: pack_value(dataset, value) for dataset, value in updates.items()}
+
+
+def merge(existing: bytes, updates: dict, strict: bool = False, utf8: bool = False) -> bytes:
+    """Gabungkan dataset record 2 lama dengan updates {dataset: bytes | [bytes]}.
+
+    Dataset list ditaruh paling depan, dataset lain sesuai urutan di file,
+    lalu dataset baru. Dataset yang tidak dikenal ikut dibuang seperti di
+    iptcinfo3. strict=True menolak nilai updates yang melebihi panjang
+    maksimum (IIMError); utf8: lihat pack_datasets. 1:90 UTF-8 yang sudah
+    ada di existing selalu ditulis lagi.
+    """
+    return merge_packed(existing, pack_updates(updates, strict), utf8=utf8)
+
+
+def merge_packed(existing: bytes, packed: dict, utf8: bool = False) -> bytes:
+    """merge dengan updates yang sudah di-pack (lihat pack_updates)."""
+    data = {ds: [] for ds in LIST_DATASETS}
+    for record, dataset, value in parse(existing):
+        if record != 2:
+            # Tanpa 1:90 reader membaca teks non-ASCII sebagai Latin-1
+            if record == ENVELOPE and dataset == CODED_CHARACTER_SET and value == UTF8_MARKER:
+                utf8 = True
+            continue
+        if dataset in LIST_DATASETS:
+            if value not in data[dataset]:
+                data[dataset].append(value)
+        elif dataset != 0:
+            data[dataset] = value
+    # Posisi dataset lama dipertahankan, dataset baru di belakang
+    data.update(dict.fromkeys(packed))
+    out = [CHARSET_UTF8, RECORD_VERSION] if utf8 else [RECORD_VERSION]
+    for dataset, value in data.items():
+        out.append(packed[dataset] if dataset in packed else pack_value(dataset, value))
+    return b"".join(out)
+
+
+def pack_datasets(data: dict, utf8: bool = False) -> bytes:
+    """Susun dict {dataset: bytes | [bytes]} menjadi stream IIM record 2.
+
+    utf8=True mendahului record 2 dengan 1:90 CodedCharacterSet = UTF-8
+    (iptcinfo3 tidak menulisnya, jadi default-nya mati).
+    """
+    out = [CHARSET_UTF8, RECORD_VERSION] if utf8 else [RECORD_VERSION]
+    out.extend(pack_value(dataset, value) for dataset, value in data.items())
+    return b"".join(out)
@@ -0,0 +1,107 @@
+"""API asyncio untuk menulis metadata tanpa GUI.
+
+Contoh (mis. di handler upload aiohttp):
+
+    async for result in iptc_async.write_files(jobs, concurrency=4):
+        log.info(result.message)
+
+jobs berisi (path, fields) dengan fields dict "title", "description" dan
+"keywords" (yang tidak ada dianggap kosong), boleh iterable biasa atau
+async iterable. Tulis file (blocking) dijalankan di executor; job baru
+baru diambil dari jobs selama jumlah yang sedang dikerjakan di bawah
+concurrency, dan hasil yang belum diambil pemanggil ikut menahan job
+berikutnya (backpressure).
+"""
+import asyncio
+from typing import AsyncIterator
+
+import metrics
+from iptc_core import ERROR, Job, RowResult, run_job, write_iptc_data
+
+
+async def _aiter(jobs):
+    if hasattr(jobs, "__aiter__"):
+        async for item in jobs:
+            yield item
+    else:
+        for item in jobs:
+            yield item
+
+
+def make_job(number: int, path: str, fields: dict) -> Job:
+    """Job untuk run_job; number dipakai sebagai nomor baris hasil."""
+    return Job(number, path, path, fields.get("title") or "",
+               fields.get("description") or "", fields.get("keywords") or "")
+
+
+async def write_file(path: str, fields: dict, writer=write_iptc_data, executor=None) -> RowResult:
+    """Tulis satu file di executor; error dilaporkan di RowResult, bukan exception."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, run_job, make_job(1, path, fields), writer)
+
+
+async def write_files(jobs, writer=write_iptc_data, concurrency: int = 4,
+                      executor=None, recorder=None) -> AsyncIterator[RowResult]:
+    """Tulis setiap (path, fields) dari jobs, yield RowResult sesuai urutan selesai.
+
+    RowResult.row adalah nomor urut job (mulai 1) dan filename adalah path.
+    executor None memakai thread pool default event loop; untuk
+    ProcessPoolExecutor writer harus bisa di-pickle (fungsi level modul atau
+    functools.partial-nya). recorder (metrics.Recorder) mengumpulkan
+    counter dan durasi per tahap seperti process_rows. Kalau generator
+    ditutup lebih awal, job yang belum mulai dibatalkan; tulis yang sedang
+    berjalan tetap selesai (atomic, lihat iptc_core.atomic_rewrite).
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    loop = asyncio.get_running_loop()
+    timed = recorder is not None
+    recorder = recorder or metrics.NULL
+    source = _aiter(jobs)
+    pending = {}
+    next_item = None
+    exhausted = False
+    number = 0
+    try:
+        while True:
+            # Ambil job berikutnya sambil menunggu tulis yang sedang jalan,
+            # jadi hasil tidak tertahan oleh sumber yang lambat
+            if next_item is None and not exhausted and len(pending) < concurrency:
+                next_item = asyncio.ensure_future(source.__anext__())
+            waiting = set(pending)
+            if next_item is not None:
+                waiting.add(next_item)
+            if not waiting:
+                return
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            if next_item in done:
+                try:
+                    path, fields = next_item.result()
+                except StopAsyncIteration:
+                    exhausted = True
+                else:
+                    number += 1
+                    job = make_job(number, path, fields)
+                    pending[loop.run_in_executor(executor, run_job, job, writer, timed)] = job
+                next_item = None
+
+            for future in done:
+                job = pending.pop(future, None)
+                if job is None:
+                    continue
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Mis. BrokenProcessPool: exception dari writer sudah ditangkap run_job
+                    result = RowResult(job.row, job.filename, ERROR, f"Error processing {job.filename}: {str(e)}")
+                recorder.add_result(result)
+                yield result
+    finally:
+        if next_item is not None:
+            next_item.cancel()
+            # Tunggu sampai benar-benar berhenti sebelum aclose() sumbernya
+            await asyncio.gather(next_item, return_exceptions=True)
+        for future in pending:
+            future.cancel()
+        await source.aclose()
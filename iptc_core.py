@@ -0,0 +1,635 @@
+"""Inti pemrosesan batch IPTC (dan EXIF) tanpa ketergantungan ke Qt.
+
+Dipakai oleh GUI (lewat BatchWorker di thread terpisah) dan bisa dipanggil
+langsung dari script lain.
+"""
+import functools
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Iterable, Iterator, NamedTuple, Optional, Union
+
+import iim
+import jpeg_segments
+import metrics
+from metrics import stage
+from file_index import JPEG_EXTS, TEMP_PREFIX, FileIndex
+
+# Folder state lokal (log, journal)
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".iptc_writer")
+
+# Status hasil per baris
+OK = "ok"
+ERROR = "error"
+SKIPPED = "skipped"
+
+# Padding cadangan (byte) per segmen untuk opsi tulis di tempat
+DEFAULT_PADDING = 4096
+
+# Tag EXIF yang dipakai exif_data.py
+EXIF_IMAGE_DESCRIPTION = 0x010e
+EXIF_USER_COMMENT = 0x9286
+EXIF_XP_KEYWORDS = 0x9c9e
+# Tag XP* Windows disimpan sebagai UTF-16LE
+EXIF_XP_TAGS = frozenset(range(0x9c9b, 0x9ca0))
+
+# Field CSV -> target: ("iptc", dataset) atau ("exif", ifd, tag)
+FIELD_MAP = {
+    "title": (("iptc", iim.OBJECT_NAME), ("exif", "0th", EXIF_IMAGE_DESCRIPTION)),
+    "description": (("iptc", iim.CAPTION), ("exif", "Exif", EXIF_USER_COMMENT)),
+    "keywords": (("iptc", iim.KEYWORDS), ("exif", "0th", EXIF_XP_KEYWORDS)),
+}
+
+# Hanya target IPTC dari FIELD_MAP (write_iptc_data)
+IPTC_FIELD_MAP = {field: tuple(t for t in targets if t[0] == "iptc") for field, targets in FIELD_MAP.items()}
+
+# Jumlah kombinasi field unik yang hasil encode-nya disimpan (LRU)
+ENCODE_CACHE_SIZE = 1024
+
+
+class WriteOptions(NamedTuple):
+    """Opsi tulis dalam satu objek (argumen write_metadata), mis. untuk pipeline."""
+    fields: dict = IPTC_FIELD_MAP
+    fsync: bool = False
+    backup: bool = False
+    padding: int = 0
+    strict: bool = False
+    utf8: bool = False
+
+
+class ColumnMap(NamedTuple):
+    """Indeks kolom CSV untuk tiap field."""
+    filename: int
+    title: int
+    description: int
+    keywords: int
+
+
+class Job(NamedTuple):
+    """Satu baris CSV yang siap ditulis ke file."""
+    row: int
+    filename: str
+    path: str
+    title: str
+    description: str
+    keywords: str
+
+
+class RowResult(NamedTuple):
+    """Hasil pemrosesan satu baris CSV."""
+    row: int
+    filename: str
+    status: str
+    message: str
+    stats: Optional[dict] = None  # durasi per tahap (detik) bila diinstrumentasi
+
+    @property
+    def ok(self) -> bool:
+        return self.status == OK
+
+
+def split_keywords(keywords: str) -> list:
+    """Pecah keywords dengan pemisah koma/semicolon, buang yang kosong."""
+    cleaned = keywords.replace(";", ",")
+    return [kw.strip() for kw in cleaned.split(",") if kw.strip()]
+
+
+@functools.lru_cache(maxsize=ENCODE_CACHE_SIZE)
+def keyword_list(keywords: str) -> tuple:
+    """split_keywords yang di-memoize; tuple supaya aman dipakai bersama."""
+    return tuple(split_keywords(keywords))
+
+
+def metadata_updates(title, description, keywords, fields=FIELD_MAP) -> tuple:
+    """Pecah nilai field menjadi (update IIM, update EXIF) sesuai fields.
+
+    Update IIM berbentuk {dataset: bytes atau list bytes}, update EXIF
+    {(ifd, tag): bytes}. Field kosong tidak ditulis.
+    """
+    iptc, exif = {}, {}
+    values = {"title": title, "description": description, "keywords": keywords}
+    for field, targets in fields.items():
+        value = values.get(field)
+        if not value:
+            continue
+        for target in targets:
+            if target[0] == "iptc":
+                dataset = target[1]
+                if dataset in iim.DATASETS and iim.DATASETS[dataset].repeatable:
+                    iptc[dataset] = [kw.encode('utf-8') for kw in keyword_list(value)]
+                else:
+                    iptc[dataset] = value.encode('utf-8')
+            elif target[0] == "exif":
+                ifd, tag = target[1], target[2]
+                exif[(ifd, tag)] = value.encode('utf-16le' if tag in EXIF_XP_TAGS else 'utf-8')
+            else:
+                raise ValueError(f"Unknown metadata target: {target!r}")
+    return iptc, exif
+
+
+def exif_builder(updates):
+    """build_exif untuk jpeg_segments.plan_edits/encode_edits: load, ubah tag, dump."""
+    # Import di sini: piexif hanya dibutuhkan kalau EXIF ikut ditulis
+    import piexif
+
+    def build(old):
+        if old:
+            exif_dict = piexif.load(old)
+        else:
+            exif_dict = {"0th": {}, "Exif": {}, "GPS": {}, "Interop": {}, "1st": {}, "thumbnail": None}
+        for (ifd, tag), value in updates.items():
+            exif_dict[ifd][tag] = value
+        return piexif.dump(exif_dict)
+    return build
+
+
+def fields_key(fields) -> tuple:
+    """Bentuk hashable dari fields untuk key cache encode."""
+    return tuple((field, tuple(tuple(t) for t in targets)) for field, targets in fields.items())
+
+
+@functools.lru_cache(maxsize=ENCODE_CACHE_SIZE)
+def encode_fields(title, description, keywords, key, strict=False) -> tuple:
+    """(dataset IIM yang sudah di-pack, update EXIF) per kombinasi field.
+
+    Tidak bergantung pada metadata lama di file, jadi 2.000 frame dengan
+    caption yang sama cukup di-encode sekali; penggabungan dengan IIM/EXIF
+    lama tiap file dilakukan di luar cache (iim.merge_packed, exif_builder).
+    Hasilnya dipakai bersama: jangan diubah.
+    """
+    cache_miss()
+    iptc, exif = metadata_updates(title, description, keywords, dict(key))
+    return iim.pack_updates(iptc, strict=strict), exif
+
+
+# Nama cache -> fungsi yang di-memoize dan dihitung lewat cached_encode (lihat
+# cache_stats). keyword_list tidak termasuk: hanya dipanggil dari dalam cache lain.
+ENCODE_CACHES = {"fields": encode_fields}
+
+
+_lookup = threading.local()
+
+
+def cache_miss():
+    """Dipanggil di dalam fungsi yang di-memoize, jadi hanya jalan saat miss."""
+    _lookup.missed = True
+
+
+def cached_encode(name, *args):
+    """Panggil ENCODE_CACHES[name] dan catat hit/miss ke job metrics aktif.
+
+    Miss ditandai per thread oleh cache_miss() di dalam fungsi yang
+    di-memoize (cache_info() dipakai bersama oleh semua thread).
+    """
+    _lookup.missed = False
+    out = ENCODE_CACHES[name](*args)
+    metrics.count(f"{name}_cache_misses" if _lookup.missed else f"{name}_cache_hits")
+    return out
+
+
+def cache_stats() -> dict:
+    """{nama cache: hits, misses, size, max_size, hit_rate} di proses ini."""
+    out = {}
+    for name, fn in ENCODE_CACHES.items():
+        info = fn.cache_info()
+        lookups = info.hits + info.misses
+        out[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize,
+            "hit_rate": info.hits / lookups if lookups else 0.0,
+        }
+    return out
+
+
+def clear_caches():
+    keyword_list.cache_clear()
+    for fn in ENCODE_CACHES.values():
+        fn.cache_clear()
+
+
+def segment_builders(title, description, keywords, fields=FIELD_MAP, strict=False, utf8=False) -> tuple:
+    """(build_iim, build_exif) untuk jpeg_segments.plan_edits, lewat cache encode.
+
+    Builder bernilai None bila fields tidak punya target jenis itu.
+    """
+    key = fields_key(fields)
+    kinds = {target[0] for targets in fields.values() for target in targets}
+    encoded = []
+
+    def fields_encoded():
+        # Satu lookup cache per file, meski IIM dan EXIF sama-sama ditulis
+        if not encoded:
+            encoded.append(cached_encode("fields", title, description, keywords, key, strict))
+        return encoded[0]
+
+    build_iim = build_exif = None
+    if "iptc" in kinds:
+        def build_iim(old):
+            return iim.merge_packed(old, fields_encoded()[0], utf8=utf8)
+    if "exif" in kinds:
+        def build_exif(old):
+            return exif_builder(fields_encoded()[1])(old)
+    return build_iim, build_exif
+
+
+def atomic_rewrite(path, write, fsync=False, backup=False):
+    """Tulis ulang file lewat temp file di folder yang sama lalu os.replace.
+
+    write(src, dst) menerima file object sumber dan tujuan. File asli tidak
+    pernah setengah tertulis: kalau gagal, hanya temp file yang dibuang.
+    backup=True menyimpan versi lama sebagai path + "~" (hard link bila
+    bisa, jadi tanpa salinan penuh).
+    """
+    folder = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(prefix=TEMP_PREFIX, suffix=".tmp", dir=folder)
+    try:
+        with open(path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            write(src, dst)
+            if fsync:
+                with stage("fsync"):
+                    dst.flush()
+                    os.fsync(dst.fileno())
+        # Hanya permission: mtime baru menandai file berubah (rsync, journal incremental)
+        shutil.copymode(path, tmp)
+
+        if backup:
+            with stage("backup"):
+                backup_path = path + '~'
+                if os.path.exists(backup_path):
+                    os.remove(backup_path)
+                try:
+                    os.link(path, backup_path)
+                except OSError:
+                    shutil.copy2(path, backup_path)
+
+        with stage("replace"):
+            os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    if fsync and hasattr(os, "O_DIRECTORY"):
+        # Pastikan rename juga tercatat di disk
+        with stage("fsync"):
+            dir_fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+
+def update_segments(path, build_iim=None, build_exif=None, padding=0, fsync=False, backup=False,
+                    build_xmp=None):
+    """Ganti APP13 / APP1 Exif / APP1 XMP di file JPEG (lihat jpeg_segments.plan_edits).
+
+    Dengan padding > 0 segmen baru ditulis di tempat (pwrite, tanpa
+    menyalin data gambar) selama muat di segmen lama; kalau tidak, file
+    ditulis ulang lewat atomic_rewrite dengan padding byte cadangan.
+    Tulis di tempat tidak atomic dan ikut mengubah semua hard link ke
+    file itu, jadi backup=True selalu memakai atomic_rewrite.
+    """
+    edits = None
+    if padding and not backup:
+        with open(path, 'r+b') as fh:
+            edits = jpeg_segments.plan_edits(fh, build_iim, build_exif, padding, build_xmp)
+            if jpeg_segments.fits_in_place(edits):
+                _write_in_place(fh, edits, fsync)
+                return
+
+    def write(src, dst):
+        # Edit yang sudah dihitung dari file yang sama dipakai ulang
+        plan = edits
+        if plan is None:
+            plan = jpeg_segments.plan_edits(src, build_iim, build_exif, padding, build_xmp)
+        jpeg_segments.apply_edits(src, dst, plan)
+
+    atomic_rewrite(path, write, fsync=fsync, backup=backup)
+
+
+def _write_in_place(fh, edits, fsync):
+    with stage("inplace"):
+        jpeg_segments.write_in_place(fh, edits)
+        if fsync:
+            os.fsync(fh.fileno())
+
+
+def stat_key(st) -> tuple:
+    """(size, mtime_ns, inode, ctime_ns): berubah juga bila file diganti dengan ukuran dan mtime sama."""
+    return st.st_size, st.st_mtime_ns, st.st_ino, st.st_ctime_ns
+
+
+def commit_edits(path, edits, in_place=False, fsync=False, backup=False):
+    """Terapkan edits yang sudah dihitung (jpeg_segments.encode_edits) ke path.
+
+    in_place=True menulis di tempat bila semua edit muat (lihat
+    update_segments); selain itu lewat atomic_rewrite. edits harus dihitung
+    dari isi path yang sekarang.
+    """
+    if in_place and not backup and jpeg_segments.fits_in_place(edits):
+        with open(path, 'r+b') as fh:
+            _write_in_place(fh, edits, fsync)
+        return
+    atomic_rewrite(path, lambda src, dst: jpeg_segments.apply_edits(src, dst, edits),
+                   fsync=fsync, backup=backup)
+
+
+def write_iptc_data(image_path, title, description, keywords, fsync=False, backup=False, padding=0,
+                    strict=False, utf8=False):
+    """Tulis IPTC dengan mengganti segmen APP13 saja (tanpa parse IPTCInfo).
+
+    Hasilnya byte-identik dengan write_iptc_data_iptcinfo3 untuk field
+    yang kita tulis bila padding=0 dan utf8=False. strict=True menolak
+    nilai yang melebihi panjang maksimum IIM; utf8=True menulis 1:90
+    (lihat iim.merge). Lihat update_segments untuk padding dan
+    atomic_rewrite untuk fsync dan backup. Dataset IIM di-memoize per
+    kombinasi field (encode_fields).
+    """
+    try:
+        build_iim, _ = segment_builders(title, description, keywords, IPTC_FIELD_MAP, strict, utf8)
+        update_segments(image_path, build_iim, padding=padding, fsync=fsync, backup=backup)
+    except Exception as e:
+        raise Exception(f"Failed to write IPTC data: {str(e)}")
+
+
+def write_metadata(image_path, title, description, keywords, fields=FIELD_MAP,
+                   fsync=False, backup=False, padding=0, strict=False, utf8=False):
+    """Tulis IPTC dan EXIF sekaligus: header dibaca sekali, APP1 dan APP13
+    disusun ulang bersama, dan file ditulis satu kali.
+
+    fields memetakan field CSV ke dataset IPTC / tag EXIF (lihat FIELD_MAP).
+    Segmen hanya disentuh bila fields punya target untuknya. Beda dengan
+    piexif.insert, segmen APP0 (JFIF) tetap dipertahankan. Opsi lain sama
+    dengan write_iptc_data; nilai IIM dan EXIF di-memoize (encode_fields).
+    """
+    try:
+        build_iim, build_exif = segment_builders(title, description, keywords, fields, strict, utf8)
+        update_segments(image_path, build_iim, build_exif, padding=padding, fsync=fsync, backup=backup)
+    except Exception as e:
+        raise Exception(f"Failed to write metadata: {str(e)}")
+
+
+def write_iptc_data_iptcinfo3(image_path, title, description, keywords):
+    """Jalur lama lewat IPTCInfo load/save_as; dipakai sebagai pembanding."""
+    # Import di sini supaya iptc_core tetap ringan untuk CLI
+    from iptcinfo3 import IPTCInfo
+
+    try:
+        with stage("iptcinfo_parse"):
+            info = IPTCInfo(image_path, force=True, inp_charset='utf-8', out_charset='utf-8')
+
+        if title:
+            info['object name'] = title
+
+        if description:
+            info['caption/abstract'] = description
+
+        if keywords:
+            info['keywords'] = split_keywords(keywords)
+
+        # Simpan perubahan
+        with stage("iptcinfo_save"):
+            info.save_as(image_path)
+
+        # Hapus backup "~" setelah berhasil simpan
+        with stage("cleanup"):
+            backup = image_path + '~'
+            if os.path.exists(backup):
+                os.remove(backup)
+
+    except Exception as e:
+        raise Exception(f"Failed to write IPTC data: {str(e)}")
+
+
+def plan_jobs(rows: Iterable[list], columns: ColumnMap, folder: str,
+              start: int = 2, index: Optional[FileIndex] = None,
+              skip_rows=(), recorder=metrics.NULL) -> Iterator[Union[Job, RowResult]]:
+    """Ubah baris CSV menjadi Job, atau RowResult error bila baris tidak valid.
+
+    start=2 untuk nomor baris real di CSV (termasuk header). Nama file
+    dicocokkan lewat FileIndex (folder di-scan sekali bila index tidak
+    diberikan). Nomor baris di skip_rows (set) dilewati tanpa hasil.
+    recorder (metrics.Recorder) mencatat tahap "csv" dan "lookup".
+    """
+    if index is None:
+        with recorder.time("index"):
+            index = FileIndex(folder)
+    max_need = max(columns)
+    for i, row in enumerate(recorder.timed_iter(rows, "csv"), start=start):
+        if i in skip_rows:
+            continue
+        # Safety untuk row pendek
+        if len(row) <= max_need:
+            yield RowResult(i, "", ERROR, f"Warning: Row {i} doesn't have enough columns, skipping")
+            continue
+
+        filename = (row[columns.filename] or "").strip()
+        if not filename:
+            yield RowResult(i, "", ERROR, f"Warning: Row {i} has empty filename, skipping")
+            continue
+
+        # Normalize filename (trim spasi & kutip)
+        filename = filename.strip().strip('"\'')
+
+        title = row[columns.title].strip()
+        description = row[columns.description].strip()
+        keywords = row[columns.keywords].strip()
+
+        # Byte yang tidak valid di encoding manifest dibaca sebagai surrogate (surrogateescape)
+        try:
+            (filename + title + description + keywords).encode("utf-8")
+        except UnicodeEncodeError:
+            shown = filename.encode("utf-8", "surrogateescape").decode("utf-8", "replace")
+            yield RowResult(i, shown, ERROR,
+                            f"Warning: Row {i} is not valid text in the CSV encoding, skipping")
+            continue
+
+        with recorder.time("lookup"):
+            candidates = index.lookup(filename)
+        if not candidates:
+            yield RowResult(i, filename, ERROR, f"Warning: File not found: {filename} (row {i}), skipping")
+            continue
+        if len(candidates) > 1:
+            names = ", ".join(os.path.relpath(p, folder) for p in candidates)
+            yield RowResult(i, filename, ERROR,
+                            f"Warning: Ambiguous filename: {filename} matches {names} (row {i}), skipping")
+            continue
+        file_path = candidates[0]
+
+        if not file_path.lower().endswith(JPEG_EXTS):
+            yield RowResult(i, filename, ERROR, f"Warning: Not a JPG: {filename} (row {i}), skipping")
+            continue
+
+        yield Job(i, filename, file_path, title, description, keywords)
+
+
+def check_jpeg(image_path, title, description, keywords):
+    """Writer untuk dry run: hanya cek header JPEG, tidak menulis apa-apa."""
+    with open(image_path, 'rb') as fh:
+        jpeg_segments.read_header(fh)
+
+
+def run_job(job: Job, writer=write_iptc_data, timed: bool = False) -> RowResult:
+    """Tulis satu Job; exception diubah menjadi RowResult error.
+
+    timed=True mengisi RowResult.stats dengan durasi per tahap (lihat
+    metrics.stage) ditambah total "job".
+    """
+    if timed:
+        metrics.begin_job()
+        start = time.perf_counter()
+    try:
+        writer(job.path, job.title, job.description, job.keywords)
+    except Exception as e:
+        status, message = ERROR, f"Error processing {job.filename}: {str(e)}"
+    else:
+        status, message = OK, f"OK: {job.filename}"
+    stats = None
+    if timed:
+        stats = metrics.end_job()
+        stats["job"] = time.perf_counter() - start
+    return RowResult(job.row, job.filename, status, message, stats)
+
+
+def process_rows(rows: Iterable[list], columns: ColumnMap, folder: str,
+                 writer=write_iptc_data, workers: int = 1,
+                 max_in_flight: Optional[int] = None,
+                 index: Optional[FileIndex] = None,
+                 journal=None, checkpoint=None, recorder=None, pipeline=None,
+                 undo=None) -> Iterator[RowResult]:
+    """Proses baris CSV dan yield hasilnya.
+
+    workers=1: berurutan dan lazy, file berikutnya baru ditulis ketika hasil
+    sebelumnya sudah diambil, sehingga pemanggil bisa pause/cancel di antara
+    file. workers>1: lihat process_jobs_parallel. journal (mis.
+    journal.FingerprintJournal) dipakai untuk melewati file yang tidak berubah;
+    checkpoint (journal.CheckpointJournal) melewati baris yang sudah selesai
+    dan mencatat baris yang baru selesai. undo (journal.UndoJournal)
+    menyimpan segmen metadata asli sebelum file ditulis. recorder (metrics.Recorder)
+    mengumpulkan counter dan durasi per tahap. pipeline
+    (pipeline.PipelineConfig) menulis lewat pipeline baca -> encode -> tulis
+    dengan opsi tulisnya sendiri; writer dan workers tidak dipakai.
+    """
+    timed = recorder is not None
+    recorder = recorder or metrics.NULL
+    skip_rows = checkpoint.completed if checkpoint is not None else ()
+    items = plan_jobs(rows, columns, folder, index=index, skip_rows=skip_rows, recorder=recorder)
+    if journal is not None:
+        items = journal.skip_unchanged(items)
+    if undo is not None:
+        items = undo.capture_jobs(items)
+
+    if pipeline is not None:
+        # Import di sini: pipeline mengimport iptc_core
+        from pipeline import process_jobs_pipelined
+        results = process_jobs_pipelined(items, pipeline, timed=timed)
+    elif workers > 1:
+        results = process_jobs_parallel(items, writer, workers, max_in_flight, timed=timed)
+    else:
+        results = (item if isinstance(item, RowResult) else run_job(item, writer, timed) for item in items)
+
+    if journal is not None:
+        results = journal.record_results(results)
+    if checkpoint is not None:
+        results = checkpoint.record_results(results)
+    try:
+        for result in results:
+            recorder.add_result(result)
+            yield result
+    finally:
+        results.close()
+
+
+def pool_context():
+    """Start method untuk process pool: forkserver (atau spawn), bukan fork.
+
+    Pool dibuat dari thread worker di proses Qt yang multi-thread; fork
+    menyalin proses itu beserta lock yang mungkin sedang dipegang thread lain.
+    """
+    # Import di sini: multiprocessing cukup mahal untuk startup CLI
+    import multiprocessing
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def process_jobs_parallel(items: Iterable[Union[Job, RowResult]], writer=write_iptc_data,
+                          workers: int = 2, max_in_flight: Optional[int] = None,
+                          timed: bool = False) -> Iterator[RowResult]:
+    """Tulis Job di process pool, yield hasil sesuai urutan selesai.
+
+    Jumlah Job yang sedang dikerjakan dibatasi max_in_flight (default
+    4 x workers), jadi manifest besar tidak di-submit sekaligus. writer
+    harus fungsi level modul supaya bisa di-pickle. Error per file sudah
+    ditangkap run_job. Kalau proses worker mati, pool dibuat ulang dan Job
+    yang sedang berjalan diulang satu per satu; hanya Job yang membuat pool
+    mati lagi yang dilaporkan error.
+    """
+    # Import di sini: multiprocessing cukup mahal untuk startup CLI
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    from concurrent.futures.process import BrokenProcessPool
+
+    max_in_flight = max_in_flight or workers * 4
+    context = pool_context()
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    pending = {}
+    suspects = []  # Job yang sedang berjalan saat pool mati
+
+    def collect(done):
+        for future in done:
+            job = pending.pop(future)
+            try:
+                yield future.result()
+            except BrokenProcessPool:
+                suspects.append(job)
+            except Exception as e:
+                yield RowResult(job.row, job.filename, ERROR, f"Error processing {job.filename}: {str(e)}")
+
+    def new_pool():
+        nonlocal pool
+        pool.shutdown(wait=False, cancel_futures=True)
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+    def isolate():
+        # Future lain di pool yang mati juga langsung selesai (hasil atau BrokenProcessPool)
+        yield from collect(wait(pending).done)
+        new_pool()
+        while suspects:
+            job = suspects.pop(0)
+            try:
+                yield pool.submit(run_job, job, writer, timed).result()
+            except BrokenProcessPool:
+                yield RowResult(job.row, job.filename, ERROR,
+                                f"Error processing {job.filename}: the worker process crashed")
+                new_pool()
+
+    try:
+        for item in items:
+            if isinstance(item, RowResult):
+                yield item
+                continue
+
+            try:
+                pending[pool.submit(run_job, item, writer, timed)] = item
+            except BrokenProcessPool:
+                suspects.append(item)
+                yield from isolate()
+                continue
+
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+                if suspects:
+                    yield from isolate()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from collect(done)
+            if suspects:
+                yield from isolate()
+    finally:
+        # Generator ditutup lebih awal (cancel) -> buang Job yang belum jalan
+        pool.shutdown(wait=True, cancel_futures=True)
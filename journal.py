@@ -0,0 +1,451 @@
+"""Journal lokal untuk mode incremental dan untuk melanjutkan batch (resume).
+
+FingerprintJournal (SQLite): per path dicatat size, mtime_ns, inode,
+ctime_ns dan hash metadata yang terakhir berhasil ditulis; cek cukup satu
+os.stat, file JPEG tidak dibuka.
+
+CheckpointJournal (append-only): nomor baris yang sudah selesai untuk satu
+kombinasi manifest + mapping kolom + folder.
+
+UndoJournal (SQLite): segmen APP1/APP13 asli (byte + offset) dan checksum
+data gambar per file per batch, supaya batch bisa di-rollback tanpa backup
+file penuh.
+"""
+import hashlib
+import os
+import sqlite3
+import time
+from collections import deque
+from struct import pack, unpack_from
+from typing import Iterable, Iterator, NamedTuple
+
+import iptc_core
+import jpeg_segments
+
+DEFAULT_FINGERPRINT_PATH = os.path.join(iptc_core.STATE_DIR, "fingerprints.sqlite")
+DEFAULT_CHECKPOINT_DIR = os.path.join(iptc_core.STATE_DIR, "checkpoints")
+DEFAULT_UNDO_PATH = os.path.join(iptc_core.STATE_DIR, "undo.sqlite")
+
+# Segmen yang bisa diubah writer (IPTC, EXIF, XMP) dan disimpan untuk undo
+UNDO_MARKERS = (jpeg_segments.APP1, jpeg_segments.APP13)
+# Byte data gambar (awal dan akhir) yang ikut di-hash untuk checksum
+CHECKSUM_SAMPLE = 4096
+
+# Commit ke SQLite setiap sekian record
+COMMIT_EVERY = 500
+
+# Checkpoint run yang berakhir dengan error disimpan untuk resume, tapi
+# yang lebih lama dari sekian hari atau di luar sekian terbaru dihapus
+CHECKPOINT_MAX_AGE = 30 * 24 * 3600
+CHECKPOINT_KEEP = 50
+
+
+def writer_mode(kind: str, **options) -> str:
+    """mode untuk metadata_hash: jenis writer + opsi yang mengubah hasil tulis.
+
+    Mis. writer_mode("iptc", utf8=True, padding=4096): mengganti opsi
+    membuat semua file ditulis ulang, bukan dilewati.
+    """
+    return ";".join([kind] + [f"{name}={options[name]!r}" for name in sorted(options)])
+
+
+def metadata_hash(title: str, description: str, keywords: str, mode: str = "iptc") -> str:
+    """Hash dari metadata yang akan ditulis (keywords sudah dinormalisasi)."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in (mode, title, description, "\x1f".join(iptc_core.keyword_list(keywords))):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class FingerprintJournal:
+    """Catatan (path, iptc_core.stat_key, hash metadata) dari tulis yang berhasil.
+
+    mode: lihat writer_mode. target(image_path) memberi file yang benar-benar
+    ditulis writer (mis. sidecar XMP); default gambarnya sendiri.
+    """
+
+    COLUMNS = ["path", "size", "mtime_ns", "ino", "ctime_ns", "meta_hash"]
+
+    def __init__(self, path: str = DEFAULT_FINGERPRINT_PATH, mode: str = "iptc", target=None):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self.mode = mode
+        self.target = target
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = [r[1] for r in self._conn.execute("PRAGMA table_info(fingerprints)")]
+        if columns and columns != self.COLUMNS:
+            # Journal format lama: dibuang, file ditulis ulang sekali
+            self._conn.execute("DROP TABLE fingerprints")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, ino INTEGER, ctime_ns INTEGER,"
+            " meta_hash TEXT) WITHOUT ROWID"
+        )
+        self._uncommitted = 0
+        self._pending = {}  # row -> (path, hash) untuk Job yang sedang ditulis
+
+    def is_unchanged(self, path: str, meta_hash: str) -> bool:
+        """path: file yang ditulis (lihat target), bukan selalu gambarnya."""
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, ino, ctime_ns, meta_hash FROM fingerprints WHERE path = ?",
+            (os.path.abspath(path),),
+        ).fetchone()
+        if row is None or row[4] != meta_hash:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return row[:4] == iptc_core.stat_key(st)
+
+    def record(self, path: str, meta_hash: str):
+        st = os.stat(path)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(path), *iptc_core.stat_key(st), meta_hash),
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self._conn.close()
+
+    def skip_unchanged(self, items: Iterable) -> Iterator:
+        """Filter untuk plan_jobs: Job yang tidak berubah jadi RowResult skipped."""
+        for item in items:
+            if not isinstance(item, iptc_core.Job):
+                yield item
+                continue
+            meta_hash = metadata_hash(item.title, item.description, item.keywords, self.mode)
+            try:
+                path = self.target(item.path) if self.target is not None else item.path
+            except OSError:
+                path = item.path
+            if self.is_unchanged(path, meta_hash):
+                yield iptc_core.RowResult(item.row, item.filename, iptc_core.SKIPPED,
+                                          f"Unchanged: {item.filename}")
+                continue
+            self._pending[item.row] = (path, meta_hash)
+            yield item
+
+    def record_results(self, results: Iterable) -> Iterator:
+        """Catat fingerprint untuk setiap hasil OK, lalu teruskan hasilnya."""
+        for result in results:
+            pending = self._pending.pop(result.row, None)
+            if pending is not None and result.ok:
+                self.record(*pending)
+            yield result
+
+
+def prune_checkpoints(folder: str, keep: int = CHECKPOINT_KEEP, max_age: float = CHECKPOINT_MAX_AGE,
+                      now=None) -> int:
+    """Hapus checkpoint lama di folder (lebih tua dari max_age detik atau di luar keep terbaru).
+
+    Dipanggil saat CheckpointJournal dibuka; kembalikan jumlah file yang dihapus.
+    """
+    now = time.time() if now is None else now
+    try:
+        with os.scandir(folder) as it:
+            entries = [(e.stat().st_mtime, e.path) for e in it if e.name.endswith(".log") and e.is_file()]
+    except FileNotFoundError:
+        return 0
+    entries.sort(reverse=True)
+    removed = 0
+    for i, (mtime, path) in enumerate(entries):
+        if i >= keep or now - mtime > max_age:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def checkpoint_key(manifest_path: str, columns, folder: str) -> str:
+    """Hash path + size + mtime manifest, mapping kolom dan folder, untuk nama file checkpoint.
+
+    Cukup satu stat: manifest yang diedit mendapat checkpoint baru tanpa
+    membaca ulang seluruh isinya.
+    """
+    st = os.stat(manifest_path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{os.path.abspath(manifest_path)}\0{st.st_size}\0{st.st_mtime_ns}".encode("utf-8"))
+    h.update(repr(tuple(columns)).encode("utf-8"))
+    h.update(os.path.abspath(folder).encode("utf-8"))
+    return h.hexdigest()
+
+
+class CheckpointJournal:
+    """Daftar nomor baris CSV yang sudah selesai (OK atau unchanged), append-only.
+
+    Satu baris teks per nomor baris; baris terakhir yang terpotong karena
+    crash diabaikan saat dibaca. resume=False memulai checkpoint baru.
+    Checkpoint lain yang sudah lama dihapus (prune_checkpoints).
+    """
+
+    FLUSH_EVERY = 100
+
+    def __init__(self, key: str, folder: str = DEFAULT_CHECKPOINT_DIR, resume: bool = True):
+        os.makedirs(folder, exist_ok=True)
+        self.path = os.path.join(folder, key + ".log")
+        if os.path.exists(self.path):
+            # Dibuka lagi: perbarui mtime supaya tidak ikut dihapus di bawah
+            os.utime(self.path)
+        prune_checkpoints(folder)
+        self.completed = set()
+        partial = False
+        if resume and os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line in f:
+                    partial = not line.endswith(b"\n")
+                    if not partial and line[:-1].isdigit():
+                        self.completed.add(int(line))
+        self._file = open(self.path, "a" if resume else "w", encoding="ascii")
+        if partial:
+            # Tandai baris yang terpotong sebagai rusak (bukan angka) lalu tutup,
+            # supaya tidak terbaca sebagai nomor baris lain
+            self._file.write("-\n")
+        self._unflushed = 0
+
+    def record(self, row: int):
+        self._file.write(f"{row}\n")
+        self._unflushed += 1
+        if self._unflushed >= self.FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        self._unflushed = 0
+
+    def close(self):
+        self._file.close()
+
+    def discard(self):
+        """Tutup dan hapus checkpoint (run selesai tanpa error, tidak ada yang perlu di-resume)."""
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def record_results(self, results: Iterable) -> Iterator:
+        """Catat baris yang selesai, lalu teruskan hasilnya."""
+        for result in results:
+            if result.status in (iptc_core.OK, iptc_core.SKIPPED):
+                self.record(result.row)
+            yield result
+
+
+class UndoEntry(NamedTuple):
+    path: str
+    segments: list   # [(offset, bytes segmen lengkap)] dari file asli
+    image_size: int  # byte dari SOS sampai EOF
+    image_sum: bytes
+
+
+def image_checksum(fh, offset: int) -> tuple:
+    """(ukuran, hash) data gambar dari offset sampai EOF.
+
+    Hanya CHECKSUM_SAMPLE byte awal dan akhir yang di-hash (plus ukurannya),
+    jadi murah untuk file besar tapi tetap menangkap gambar yang diganti
+    atau di-encode ulang.
+    """
+    size = os.fstat(fh.fileno()).st_size - offset
+    h = hashlib.blake2b(size.to_bytes(8, "big"), digest_size=16)
+    fh.seek(offset)
+    h.update(fh.read(CHECKSUM_SAMPLE))
+    if size > CHECKSUM_SAMPLE:
+        fh.seek(max(offset + CHECKSUM_SAMPLE, offset + size - CHECKSUM_SAMPLE))
+        h.update(fh.read(CHECKSUM_SAMPLE))
+    return size, h.digest()
+
+
+def pack_segments(segments) -> bytes:
+    """[(offset, data)] -> blob: per segmen offset dan panjang (u32) lalu datanya."""
+    return b"".join(pack("!LL", offset, len(data)) + data for offset, data in segments)
+
+
+def unpack_segments(blob: bytes) -> list:
+    out = []
+    pos = 0
+    while pos < len(blob):
+        offset, length = unpack_from("!LL", blob, pos)
+        out.append((offset, blob[pos + 8:pos + 8 + length]))
+        pos += 8 + length
+    return out
+
+
+def capture(path: str) -> UndoEntry:
+    """Simpan segmen APP1/APP13 asli path beserta checksum data gambarnya."""
+    with open(path, "rb") as fh:
+        header = jpeg_segments.read_header(fh, keep=UNDO_MARKERS)
+        segments = []
+        for seg in header.segments:
+            if seg.marker in UNDO_MARKERS:
+                length = seg.size - 2
+                segments.append((seg.offset, bytes([0xff, seg.marker, length >> 8, length & 0xff]) + seg.payload))
+        size, digest = image_checksum(fh, header.scan_offset)
+    return UndoEntry(path, segments, size, digest)
+
+
+def restore(entry: UndoEntry, fsync: bool = False) -> bool:
+    """Kembalikan segmen APP1/APP13 file ke isi entry; False bila sudah sama.
+
+    Segmen lain (DQT, SOF, ...) diambil dari file sekarang dan disusun ulang
+    di sela segmen asli sesuai offset aslinya; data gambar tidak diubah.
+    ValueError bila data gambar sudah berubah sejak dicatat.
+    """
+    with open(entry.path, "rb") as fh:
+        header = jpeg_segments.read_header(fh, keep=())
+        if image_checksum(fh, header.scan_offset) != (entry.image_size, entry.image_sum):
+            raise ValueError("Image data changed since the batch was written, not rolling back")
+        fh.seek(0)
+        raw = fh.read(header.scan_offset)
+
+    current = [(s.offset, raw[s.offset:s.end]) for s in header.segments if s.marker in UNDO_MARKERS]
+    if current == sorted(entry.segments):
+        # Tidak pernah ditulis (mis. error atau crash sebelum tulis)
+        return False
+
+    originals = deque(sorted(entry.segments))
+    others = deque(raw[s.offset:s.end] for s in header.segments if s.marker not in UNDO_MARKERS)
+    out = []
+    pos = 2
+    while originals or others:
+        if originals and (originals[0][0] <= pos or not others):
+            data = originals.popleft()[1]
+        else:
+            data = others.popleft()
+        out.append(data)
+        pos += len(data)
+    # Header yang sama panjang (batch tulis di tempat ke file berpadding)
+    # ditulis di tempat juga; selain itu lewat atomic_rewrite
+    edits = [jpeg_segments.Edit(2, header.scan_offset, b"".join(out))]
+    iptc_core.commit_edits(entry.path, edits, in_place=True, fsync=fsync)
+    return True
+
+
+class UndoJournal:
+    """Segmen metadata asli per file untuk setiap batch, disimpan di SQLite.
+
+    Ukurannya sebanding dengan metadata (biasanya beberapa KB per file),
+    bukan dengan ukuran gambar. Segmen dicatat (dan di-commit) sebelum
+    Job diteruskan ke writer, jadi crash di tengah batch tetap bisa
+    di-rollback; file yang ternyata tidak ditulis dilewati saat rollback.
+    """
+
+    def __init__(self, path: str = DEFAULT_UNDO_PATH):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self.batch = None
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS batches ("
+            " id INTEGER PRIMARY KEY, started REAL, folder TEXT, manifest TEXT)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " batch INTEGER, path TEXT, segments BLOB, image_size INTEGER, image_sum BLOB,"
+            " PRIMARY KEY (batch, path)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def begin_batch(self, folder: str = "", manifest: str = "") -> int:
+        cur = self._conn.execute("INSERT INTO batches (started, folder, manifest) VALUES (?, ?, ?)",
+                                 (time.time(), os.path.abspath(folder) if folder else "", manifest))
+        self._conn.commit()
+        self.batch = cur.lastrowid
+        return self.batch
+
+    def record(self, entry: UndoEntry):
+        # OR IGNORE: file yang muncul dua kali dalam satu batch tetap memakai isi aslinya
+        self._conn.execute(
+            "INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?, ?)",
+            (self.batch, os.path.abspath(entry.path), pack_segments(entry.segments),
+             entry.image_size, entry.image_sum),
+        )
+        self._conn.commit()
+
+    def capture_jobs(self, items: Iterable) -> Iterator:
+        """Filter untuk plan_jobs: catat segmen asli setiap Job sebelum ditulis.
+
+        File yang tidak bisa dibaca diteruskan saja; writer yang akan
+        melaporkan error-nya.
+        """
+        if self.batch is None:
+            self.begin_batch()
+        for item in items:
+            if isinstance(item, iptc_core.Job):
+                try:
+                    self.record(capture(item.path))
+                except (OSError, ValueError):
+                    pass
+            yield item
+
+    def batches(self) -> list:
+        """[(id, started, folder, manifest, jumlah file)], terbaru dulu."""
+        return self._conn.execute(
+            "SELECT b.id, b.started, b.folder, b.manifest,"
+            " (SELECT COUNT(*) FROM entries e WHERE e.batch = b.id)"
+            " FROM batches b ORDER BY b.id DESC"
+        ).fetchall()
+
+    def entries(self, batch: int) -> Iterator[UndoEntry]:
+        for path, blob, size, digest in self._conn.execute(
+                "SELECT path, segments, image_size, image_sum FROM entries WHERE batch = ?",
+                (batch,)):
+            yield UndoEntry(path, unpack_segments(blob), size, digest)
+
+    def forget(self, batch: int):
+        self._conn.execute("DELETE FROM entries WHERE batch = ?", (batch,))
+        self._conn.execute("DELETE FROM batches WHERE id = ?", (batch,))
+        self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+
+# Entry yang dimuat dari SQLite per putaran rollback (membatasi memori)
+ROLLBACK_CHUNK = 256
+
+
+def rollback(journal: UndoJournal, batch: int, workers: int = 4, fsync: bool = False) -> Iterator[tuple]:
+    """Kembalikan semua file batch di thread pool; yield (path, status, pesan).
+
+    status adalah iptc_core.OK, SKIPPED (file tidak berubah) atau ERROR.
+    """
+    # Import di sini: hanya dibutuhkan untuk rollback
+    from concurrent.futures import ThreadPoolExecutor
+    from itertools import islice
+
+    def run(entry):
+        try:
+            changed = restore(entry, fsync=fsync)
+        except (OSError, ValueError) as e:
+            return entry.path, iptc_core.ERROR, str(e)
+        return entry.path, iptc_core.OK if changed else iptc_core.SKIPPED, ""
+
+    entries = journal.entries(batch)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while True:
+            chunk = list(islice(entries, ROLLBACK_CHUNK))
+            if not chunk:
+                return
+            yield from pool.map(run, chunk)
@@ -0,0 +1,406 @@
+"""Scan marker JPEG sampai SOS dan ganti segmen APP13 (8BIM) dan APP1 (Exif, XMP).
+
+Hanya header yang dibaca; data gambar setelah segmen yang diganti disalin
+apa adanya dari file sumber.
+"""
+import errno
+import io
+import os
+import threading
+from struct import pack, unpack, unpack_from
+from typing import NamedTuple, Optional
+
+from metrics import stage
+
+SOI = 0xd8
+APP0 = 0xe0
+APP1 = 0xe1
+APP13 = 0xed
+SOS = 0xda
+EOI = 0xd9
+
+PHOTOSHOP_SIG = b"Photoshop 3.0\x00"
+EXIF_SIG = b"Exif\x00\x00"
+XMP_SIG = b"http://ns.adobe.com/xap/1.0/\x00"
+IPTC_RESOURCE_ID = 0x0404
+MAX_SEGMENT_PAYLOAD = 0xffff - 2
+
+# Ukuran potongan salinan data gambar (kernel copy maupun buffer)
+COPY_CHUNK = 1024 * 1024
+
+# Dimatikan sekali saja bila kernel / filesystem tidak mendukung
+USE_COPY_FILE_RANGE = hasattr(os, "copy_file_range")
+USE_SENDFILE = hasattr(os, "sendfile")
+_UNSUPPORTED = (errno.ENOSYS, errno.EINVAL, errno.ENOTSOCK, errno.EOPNOTSUPP, errno.EBADF)
+
+_local = threading.local()
+
+# Marker tanpa field panjang (TEM, RSTn)
+STANDALONE_MARKERS = frozenset([0x01] + list(range(0xd0, 0xd8)))
+
+
+class Segment(NamedTuple):
+    marker: int
+    offset: int     # posisi byte 0xFF dari marker
+    size: int       # total byte termasuk marker dan field panjang
+    payload: Optional[bytes]  # hanya diisi untuk marker yang diminta
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+
+class JpegHeader(NamedTuple):
+    segments: list
+    scan_offset: int  # posisi marker SOS (atau EOI) pertama
+
+
+def read_header(fh, keep=(APP13,)) -> JpegHeader:
+    """Baca daftar segmen dari SOI sampai SOS.
+
+    Payload hanya dibaca untuk marker di `keep`; segmen lain cukup di-seek.
+    """
+    fh.seek(0)
+    if fh.read(2) != b"\xff\xd8":
+        raise ValueError("Not a JPEG file (missing SOI marker)")
+
+    segments = []
+    pos = 2
+    while True:
+        byte = fh.read(1)
+        if not byte:
+            raise ValueError("Unexpected end of file before image data")
+        if byte != b"\xff":
+            raise ValueError(f"Invalid JPEG marker at offset {pos}")
+        marker = 0xff
+        # Byte 0xFF tambahan adalah padding yang valid
+        while marker == 0xff:
+            b = fh.read(1)
+            if not b:
+                raise ValueError("Unexpected end of file before image data")
+            marker = b[0]
+            pos += 1
+        offset = pos - 1
+        pos += 1
+
+        if marker in (SOS, EOI):
+            return JpegHeader(segments, offset)
+        if marker in STANDALONE_MARKERS:
+            segments.append(Segment(marker, offset, 2, None))
+            continue
+
+        raw = fh.read(2)
+        if len(raw) < 2:
+            raise ValueError("Unexpected end of file before image data")
+        length = unpack("!H", raw)[0]
+        if length < 2:
+            raise ValueError(f"Invalid segment length at offset {offset}")
+        if marker in keep:
+            payload = fh.read(length - 2)
+            if len(payload) < length - 2:
+                raise ValueError("Unexpected end of file before image data")
+        else:
+            payload = None
+            fh.seek(length - 2, 1)
+        segments.append(Segment(marker, offset, length + 2, payload))
+        pos = offset + length + 2
+
+
+def parse_header(buf, keep=(APP13,)) -> JpegHeader:
+    """Seperti read_header, tapi dari buffer (bytes, mmap, memoryview).
+
+    Payload untuk marker di `keep` berupa slice memoryview, tanpa salinan.
+    """
+    view = memoryview(buf)
+    end = len(view)
+    if view[:2] != b"\xff\xd8":
+        raise ValueError("Not a JPEG file (missing SOI marker)")
+
+    segments = []
+    pos = 2
+    while True:
+        if pos >= end:
+            raise ValueError("Unexpected end of file before image data")
+        if view[pos] != 0xff:
+            raise ValueError(f"Invalid JPEG marker at offset {pos}")
+        # Byte 0xFF tambahan adalah padding yang valid
+        while pos < end and view[pos] == 0xff:
+            pos += 1
+        if pos >= end:
+            raise ValueError("Unexpected end of file before image data")
+        marker = view[pos]
+        offset = pos - 1
+        pos += 1
+
+        if marker in (SOS, EOI):
+            return JpegHeader(segments, offset)
+        if marker in STANDALONE_MARKERS:
+            segments.append(Segment(marker, offset, 2, None))
+            continue
+
+        if pos + 2 > end:
+            raise ValueError("Unexpected end of file before image data")
+        length = unpack_from("!H", view, pos)[0]
+        if length < 2:
+            raise ValueError(f"Invalid segment length at offset {offset}")
+        if pos + length > end:
+            raise ValueError("Unexpected end of file before image data")
+        payload = view[pos + 2:pos + length] if marker in keep else None
+        segments.append(Segment(marker, offset, length + 2, payload))
+        pos += length
+
+
+def find_photoshop_segment(header: JpegHeader) -> Optional[Segment]:
+    """Segmen APP13 Photoshop 3.0 pertama, atau None."""
+    for seg in header.segments:
+        if seg.marker == APP13 and seg.payload is not None and seg.payload[:len(PHOTOSHOP_SIG)] == PHOTOSHOP_SIG:
+            return seg
+    return None
+
+
+def split_resources(payload: bytes) -> tuple:
+    """Pisahkan payload APP13 menjadi (data IIM 0x0404, resource lain mentah)."""
+    iim = b""
+    others = []
+    offset = len(PHOTOSHOP_SIG)
+    end = len(payload)
+    while offset + 12 <= end:
+        start = offset
+        res_id = unpack_from("!H", payload, offset + 4)[0]
+        name_len = payload[offset + 6]
+        # Pascal string dipadding supaya total panjangnya genap
+        offset += 6 + ((name_len + 2) & ~1)
+        if offset + 4 > end:
+            break
+        size = unpack_from("!L", payload, offset)[0]
+        offset += 4
+        data = payload[offset:offset + size]
+        offset += size + (size & 1)
+        if res_id == IPTC_RESOURCE_ID and not iim:
+            iim = data
+        else:
+            others.append(payload[start:min(offset, end)])
+    return iim, b"".join(others)
+
+
+def build_app13(iim: bytes, others: bytes = b"", padding: int = 0) -> bytes:
+    """Susun segmen APP13 lengkap (marker + panjang) dengan resource IIM di depan.
+
+    padding menambahkan byte nol di akhir data IIM (dibatasi ukuran segmen
+    maksimum) supaya edit berikutnya bisa ditulis di tempat.
+    """
+    if padding:
+        room = MAX_SEGMENT_PAYLOAD - len(PHOTOSHOP_SIG) - 12 - len(others) - len(iim)
+        pad = max(0, min(padding, room))
+        # Panjang IIM dibuat genap supaya fit_app13 bisa mengisi ulang tepat
+        if (len(iim) + pad) % 2:
+            pad = pad + 1 if pad < room else max(pad - 1, 0)
+        iim += bytes(pad)
+    block = [PHOTOSHOP_SIG, b"8BIM", pack("!HBB", IPTC_RESOURCE_ID, 0, 0), pack("!L", len(iim)), iim]
+    if len(iim) % 2:
+        block.append(b"\x00")
+    block.append(others)
+    block = b"".join(block)
+    if len(block) > MAX_SEGMENT_PAYLOAD:
+        raise ValueError(f"IPTC data too large for one APP13 segment ({len(block)} bytes)")
+    return pack("!BBH", 0xff, APP13, len(block) + 2) + block
+
+
+def fit_app13(iim: bytes, others: bytes, size: int) -> Optional[bytes]:
+    """APP13 yang tepat size byte (IIM dipadding nol), atau None bila tidak muat."""
+    room = size - 4 - len(PHOTOSHOP_SIG) - 12 - len(others)
+    if room < len(iim) or room % 2:
+        return None
+    return build_app13(iim + bytes(room - len(iim)), others)
+
+
+def find_exif_segment(header: JpegHeader) -> Optional[Segment]:
+    """Segmen APP1 Exif pertama, atau None (payload APP1 harus ikut dibaca)."""
+    for seg in header.segments:
+        if seg.marker == APP1 and seg.payload is not None and seg.payload[:len(EXIF_SIG)] == EXIF_SIG:
+            return seg
+    return None
+
+
+def find_xmp_segment(header: JpegHeader) -> Optional[Segment]:
+    """Segmen APP1 XMP pertama, atau None (payload APP1 harus ikut dibaca)."""
+    for seg in header.segments:
+        if seg.marker == APP1 and seg.payload is not None and seg.payload[:len(XMP_SIG)] == XMP_SIG:
+            return seg
+    return None
+
+
+def build_app1(exif: bytes, padding: int = 0) -> bytes:
+    """Susun segmen APP1 lengkap dari payload "Exif\\0\\0" + TIFF.
+
+    Padding nol di belakang data TIFF diabaikan pembaca karena semua isi
+    TIFF dirujuk lewat offset.
+    """
+    if padding:
+        exif += bytes(max(0, min(padding, MAX_SEGMENT_PAYLOAD - len(exif))))
+    if len(exif) > MAX_SEGMENT_PAYLOAD:
+        raise ValueError(f"EXIF data too large for one APP1 segment ({len(exif)} bytes)")
+    return pack("!BBH", 0xff, APP1, len(exif) + 2) + exif
+
+
+def fit_app1(exif: bytes, size: int) -> Optional[bytes]:
+    """APP1 yang tepat size byte (dipadding nol), atau None bila tidak muat."""
+    room = size - 4
+    if room < len(exif):
+        return None
+    return build_app1(exif + bytes(room - len(exif)))
+
+
+class Edit(NamedTuple):
+    start: int   # byte [start, end) di file lama diganti data
+    end: int
+    data: bytes
+
+
+def plan_edits(src, build_iim=None, build_exif=None, padding: int = 0, build_xmp=None) -> list:
+    """Hitung segmen APP13 dan/atau APP1 Exif baru sebagai list Edit berurutan.
+
+    build_iim(iim_lama) mengembalikan data IIM baru, build_exif(payload_lama
+    atau None) payload Exif baru. APP13 lama diganti di tempat atau
+    disisipkan sebelum SOS; APP1 Exif lama diganti di tempat atau disisipkan
+    setelah SOI/APP0. Dengan padding > 0, segmen baru diusahakan tepat
+    seukuran segmen lama (lihat fits_in_place); kalau tidak muat, segmen
+    ditulis ulang dengan padding byte cadangan. build_xmp(paket_lama atau
+    None) mengembalikan paket XMP baru untuk APP1 XMP (tanpa padding);
+    segmen baru disisipkan setelah APP1 Exif atau, bila tidak ada, setelah
+    SOI/APP0.
+    """
+    with stage("header"):
+        header = read_header(src, keep=header_markers(build_exif is not None or build_xmp is not None))
+    return encode_edits(header, build_iim, build_exif, padding, build_xmp)
+
+
+def header_markers(app1: bool) -> tuple:
+    """Marker yang payload-nya perlu dibaca untuk encode_edits."""
+    return (APP1, APP13) if app1 else (APP13,)
+
+
+def encode_edits(header, build_iim=None, build_exif=None, padding: int = 0, build_xmp=None) -> list:
+    """Bagian encode dari plan_edits untuk Header yang sudah dibaca
+    (read_header dengan keep=header_markers(...))."""
+    edits = []
+    with stage("encode"):
+        exif_seg = find_exif_segment(header) if build_exif is not None or build_xmp is not None else None
+        ps_seg = find_photoshop_segment(header) if build_iim is not None else None
+        first = header.segments[0] if header.segments else None
+        after_app0 = first.end if first is not None and first.marker == APP0 else 2
+        if build_exif is not None:
+            if exif_seg is not None:
+                exif = build_exif(exif_seg.payload)
+                app1 = fit_app1(exif, exif_seg.size) if padding else None
+                edits.append(Edit(exif_seg.offset, exif_seg.end, app1 or build_app1(exif, padding)))
+            else:
+                edits.append(Edit(after_app0, after_app0, build_app1(build_exif(None), padding)))
+        if build_xmp is not None:
+            xmp_seg = find_xmp_segment(header)
+            if xmp_seg is not None:
+                packet = build_xmp(bytes(xmp_seg.payload[len(XMP_SIG):]))
+                edits.append(Edit(xmp_seg.offset, xmp_seg.end, build_app1(XMP_SIG + packet)))
+            else:
+                # Setelah Exif (yang lama, atau yang baru disisipkan di posisi yang sama)
+                pos = exif_seg.end if exif_seg is not None else after_app0
+                edits.append(Edit(pos, pos, build_app1(XMP_SIG + build_xmp(None))))
+        if build_iim is not None:
+            if ps_seg is not None:
+                old_iim, others = split_resources(ps_seg.payload)
+                iim = build_iim(old_iim)
+                app13 = fit_app13(iim, others, ps_seg.size) if padding else None
+                edits.append(Edit(ps_seg.offset, ps_seg.end, app13 or build_app13(iim, others, padding)))
+            else:
+                pos = header.scan_offset
+                edits.append(Edit(pos, pos, build_app13(build_iim(b""), padding=padding)))
+        edits.sort(key=lambda e: e.start)
+    return edits
+
+
+def fits_in_place(edits) -> bool:
+    """True bila semua Edit mengganti segmen lama dengan ukuran yang sama persis."""
+    return bool(edits) and all(e.end > e.start and e.end - e.start == len(e.data) for e in edits)
+
+
+def apply_edits(src, dst, edits):
+    """Salin src ke dst dengan Edit diterapkan; sisanya disalin apa adanya."""
+    with stage("copy"):
+        pos = 0
+        for start, end, data in edits:
+            src.seek(pos)
+            dst.write(src.read(start - pos))
+            dst.write(data)
+            pos = end
+        copy_tail(src, dst, pos)
+
+
+def copy_tail(src, dst, offset):
+    """Salin isi src dari offset sampai EOF ke posisi dst sekarang.
+
+    Data gambar tidak lewat buffer Python bila bisa: os.copy_file_range
+    (Linux), lalu os.sendfile, lalu loop readinto ke satu buffer yang
+    dipakai ulang per thread.
+    """
+    global USE_COPY_FILE_RANGE, USE_SENDFILE
+    try:
+        in_fd, out_fd = src.fileno(), dst.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        in_fd = out_fd = None
+
+    if in_fd is not None:
+        dst.flush()
+        out_pos = dst.tell()
+        remaining = os.fstat(in_fd).st_size - offset
+        copied = 0
+        if USE_COPY_FILE_RANGE:
+            try:
+                while copied < remaining:
+                    n = os.copy_file_range(in_fd, out_fd, min(remaining - copied, COPY_CHUNK * 64),
+                                           offset + copied, out_pos + copied)
+                    if n == 0:
+                        break
+                    copied += n
+            except OSError as e:
+                if e.errno in _UNSUPPORTED:
+                    USE_COPY_FILE_RANGE = False
+                elif e.errno != errno.EXDEV:
+                    raise
+        if copied < remaining and USE_SENDFILE:
+            os.lseek(out_fd, out_pos + copied, os.SEEK_SET)
+            try:
+                while copied < remaining:
+                    n = os.sendfile(out_fd, in_fd, offset + copied, min(remaining - copied, COPY_CHUNK * 64))
+                    if n == 0:
+                        break
+                    copied += n
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED:
+                    raise
+                USE_SENDFILE = False
+        # Sinkronkan posisi file object dengan yang sudah ditulis kernel
+        dst.seek(out_pos + copied)
+        offset += copied
+
+    buf = getattr(_local, "buffer", None)
+    if buf is None:
+        buf = _local.buffer = bytearray(COPY_CHUNK)
+    view = memoryview(buf)
+    src.seek(offset)
+    while True:
+        n = src.readinto(view)
+        if not n:
+            break
+        dst.write(view[:n])
+
+
+def write_in_place(fh, edits):
+    """Timpa segmen langsung di file (fh dibuka "r+b"); hanya untuk fits_in_place."""
+    pwrite = getattr(os, "pwrite", None)
+    for start, _, data in edits:
+        if pwrite is not None:
+            pwrite(fh.fileno(), data, start)
+        else:
+            fh.seek(start)
+            fh.write(data)
+    fh.flush()
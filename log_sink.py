@@ -0,0 +1,110 @@
+"""Penampung log dengan ring buffer, filter severity dan stream ke file.
+
+Tidak bergantung ke Qt: GUI mengambil baris baru lewat drain() dari timer,
+jadi widget log di-update beberapa kali per detik, bukan per pesan.
+"""
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+# Sama dengan level modul logging (tanpa import logging)
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+
+def level_of(message: str) -> int:
+    """Tebak severity dari awalan pesan ("Warning: ...", "Error ...")."""
+    if message.startswith("Warning"):
+        return WARNING
+    if message.startswith(("Error", "Failed")):
+        return ERROR
+    return INFO
+
+
+def new_run_name(folder: str) -> str:
+    """Nama run "run-YYYYmmdd-HHMMSS" yang belum dipakai di folder.
+
+    File log-nya langsung dibuat kosong (mode "x"), jadi dua run di detik
+    yang sama (atau dari dua proses) mendapat nama berbeda: -2, -3, ...
+    """
+    base = time.strftime("run-%Y%m%d-%H%M%S")
+    for n in itertools.count(1):
+        name = base if n == 1 else f"{base}-{n}"
+        try:
+            open(os.path.join(folder, name + ".log"), "x").close()
+        except FileExistsError:
+            continue
+        return name
+
+
+class LogSink:
+    """Ring buffer pesan log + antrian pesan yang belum ditampilkan.
+
+    capacity membatasi isi ring buffer dan antrian pending; bila antrian
+    penuh sebelum di-drain, pesan tertua dibuang dan dihitung di dropped.
+    File log (bila diset) selalu menerima semua pesan tanpa filter.
+    """
+
+    def __init__(self, capacity: int = 10000, level: int = INFO, path: Optional[str] = None):
+        self.capacity = capacity
+        self.level = level
+        self._lines = deque(maxlen=capacity)
+        self._pending = deque(maxlen=capacity)
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            self.open_file(path)
+
+    def open_file(self, path: str):
+        self.close_file()
+        f = open(path, "a", encoding="utf-8")
+        with self._lock:
+            self._file = f
+
+    def close_file(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def write(self, message: str, level: Optional[int] = None):
+        if level is None:
+            level = level_of(message)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(message + "\n")
+            self._lines.append((level, message))
+            if level >= self.level:
+                if len(self._pending) == self._pending.maxlen:
+                    self._dropped += 1
+                self._pending.append(message)
+
+    def drain(self) -> list:
+        """Ambil pesan yang belum ditampilkan (sudah lolos filter level)."""
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+            if self._file is not None:
+                self._file.flush()
+        if dropped:
+            lines.insert(0, f"... {dropped} lines omitted (see log file)")
+        return lines
+
+    def set_level(self, level: int) -> list:
+        """Ganti filter; kembalikan isi ring buffer yang lolos filter baru."""
+        with self._lock:
+            self.level = level
+            self._pending.clear()
+            self._dropped = 0
+            return [msg for lvl, msg in self._lines if lvl >= level]
+
+    def lines(self) -> list:
+        with self._lock:
+            return [msg for _, msg in self._lines]
@@ -0,0 +1,98 @@
+"""Pembaca manifest CSV secara streaming.
+
+Encoding (BOM) dan dialect dideteksi dari potongan awal file; baris data
+dibaca lazy sehingga memori tetap kecil berapa pun ukuran manifest.
+Potongan awal divalidasi saat dibuka; byte yang tidak valid di bagian lain
+dibaca dengan surrogateescape dan dilaporkan per baris oleh plan_jobs.
+"""
+import codecs
+import csv
+import os
+from typing import Iterator
+
+PREFIX_SIZE = 64 * 1024
+
+# Nama header yang dikenali untuk tiap field (sudah dinormalisasi)
+COLUMN_CANDIDATES = {
+    "filename": ["filename", "file name", "file", "image", "image name"],
+    "title": ["title", "object name", "name"],
+    "description": ["description", "caption", "caption/abstract"],
+    "keywords": ["keywords", "tags", "tag"],
+}
+
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def norm(s: str) -> str:
+    """Normalisasi teks header: trim + lower + hilangkan spasi ganda."""
+    return " ".join((s or "").strip().split()).lower()
+
+
+def guess_column(headers: list, field: str) -> int:
+    """Indeks kolom untuk field berdasarkan COLUMN_CANDIDATES, -1 bila tidak ada."""
+    norm_headers = [norm(h) for h in headers]
+    for cand in COLUMN_CANDIDATES[field]:
+        if cand in norm_headers:
+            return norm_headers.index(cand)
+    return -1
+
+
+def detect_encoding(prefix: bytes) -> str:
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    # Tanpa BOM dianggap UTF-8 (utf-8-sig aman untuk keduanya)
+    return "utf-8-sig"
+
+
+def detect_dialect(first_line: str):
+    try:
+        return csv.Sniffer().sniff(first_line or ",")
+    except csv.Error:
+        return csv.excel
+
+
+class Manifest:
+    """Manifest CSV: header dibaca saat dibuka, baris data lewat rows()."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            prefix = f.read(PREFIX_SIZE)
+        lines = prefix.count(b"\n")
+        if len(prefix) == self.size:
+            # Seluruh file ada di prefix: jumlah baris tepat
+            self._lines = lines + (1 if prefix and not prefix.endswith(b"\n") else 0)
+        else:
+            # Ukuran file dibagi rata-rata panjang baris di prefix
+            self._lines = round(self.size * max(lines, 1) / len(prefix))
+        self.encoding = detect_encoding(prefix)
+        try:
+            # Karakter multi-byte yang terpotong di akhir prefix bukan error
+            text = codecs.getincrementaldecoder(self.encoding)().decode(prefix, final=len(prefix) == self.size)
+        except UnicodeDecodeError as e:
+            raise ValueError(f"CSV file is not valid {self.encoding} text (byte {e.start})") from None
+        self.dialect = detect_dialect(text.splitlines()[0] if text else "")
+
+        header = next(self._reader(), None)
+        self.headers = header or []
+
+    def _reader(self) -> Iterator[list]:
+        with open(self.path, "r", encoding=self.encoding, errors="surrogateescape", newline="") as f:
+            for row in csv.reader(f, self.dialect):
+                yield [(x or "").strip() for x in row]
+
+    def rows(self) -> Iterator[list]:
+        """Yield baris data (tanpa header), setiap sel sudah di-strip."""
+        reader = self._reader()
+        next(reader, None)
+        yield from reader
+
+    def estimate_rows(self) -> int:
+        """Perkiraan jumlah baris data dari prefix (untuk progress bar), tanpa membaca seluruh file."""
+        return max(self._lines - 1, 0)
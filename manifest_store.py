@@ -0,0 +1,190 @@
+"""Manifest CSV yang diimport sekali ke SQLite, untuk manifest sangat besar.
+
+Import dilakukan sekali per versi file (path + size + mtime): baris
+dimasukkan per batch dengan executemany, lalu index dibuat di kolom nama
+file yang sudah dinormalisasi. Run berikutnya langsung membuka database
+cache-nya. Proses, preview dan pencarian membaca per halaman dari SQLite,
+jadi memori tetap kecil berapa pun jumlah barisnya.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from itertools import islice
+from typing import Iterator, Optional
+
+import iptc_core
+from file_index import TEMP_PREFIX, fold
+from manifest import Manifest, guess_column
+
+DEFAULT_CACHE_DIR = os.path.join(iptc_core.STATE_DIR, "manifests")
+
+# Manifest sebesar ini (byte) otomatis dipakai lewat ManifestStore di GUI
+STORE_MIN_BYTES = 32 * 1024 * 1024
+
+# Baris per executemany saat import
+IMPORT_BATCH = 10000
+
+SCHEMA_VERSION = "1"
+
+# Satu encoder dipakai ulang: json.dumps dengan argumen membuat encoder baru per panggilan.
+# ensure_ascii: sel dengan byte tidak valid (surrogateescape) tetap bisa disimpan di SQLite
+_encode_cells = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def filename_key(name: str) -> str:
+    """Nama file dari CSV dalam bentuk yang diindeks (seperti plan_jobs + fold)."""
+    key = (name or "").strip().strip('"\'').replace("\\", "/").lstrip("/")
+    if key.startswith("./"):
+        key = key[2:]
+    if not key.isascii():
+        # Surrogate dari surrogateescape tidak bisa disimpan di SQLite
+        key = key.encode("utf-8", "surrogateescape").decode("utf-8", "replace")
+    return fold(key)
+
+
+def cache_path(path: str, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    digest = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, digest + ".sqlite")
+
+
+class ManifestStore:
+    """Pengganti Manifest yang membaca baris dari database SQLite cache.
+
+    filename_column: indeks kolom yang diindeks; ditebak dari header bila
+    None. Database dibangun ulang bila file CSV berubah atau kolomnya lain.
+    progress(done, total) dipanggil per batch selama import (total hanya
+    perkiraan); exception dari progress membatalkan import. Koneksi untuk
+    page/find/search dibuat saat pertama dipakai, jadi store boleh dibuka di
+    thread lain lalu dipakai di thread GUI.
+    """
+
+    def __init__(self, path: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                 filename_column: Optional[int] = None, progress=None):
+        self.path = path
+        self.db_path = cache_path(path, cache_dir)
+        st = os.stat(path)
+        self._source = f"{st.st_size}:{st.st_mtime_ns}"
+        self._filename_column = filename_column
+        self.imported = False
+
+        meta = self._read_meta()
+        wanted = filename_column if filename_column is not None else meta.get("filename_column")
+        if (meta.get("schema") != SCHEMA_VERSION or meta.get("source") != self._source
+                or meta.get("filename_column") != wanted):
+            os.makedirs(cache_dir, exist_ok=True)
+            self._import(progress)
+            meta = self._read_meta()
+            self.imported = True
+
+        self.headers = meta["headers"]
+        self.count = meta["count"]
+        self.filename_column = meta["filename_column"]
+        self._db = None
+
+    def _read_meta(self) -> dict:
+        if not os.path.exists(self.db_path):
+            return {}
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                return {k: json.loads(v) for k, v in conn.execute("SELECT key, value FROM meta")}
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return {}
+
+    def _connection(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path)
+        return self._db
+
+    def _import(self, progress=None):
+        """Import CSV ke database baru, lalu ganti database lama (atomic)."""
+        manifest = Manifest(self.path)
+        total = manifest.estimate_rows() if progress is not None else 0
+        headers = manifest.headers
+        column = self._filename_column
+        if column is None:
+            column = max(guess_column(headers, "filename"), 0)
+
+        tmp = os.path.join(os.path.dirname(self.db_path), TEMP_PREFIX + os.path.basename(self.db_path))
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        conn = sqlite3.connect(tmp)
+        ok = False
+        try:
+            # Cache yang bisa dibangun ulang: tanpa journal dan fsync saat import
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("CREATE TABLE rows (row INTEGER PRIMARY KEY, name TEXT, cells TEXT)")
+
+            count = 0
+            rows = enumerate(manifest.rows(), start=2)
+            while True:
+                batch = [(i, filename_key(cells[column]) if column < len(cells) else "",
+                          _encode_cells(cells))
+                         for i, cells in islice(rows, IMPORT_BATCH)]
+                if not batch:
+                    break
+                conn.executemany("INSERT INTO rows VALUES (?, ?, ?)", batch)
+                count += len(batch)
+                if progress is not None:
+                    progress(count, max(total, count))
+            # Index dibuat setelah semua baris masuk (lebih cepat dari index bertahap)
+            conn.execute("CREATE INDEX rows_name ON rows (name)")
+            meta = {"schema": SCHEMA_VERSION, "source": self._source, "headers": headers,
+                    "count": count, "filename_column": column, "encoding": manifest.encoding}
+            conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                             [(k, json.dumps(v, ensure_ascii=False)) for k, v in meta.items()])
+            conn.commit()
+            ok = True
+        finally:
+            conn.close()
+            if not ok:
+                os.remove(tmp)
+        os.replace(tmp, self.db_path)
+
+    # --- antarmuka Manifest ------------------------------------------------
+
+    def rows(self) -> Iterator[list]:
+        """Yield semua baris data berurutan.
+
+        Koneksi dibuat saat iterasi dimulai, jadi generator boleh dipakai di
+        thread lain (mis. BatchWorker).
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for (cells,) in conn.execute("SELECT cells FROM rows ORDER BY row"):
+                yield json.loads(cells)
+        finally:
+            conn.close()
+
+    def estimate_rows(self) -> int:
+        return self.count
+
+    # --- akses per halaman dan pencarian -------------------------------------
+
+    def page(self, offset: int, limit: int) -> list:
+        """Baris data ke-offset .. offset+limit (0 = baris pertama setelah header)."""
+        return [json.loads(cells) for (cells,) in self._connection().execute(
+            "SELECT cells FROM rows WHERE row >= ? ORDER BY row LIMIT ?", (offset + 2, limit))]
+
+    def find(self, filename: str) -> list:
+        """[(nomor baris CSV, cells)] untuk baris dengan nama file itu (lewat index)."""
+        return [(row, json.loads(cells)) for row, cells in self._connection().execute(
+            "SELECT row, cells FROM rows WHERE name = ? ORDER BY row", (filename_key(filename),))]
+
+    def search(self, text: str, limit: int = 100) -> list:
+        """[(nomor baris CSV, cells)] dengan nama file yang diawali text (lewat index)."""
+        prefix = filename_key(text)
+        # Range pada index, bukan LIKE (yang tidak memakai index untuk TEXT biasa)
+        return [(row, json.loads(cells)) for row, cells in self._connection().execute(
+            "SELECT row, cells FROM rows WHERE name >= ? AND name < ? ORDER BY name, row LIMIT ?",
+            (prefix, prefix + "\U0010ffff", limit))]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
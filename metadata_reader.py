@@ -0,0 +1,132 @@
+"""Baca metadata IPTC/EXIF yang ada tanpa memuat seluruh file.
+
+File di-mmap, marker JPEG dijalani sampai SOS, lalu APP13 dan APP1 didecode
+dari slice memoryview; halaman data gambar tidak pernah disentuh. Cocok
+untuk verifikasi, diff dan preflight sebelum menulis.
+"""
+import mmap
+import os
+from struct import unpack_from
+from typing import NamedTuple
+
+import iim
+import jpeg_segments
+from iptc_core import EXIF_IMAGE_DESCRIPTION, EXIF_USER_COMMENT, EXIF_XP_KEYWORDS, EXIF_XP_TAGS
+
+# Tag EXIF yang dibaca: nomor tag -> nama
+EXIF_FIELDS = {
+    EXIF_IMAGE_DESCRIPTION: "ImageDescription",
+    EXIF_USER_COMMENT: "UserComment",
+    EXIF_XP_KEYWORDS: "XPKeywords",
+}
+EXIF_IFD_POINTER = 0x8769
+
+# Ukuran per tipe TIFF (BYTE, ASCII, SHORT, LONG, RATIONAL, ..., UNDEFINED)
+TIFF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+
+# Prefix kode karakter UserComment (8 byte) -> encoding
+USER_COMMENT_CODES = {
+    b"ASCII\x00\x00\x00": "ascii",
+    b"UNICODE\x00": None,  # UTF-16, urutan byte mengikuti TIFF
+    b"JIS\x00\x00\x00\x00\x00": "shift_jis",
+    b"\x00" * 8: "utf-8",
+}
+
+
+class Metadata(NamedTuple):
+    """Metadata yang sedang tersimpan di satu file."""
+    title: str
+    description: str
+    keywords: list
+    exif: dict  # nama tag EXIF -> str, hanya tag yang ada
+
+
+def _text(value) -> str:
+    return bytes(value).rstrip(b"\x00").decode("utf-8", errors="replace")
+
+
+def decode_user_comment(value, byte_order="<") -> str:
+    value = bytes(value)
+    code = value[:8]
+    if code in USER_COMMENT_CODES:
+        encoding = USER_COMMENT_CODES[code] or ("utf-16-le" if byte_order == "<" else "utf-16-be")
+        return value[8:].decode(encoding, errors="replace").rstrip("\x00 ")
+    # exif_data.py menulis UTF-8 mentah tanpa kode karakter
+    return value.rstrip(b"\x00").decode("utf-8", errors="replace")
+
+
+def read_ifd(tiff, offset, byte_order, wanted):
+    """{tag: memoryview nilai} untuk tag di wanted dari satu IFD."""
+    out = {}
+    if offset + 2 > len(tiff):
+        return out
+    count = unpack_from(byte_order + "H", tiff, offset)[0]
+    entry = offset + 2
+    for _ in range(count):
+        if entry + 12 > len(tiff):
+            break
+        tag, typ, n = unpack_from(byte_order + "HHL", tiff, entry)
+        if tag in wanted:
+            size = TIFF_TYPE_SIZES.get(typ, 1) * n
+            if size <= 4:
+                start = entry + 8
+            else:
+                start = unpack_from(byte_order + "L", tiff, entry + 8)[0]
+            out[tag] = tiff[start:start + size]
+        entry += 12
+    return out
+
+
+def decode_exif(payload) -> dict:
+    """Baca tag di EXIF_FIELDS dari payload APP1 ("Exif\\0\\0" + TIFF)."""
+    tiff = payload[len(jpeg_segments.EXIF_SIG):]
+    if len(tiff) < 8:
+        return {}
+    byte_order = {b"II": "<", b"MM": ">"}.get(bytes(tiff[:2]))
+    if byte_order is None:
+        return {}
+    ifd0 = unpack_from(byte_order + "L", tiff, 4)[0]
+    values = read_ifd(tiff, ifd0, byte_order, set(EXIF_FIELDS) | {EXIF_IFD_POINTER})
+    pointer = values.pop(EXIF_IFD_POINTER, None)
+    if pointer is not None and len(pointer) == 4:
+        values.update(read_ifd(tiff, unpack_from(byte_order + "L", pointer)[0], byte_order, set(EXIF_FIELDS)))
+
+    out = {}
+    for tag, value in values.items():
+        if tag in EXIF_XP_TAGS:
+            text = bytes(value).decode("utf-16-le", errors="replace").rstrip("\x00")
+        elif tag == EXIF_USER_COMMENT:
+            text = decode_user_comment(value, byte_order)
+        else:
+            text = _text(value)
+        out[EXIF_FIELDS[tag]] = text
+    return out
+
+
+def decode_metadata(buf) -> Metadata:
+    """Metadata dari isi file JPEG (bytes, mmap atau memoryview)."""
+    header = jpeg_segments.parse_header(buf, keep=(jpeg_segments.APP1, jpeg_segments.APP13))
+    iptc = {}
+    seg = jpeg_segments.find_photoshop_segment(header)
+    if seg is not None:
+        iptc = iim.decode(jpeg_segments.split_resources(seg.payload)[0])
+    seg = jpeg_segments.find_exif_segment(header)
+    exif = decode_exif(seg.payload) if seg is not None else {}
+    return Metadata(iptc.get(iim.OBJECT_NAME, ""), iptc.get(iim.CAPTION, ""),
+                    iptc.get(iim.KEYWORDS, []), exif)
+
+
+def read_metadata(path) -> Metadata:
+    """Baca metadata path lewat mmap; hanya halaman header yang dibaca dari disk."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("Not a JPEG file (missing SOI marker)")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return decode_metadata(mm)
+    finally:
+        try:
+            mm.close()
+        except BufferError:
+            # Slice masih dipegang traceback exception; dilepas oleh GC
+            pass
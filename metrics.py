@@ -0,0 +1,234 @@
+"""Instrumentasi per tahap untuk batch: counter, waktu kumulatif dan histogram.
+
+Tahap di dalam writer (yang bisa jalan di proses worker) dicatat lewat
+stage() ke dict thread-local per job; run_job mengirimkannya balik di
+RowResult.stats dan Recorder di proses utama menggabungkannya. count()
+menaruh counter (int) di dict yang sama. Tanpa begin_job() aktif, stage()
+dan count() tidak mencatat apa-apa.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Batas bucket histogram latency (detik), gaya Prometheus
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+
+
+@contextmanager
+def stage(name):
+    """Catat durasi blok ke job yang sedang aktif di thread ini (bila ada)."""
+    stages = getattr(_local, "stages", None)
+    if stages is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def count(name, n=1):
+    """Tambah counter name di job yang sedang aktif di thread ini (bila ada)."""
+    stages = getattr(_local, "stages", None)
+    if stages is not None:
+        stages[name] = stages.get(name, 0) + n
+
+
+def begin_job():
+    _local.stages = {}
+
+
+def end_job() -> dict:
+    stages = getattr(_local, "stages", None) or {}
+    _local.stages = None
+    return stages
+
+
+class Histogram:
+    __slots__ = ("count", "total", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # slot terakhir = +Inf
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "seconds": self.total,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "buckets": {str(b): n for b, n in zip(BUCKETS + ("+Inf",), self.buckets)},
+        }
+
+
+class Recorder:
+    """Kumpulan counter dan histogram per tahap untuk satu run."""
+
+    enabled = True
+
+    def __init__(self):
+        self.counters = {}
+        self.stages = {}
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.duration = None
+
+    def inc(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        hist = self.stages.get(name)
+        if hist is None:
+            hist = self.stages[name] = Histogram()
+        hist.observe(seconds)
+
+    @contextmanager
+    def time(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed_iter(self, iterable, name):
+        """Bungkus iterator; waktu tiap next() dicatat sebagai tahap name."""
+        it = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            self.observe(name, time.perf_counter() - start)
+            yield item
+
+    def add_result(self, result):
+        self.inc(f"rows_{result.status}")
+        for name, value in (result.stats or {}).items():
+            # int = counter dari count(), float = durasi dari stage()
+            if isinstance(value, int):
+                self.inc(name, value)
+            else:
+                self.observe(name, value)
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._t0
+
+    def to_dict(self):
+        duration = self.duration if self.duration is not None else time.perf_counter() - self._t0
+        rows_ok = self.counters.get("rows_ok", 0)
+        return {
+            "started": self.started,
+            "duration_seconds": duration,
+            "files_per_sec": rows_ok / duration if duration else 0.0,
+            "counters": dict(self.counters),
+            "cache_hit_rate": self.cache_hit_rates(),
+            "stages": {name: h.to_dict() for name, h in sorted(self.stages.items())},
+        }
+
+    def cache_hit_rates(self):
+        """{cache: hit rate} dari counter <cache>_cache_hits / _cache_misses."""
+        rates = {}
+        for cache in self.caches():
+            hits = self.counters.get(cache + "_cache_hits", 0)
+            total = hits + self.counters.get(cache + "_cache_misses", 0)
+            rates[cache] = hits / total if total else 0.0
+        return rates
+
+    def caches(self):
+        return sorted({name.rsplit("_cache_", 1)[0] for name in self.counters if "_cache_" in name})
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def write_prometheus(self, path, prefix="iptc_writer"):
+        """Tulis format textfile collector node_exporter (atomic: tmp + rename).
+
+        Jumlah per run ditulis sebagai gauge (tanpa _total): nilainya turun
+        di run berikutnya, jadi bukan counter kumulatif.
+        """
+        data = self.to_dict()
+        lines = [
+            f"# HELP {prefix}_rows CSV rows handled in the last run, by status.",
+            f"# TYPE {prefix}_rows gauge",
+        ]
+        for name, value in sorted(self.counters.items()):
+            if name.startswith("rows_"):
+                lines.append(f'{prefix}_rows{{status="{name[5:]}"}} {value}')
+        caches = self.caches()
+        if caches:
+            lines += [
+                f"# HELP {prefix}_cache_lookups Encoding cache lookups in the last run, by result.",
+                f"# TYPE {prefix}_cache_lookups gauge",
+            ]
+            for cache in caches:
+                for result, counter in (("hit", "hits"), ("miss", "misses")):
+                    value = self.counters.get(f"{cache}_cache_{counter}", 0)
+                    lines.append(f'{prefix}_cache_lookups{{cache="{cache}",result="{result}"}} {value}')
+        lines += [
+            f"# HELP {prefix}_stage_seconds Time spent per processing stage in the last run.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        for name, hist in sorted(self.stages.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), hist.buckets):
+                cumulative += n
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {hist.total}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {hist.count}')
+        lines += [
+            f"# HELP {prefix}_run_duration_seconds Wall time of the last run.",
+            f"# TYPE {prefix}_run_duration_seconds gauge",
+            f"{prefix}_run_duration_seconds {data['duration_seconds']}",
+            f"# HELP {prefix}_files_per_second Files written per second in the last run.",
+            f"# TYPE {prefix}_files_per_second gauge",
+            f"{prefix}_files_per_second {data['files_per_sec']}",
+            f"# HELP {prefix}_last_run_timestamp_seconds Start time of the last run.",
+            f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+            f"{prefix}_last_run_timestamp_seconds {self.started}",
+        ]
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+
+
+class NullRecorder:
+    """Recorder yang tidak mencatat apa-apa (instrumentasi mati)."""
+
+    enabled = False
+
+    def inc(self, name, n=1):
+        pass
+
+    def observe(self, name, seconds):
+        pass
+
+    @contextmanager
+    def time(self, name):
+        yield
+
+    def timed_iter(self, iterable, name):
+        return iter(iterable)
+
+    def add_result(self, result):
+        pass
+
+
+NULL = NullRecorder()
@@ -0,0 +1,88 @@
+"""Kembalikan metadata file dari batch yang dicatat di undo journal.
+
+Contoh:
+    python rollback.py --list
+    python rollback.py last --workers 8
+    python rollback.py 12
+
+Batch dicatat oleh cli.py --undo atau opsi "Undo journal" di GUI. Hanya
+segmen APP1/APP13 yang dikembalikan; file yang data gambarnya sudah
+berubah sejak batch ditulis dilewati dengan error.
+"""
+import argparse
+import sys
+import time
+
+import iptc_core
+from journal import DEFAULT_UNDO_PATH, UndoJournal, rollback
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="rollback.py",
+        description="Restore the original metadata of the files written by a batch.",
+    )
+    parser.add_argument("batch", nargs="?", help="batch number, or 'last' for the most recent batch")
+    parser.add_argument("--list", action="store_true", help="list the recorded batches")
+    parser.add_argument("--journal", metavar="PATH", default=DEFAULT_UNDO_PATH,
+                        help="undo journal (default: %(default)s)")
+    parser.add_argument("-w", "--workers", type=int, default=4,
+                        help="number of files restored in parallel (default: 4)")
+    parser.add_argument("--fsync", action="store_true",
+                        help="flush each restored file to disk before replacing it")
+    parser.add_argument("--forget", action="store_true",
+                        help="remove the batch from the journal after a rollback without errors")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors and the summary")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.list and not args.batch:
+        parser.error("give a batch number, 'last' or --list")
+
+    journal = UndoJournal(args.journal)
+    try:
+        batches = journal.batches()
+        if args.list:
+            for batch, started, folder, manifest, files in batches:
+                stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started))
+                print(f"{batch:>5}  {stamp}  {files:>7} files  {folder}  {manifest}")
+            return 0
+
+        if args.batch == "last":
+            if not batches:
+                print("Error: the undo journal is empty", file=sys.stderr)
+                return 2
+            batch = batches[0][0]
+        elif args.batch.isdigit() and any(b[0] == int(args.batch) for b in batches):
+            batch = int(args.batch)
+        else:
+            print(f"Error: no such batch: {args.batch}", file=sys.stderr)
+            return 2
+
+        counts = {iptc_core.OK: 0, iptc_core.SKIPPED: 0, iptc_core.ERROR: 0}
+        try:
+            for path, status, message in rollback(journal, batch, workers=args.workers, fsync=args.fsync):
+                counts[status] += 1
+                if status == iptc_core.ERROR:
+                    print(f"Error restoring {path}: {message}", file=sys.stderr)
+                elif status == iptc_core.OK and not args.quiet:
+                    print(f"Restored: {path}")
+        except KeyboardInterrupt:
+            print("Rollback cancelled.", file=sys.stderr)
+            return 130
+
+        errors = counts[iptc_core.ERROR]
+        print(f"Rollback of batch {batch} complete. {counts[iptc_core.OK]} files restored, "
+              f"{counts[iptc_core.SKIPPED]} unchanged, {errors} errors.")
+        if args.forget and not errors:
+            journal.forget(batch)
+        return 1 if errors else 0
+    finally:
+        journal.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+PIL_Image = pytest.importorskip("PIL.Image")
+
+import cli
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_cli_does_not_import_qt_or_iptcinfo3():
+    modules = ["PyQt6", "iptcinfo3", "xmp", "xml.etree.ElementTree"]
+    code = f"import sys, cli; print(*(m in sys.modules for m in {modules!r}))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False"] * len(modules)
+
+
+def test_cli_dry_run_and_write(tmp_path, capsys):
+    PIL_Image.new("RGB", (8, 8)).save(str(tmp_path / "a.jpg"))
+    manifest = tmp_path / "m.csv"
+    manifest.write_text("Image Name,Judul,Caption,Tags\na.jpg,T,D,k\nb.jpg,T,D,k\n")
+    with open(tmp_path / "a.jpg", "rb") as fh:
+        original = fh.read()
+
+    args = [str(tmp_path), str(manifest), "--title-column", "judul", "--checkpoint-dir", str(tmp_path / "ck")]
+    assert cli.main(args + ["--dry-run"]) == 1
+    with open(tmp_path / "a.jpg", "rb") as fh:
+        assert fh.read() == original
+
+    assert cli.main(args) == 1
+    out = capsys.readouterr().out
+    assert "OK: a.jpg" in out
+    assert "File not found: b.jpg (row 3)" in out
+    with open(tmp_path / "a.jpg", "rb") as fh:
+        assert fh.read() != original
+
+
+def test_cli_index_manifest(tmp_path, capsys):
+    PIL_Image.new("RGB", (8, 8)).save(str(tmp_path / "a.jpg"))
+    manifest = tmp_path / "m.csv"
+    manifest.write_text("Title,Filename,Caption,Tags\nT,a.jpg,D,k\nT,b.jpg,D,k\n")
+    cache = tmp_path / "cache"
+
+    args = [str(tmp_path), str(manifest), "--index-manifest", "--manifest-cache", str(cache),
+            "--checkpoint-dir", str(tmp_path / "ck")]
+    assert cli.main(args + ["--dry-run"]) == 1
+    assert len(os.listdir(cache)) == 1
+    assert cli.main(args) == 1
+    out = capsys.readouterr().out
+    assert "OK: a.jpg" in out
+    assert "File not found: b.jpg (row 3)" in out
+
+
+def test_cli_unknown_column(tmp_path):
+    manifest = tmp_path / "m.csv"
+    manifest.write_text("Filename,Title,Description,Keywords\n")
+    assert cli.main([str(tmp_path), str(manifest), "--keywords-column", "nope"]) == 2
+
+
+def test_cli_incremental_skips_unchanged(tmp_path, capsys):
+    PIL_Image.new("RGB", (8, 8)).save(str(tmp_path / "a.jpg"))
+    PIL_Image.new("RGB", (8, 8)).save(str(tmp_path / "b.jpg"))
+    manifest = tmp_path / "m.csv"
+    manifest.write_text("Filename,Title,Description,Keywords\na.jpg,T,D,k\nb.jpg,T,D,k\n")
+    args = [str(tmp_path), str(manifest), "-i", "--journal", str(tmp_path / "j.sqlite"),
+            "--checkpoint-dir", str(tmp_path / "ck")]
+
+    assert cli.main(args) == 0
+    capsys.readouterr()
+    assert cli.main(args) == 0
+    out = capsys.readouterr().out
+    assert "Unchanged: a.jpg" in out and "2 unchanged" in out
+    # Run tanpa error tidak meninggalkan checkpoint
+    assert os.listdir(tmp_path / "ck") == []
+
+    manifest.write_text("Filename,Title,Description,Keywords\na.jpg,T,D,k\nb.jpg,New,D,k\n")
+    assert cli.main(args) == 0
+    out = capsys.readouterr().out
+    assert "Unchanged: a.jpg" in out and "OK: b.jpg" in out
+
+
+def test_cli_resume_skips_completed_rows(tmp_path, capsys):
+    for name in ("a.jpg", "b.jpg"):
+        PIL_Image.new("RGB", (8, 8)).save(str(tmp_path / name))
+    manifest = tmp_path / "m.csv"
+    manifest.write_text("Filename,Title,Description,Keywords\na.jpg,T,D,k\nb.jpg,T,D,k\nc.jpg,T,D,k\n")
+    args = [str(tmp_path), str(manifest), "--checkpoint-dir", str(tmp_path / "checkpoints")]
+
+    assert cli.main(args) == 1
+    capsys.readouterr()
+    assert cli.main(args + ["--resume"]) == 1
+    out = capsys.readouterr().out
+    assert "Resuming: 2 rows already completed" in out
+    assert "OK: a.jpg" not in out and "File not found: c.jpg" in out
@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtCore = pytest.importorskip("PyQt6.QtCore")
+QtGui = pytest.importorskip("PyQt6.QtGui")
+
+import iptc_core
+from csv_model import CsvTableModel, StoreTableModel
+from manifest_store import ManifestStore
+
+Qt = QtCore.Qt
+
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    return QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+
+
+def make_rows(n):
+    return ([f"IMG_{i:04}.JPG", f"t{i}"] for i in range(n))
+
+
+def test_fetch_more_loads_in_batches():
+    model = CsvTableModel(["Filename", "Title"], make_rows(1200))
+    assert model.rowCount() == 0 and model.canFetchMore()
+    model.fetchMore()
+    assert model.rowCount() == CsvTableModel.BATCH_SIZE
+    model.fetchMore()
+    model.fetchMore()
+    assert model.rowCount() == 1200 and not model.canFetchMore()
+    assert model.data(model.index(1199, 1)) == "t1199"
+    assert model.headerData(0, Qt.Orientation.Vertical) == "2"
+
+
+def test_status_for_a_row_not_loaded_yet():
+    model = CsvTableModel(["Filename", "Title"], make_rows(1200))
+    model.fetchMore()
+    changed = []
+    model.dataChanged.connect(lambda first, last, roles: changed.append(first.row()))
+
+    model.set_status(802, iptc_core.ERROR, "Error: broken")
+    assert changed == []  # baris 800 belum dimuat, tidak ada sinyal
+    model.fetchMore()
+    index = model.index(800, 0)
+    assert model.status(800) == iptc_core.ERROR
+    assert model.data(index, Qt.ItemDataRole.BackgroundRole) == CsvTableModel.STATUS_COLORS[iptc_core.ERROR]
+    assert model.data(index, Qt.ItemDataRole.ToolTipRole) == "Error: broken"
+    assert model.status(801) is None
+
+    model.set_status(2, iptc_core.OK)
+    assert changed == [0]
+    model.clear_status()
+    assert model.status(800) is None and model.data(index, Qt.ItemDataRole.ToolTipRole) is None
+
+
+def test_find_row_fetches_until_found():
+    model = CsvTableModel(["Filename", "Title"], make_rows(1200))
+    model.fetchMore()
+    assert model.find_row("img_0010", 0) == 10
+    assert model.find_row("IMG_1100", 0) == 1100
+    assert model.rowCount() >= 1101
+    assert model.find_row("t7", 1) == 7
+    assert model.find_row("missing", 0) == -1
+    assert not model.canFetchMore()
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "m.csv"
+    lines = ["Title,Filename"] + [f"t{i},Dir\\IMG_{i:04}.JPG" for i in range(1200)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    store = ManifestStore(str(path), cache_dir=str(tmp_path / "cache"))
+    yield store
+    store.close()
+
+
+def test_store_model_reads_pages_on_demand(store, monkeypatch):
+    monkeypatch.setattr(StoreTableModel, "MAX_PAGES", 2)
+    model = StoreTableModel(store)
+    assert model.rowCount() == 1200 and not model.canFetchMore()
+    assert model.data(model.index(0, 1)) == "Dir\\IMG_0000.JPG"
+    assert model.data(model.index(1199, 0)) == "t1199"
+    assert model.data(model.index(700, 0)) == "t700"
+    assert list(model._pages) == [2, 1]  # halaman 0 dibuang (LRU)
+
+
+def test_store_model_find_row_on_indexed_and_other_column(store):
+    model = StoreTableModel(store)
+    assert model.find_row("dir/img_0999", 1) == 999
+    assert model.find_row("IMG_0999", 1) == -1  # index cocok dari awal path
+    assert model.find_row("t1150", 0) == 1150
+    assert model.find_row("missing", 0) == -1
+
+
+def test_store_model_status_updates(store):
+    model = StoreTableModel(store)
+    changed = []
+    model.dataChanged.connect(lambda first, last, roles: changed.append((first.row(), last.column())))
+    model.set_status(1201, iptc_core.SKIPPED, "Unchanged: IMG_1199.JPG")
+    assert changed == [(1199, 1)]
+    index = model.index(1199, 0)
+    assert model.data(index, Qt.ItemDataRole.BackgroundRole) == CsvTableModel.STATUS_COLORS[iptc_core.SKIPPED]
+    assert model.data(index, Qt.ItemDataRole.ToolTipRole) == "Unchanged: IMG_1199.JPG"
@@ -0,0 +1,54 @@
+import json
+import os
+
+import pytest
+
+PIL_Image = pytest.importorskip("PIL.Image")
+
+import cli
+import export
+import iptc_core
+from manifest import Manifest
+
+
+def make_images(folder):
+    os.makedirs(folder / "sub")
+    for name in ("b.jpg", "a.jpg", "sub/c.JPG", "notes.txt"):
+        PIL_Image.new("RGB", (8, 8)).save(str(folder / name), "JPEG")
+    iptc_core.write_iptc_data(str(folder / "a.jpg"), "Judul, satu", "Deskripsi", "x; y")
+    (folder / "b.jpg").write_bytes(b"broken")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_csv_round_trips_through_cli(tmp_path, capsys, workers):
+    images = tmp_path / "images"
+    make_images(images)
+    out = tmp_path / "out.csv"
+
+    assert export.main([str(images), str(out), "-r", "-w", str(workers)]) == 1
+    assert "Error reading b.jpg" in capsys.readouterr().err
+
+    manifest = Manifest(str(out))
+    assert manifest.headers == export.COLUMNS
+    assert list(manifest.rows()) == [
+        ["a.jpg", "Judul, satu", "Deskripsi", "x, y"],
+        ["sub/c.JPG", "", "", ""],
+    ]
+
+    # Hasil ekspor bisa dipakai lagi sebagai manifest apa adanya
+    assert cli.main([str(images), str(out), "-r", "-q", "--checkpoint-dir", str(tmp_path / "ck")]) == 0
+    export.main([str(images), str(tmp_path / "again.csv"), "-r"])
+    assert (tmp_path / "again.csv").read_text() == out.read_text()
+
+
+def test_export_jsonl_with_exif(tmp_path):
+    pytest.importorskip("piexif")
+    PIL_Image.new("RGB", (8, 8)).save(str(tmp_path / "a.jpg"), "JPEG")
+    iptc_core.write_metadata(str(tmp_path / "a.jpg"), "T", "D", "k")
+    out = tmp_path / "out.jsonl"
+    assert export.main([str(tmp_path), str(out), "--exif"]) == 0
+    lines = out.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [{
+        "Filename": "a.jpg", "Title": "T", "Description": "D", "Keywords": "k",
+        "ImageDescription": "T", "UserComment": "D", "XPKeywords": "k",
+    }]
@@ -0,0 +1,52 @@
+import os
+import unicodedata
+
+from file_index import FileIndex
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb"):
+        pass
+
+
+def test_lookup_levels(tmp_path):
+    touch(str(tmp_path / "IMG_1.JPG"))
+    touch(str(tmp_path / unicodedata.normalize("NFD", "café.jpg")))
+    touch(str(tmp_path / "raw_2.cr2"))
+    touch(str(tmp_path / "raw_2.jpg"))
+    index = FileIndex(str(tmp_path))
+
+    assert index.resolve("IMG_1.JPG") == str(tmp_path / "IMG_1.JPG")
+    assert index.resolve("img_1.jpg") == str(tmp_path / "IMG_1.JPG")
+    assert index.resolve("img_1.jpg", ignore_case=False) is None
+    assert index.resolve("IMG_1") == str(tmp_path / "IMG_1.JPG")
+    assert index.resolve(unicodedata.normalize("NFC", "café.jpg")) is not None
+    # RAW+JPEG dengan stem sama: yang JPEG dipilih
+    assert index.resolve("raw_2.tif").endswith("raw_2.jpg")
+    assert index.resolve("nope.jpg") is None
+
+
+def test_recursive_and_ambiguous(tmp_path):
+    touch(str(tmp_path / "a" / "x.jpg"))
+    touch(str(tmp_path / "b" / "x.jpg"))
+    touch(str(tmp_path / "b" / "y.jpg"))
+    assert FileIndex(str(tmp_path)).resolve("y.jpg") is None
+
+    index = FileIndex(str(tmp_path), recursive=True)
+    assert index.count == 3
+    assert index.resolve("y.jpg") == str(tmp_path / "b" / "y.jpg")
+    assert index.resolve("a/x.jpg") == str(tmp_path / "a" / "x.jpg")
+    assert len(index.lookup("x.jpg")) == 2
+    assert index.resolve("x.jpg") is None
+
+
+def test_non_recursive_index_resolves_paths_into_subfolders(tmp_path):
+    touch(str(tmp_path / "sub" / "a.jpg"))
+    touch(str(tmp_path / "b.jpg"))
+    index = FileIndex(str(tmp_path))
+    assert index.count == 1
+    assert index.resolve("sub/a.jpg") == os.path.join(str(tmp_path), "sub", "a.jpg")
+    assert index.resolve("sub\\a.jpg") == os.path.join(str(tmp_path), "sub", "a.jpg")
+    assert index.resolve("sub/missing.jpg") is None
+    assert index.resolve("../" + tmp_path.name + "/b.jpg") is None
@@ -0,0 +1,40 @@
+import pytest
+
+import iim
+
+
+def test_dataset_table_matches_iptcinfo3():
+    iptcinfo3 = pytest.importorskip("iptcinfo3")
+    assert {n: d.name for n, d in iim.DATASETS.items()} == iptcinfo3.c_datasets
+
+
+def test_pack_and_decode_round_trip():
+    data = iim.pack_datasets({iim.KEYWORDS: [b"a", b"b", b"a", b""], iim.CAPTION: "é".encode()})
+    assert data.startswith(iim.RECORD_VERSION)
+    assert iim.decode(data) == {iim.KEYWORDS: ["a", "b"], iim.CAPTION: "é"}
+
+
+def test_utf8_declared_in_record_1():
+    data = iim.merge(b"", {iim.OBJECT_NAME: b"T"}, utf8=True)
+    assert iim.parse(data)[0] == (1, 90, b"\x1b%G")
+    # Record 1 lama tidak diulang ketika ditulis lagi
+    assert iim.merge(data, {}, utf8=True) == data
+    # Deklarasi UTF-8 yang sudah ada tidak hilang walau utf8=False
+    assert iim.merge(data, {}) == data
+    assert iim.parse(iim.merge(data, {iim.OBJECT_NAME: "é".encode()}))[0] == (1, 90, b"\x1b%G")
+    # Charset lain di 1:90 tidak dipertahankan
+    other = iim.HEADER.pack(iim.TAG, 1, 90, 3) + b"\x1b(B" + data[len(iim.CHARSET_UTF8):]
+    assert iim.merge(other, {}) == iim.merge(b"", {iim.OBJECT_NAME: b"T"})
+
+
+def test_length_validation():
+    updates = {iim.OBJECT_NAME: b"x" * 65, iim.KEYWORDS: [b"ok", b"k" * 70]}
+    assert iim.validate(updates) == [
+        "IPTC object name is 65 bytes, maximum is 64",
+        "IPTC keywords is 70 bytes, maximum is 64",
+    ]
+    iim.merge(b"", updates)
+    with pytest.raises(iim.IIMError):
+        iim.merge(b"", updates, strict=True)
+    with pytest.raises(iim.IIMError):
+        iim.merge(b"", {iim.CAPTION: b"x" * 40000})
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("PIL.Image")
+
+import iim
+import iptc_async
+import jpeg_segments
+
+
+def read_iim(path):
+    with open(path, "rb") as fh:
+        seg = jpeg_segments.find_photoshop_segment(jpeg_segments.read_header(fh))
+    return iim.decode(jpeg_segments.split_resources(seg.payload)[0])
+
+
+async def collect(agen):
+    return [r async for r in agen]
+
+
+def test_write_files_from_async_source(tmp_path, make_jpeg):
+    paths = [str(tmp_path / f"{i}.jpg") for i in range(5)]
+    for path in paths:
+        make_jpeg(path)
+
+    async def source():
+        for path in paths:
+            await asyncio.sleep(0)
+            yield path, {"title": "T", "keywords": "a, b"}
+        yield str(tmp_path / "missing.jpg"), {"title": "T"}
+
+    results = asyncio.run(collect(iptc_async.write_files(source(), concurrency=2)))
+    assert sorted(r.row for r in results) == [1, 2, 3, 4, 5, 6]
+    assert sorted(r.status for r in results) == ["error"] + ["ok"] * 5
+    assert read_iim(paths[0]) == {iim.OBJECT_NAME: "T", iim.KEYWORDS: ["a", "b"]}
+
+
+def test_write_files_applies_backpressure(tmp_path, make_jpeg):
+    make_jpeg(str(tmp_path / "a.jpg"))
+    pulled = []
+
+    def source():
+        for i in range(100):
+            pulled.append(i)
+            yield str(tmp_path / "a.jpg"), {"title": f"T{i}"}
+
+    async def first_two():
+        agen = iptc_async.write_files(source(), concurrency=3)
+        results = [await agen.__anext__(), await agen.__anext__()]
+        await agen.aclose()
+        return results
+
+    results = asyncio.run(first_two())
+    assert all(r.ok for r in results)
+    assert len(pulled) <= 6
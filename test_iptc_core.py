@@ -0,0 +1,207 @@
+import os
+
+import pytest
+
+pytest.importorskip("PIL.Image")
+
+import iptc_core
+
+
+def test_split_keywords():
+    assert iptc_core.split_keywords(" a; b ,, c;") == ["a", "b", "c"]
+
+
+def test_write_leaves_no_backup_or_temp_files(tmp_path, make_jpeg):
+    path = str(tmp_path / "a.jpg")
+    make_jpeg(path)
+    iptc_core.write_iptc_data(path, "t", "d", "k1,k2")
+    assert os.listdir(tmp_path) == ["a.jpg"]
+
+
+def test_write_backup_is_opt_in(tmp_path, make_jpeg):
+    path = str(tmp_path / "a.jpg")
+    make_jpeg(path)
+    with open(path, "rb") as fh:
+        original = fh.read()
+    iptc_core.write_iptc_data(path, "t", "d", "k", fsync=True, backup=True)
+    with open(path + "~", "rb") as fh:
+        assert fh.read() == original
+    with open(path, "rb") as fh:
+        assert fh.read() != original
+
+
+def test_rewrite_updates_mtime_and_keeps_mode(tmp_path, make_jpeg):
+    path = str(tmp_path / "a.jpg")
+    make_jpeg(path)
+    iptc_core.write_iptc_data(path, "abc", "", "")
+    os.chmod(path, 0o640)
+    os.utime(path, (1_000_000_000, 1_000_000_000))
+    size = os.path.getsize(path)
+    iptc_core.write_iptc_data(path, "xyz", "", "")
+    st = os.stat(path)
+    assert st.st_size == size
+    assert st.st_mtime != 1_000_000_000
+    assert st.st_mode & 0o777 == 0o640
+
+
+def test_failed_write_keeps_original(tmp_path):
+    path = tmp_path / "a.jpg"
+    path.write_bytes(b"\xff\xd8garbage")
+    with pytest.raises(Exception):
+        iptc_core.write_iptc_data(str(path), "t", "d", "k")
+    assert path.read_bytes() == b"\xff\xd8garbage"
+    assert os.listdir(tmp_path) == ["a.jpg"]
+
+
+def test_process_rows_reports_row_numbers(tmp_path, make_jpeg):
+    make_jpeg(str(tmp_path / "a.jpg"))
+    rows = [["a.jpg", "t", "d", "k"], ["missing.jpg", "t", "d", "k"], ["short"]]
+    results = list(iptc_core.process_rows(rows, iptc_core.ColumnMap(0, 1, 2, 3), str(tmp_path)))
+    assert [(r.row, r.status) for r in results] == [(2, "ok"), (3, "error"), (4, "error")]
+
+
+def test_metadata_updates_follow_field_map():
+    fields = {"title": (("iptc", 5),), "keywords": (("iptc", 25), ("exif", "0th", 0x9c9e))}
+    iptc, exif = iptc_core.metadata_updates("T", "ignored", "a; b", fields)
+    assert iptc == {5: b"T", 25: [b"a", b"b"]}
+    assert exif == {("0th", 0x9c9e): "a; b".encode("utf-16le")}
+    with pytest.raises(ValueError):
+        iptc_core.metadata_updates("T", "", "", {"title": (("xmp", "dc:title"),)})
+
+
+def test_identical_fields_are_encoded_once(tmp_path, make_jpeg):
+    iptc_core.clear_caches()
+    paths = [str(tmp_path / f"{i}.jpg") for i in range(3)]
+    for i, path in enumerate(paths):
+        make_jpeg(path)
+        # Metadata lama berbeda per file (seperti file kamera) tidak mengurangi hit
+        iptc_core.write_iptc_data(path, f"old {i}", "", f"cam{i}")
+    iptc_core.clear_caches()
+    for path in paths:
+        iptc_core.write_metadata(path, "t", "d", "k1, k2")
+    stats = iptc_core.cache_stats()
+    assert (stats["fields"]["hits"], stats["fields"]["misses"]) == (2, 1)
+    assert "keywords" not in stats  # hanya cache yang juga tercatat di metrics
+    with open(paths[0], "rb") as a, open(paths[2], "rb") as b:
+        assert a.read() == b.read()
+
+
+def crashing_writer(image_path, title, description, keywords):
+    """Writer untuk test pool: proses worker mati untuk file crash.jpg."""
+    if os.path.basename(image_path) == "crash.jpg":
+        os._exit(1)
+    if title == "bad":
+        raise ValueError("bad title")
+
+
+def parallel_jobs(names):
+    return [iptc_core.Job(i, name, name, "bad" if name == "bad.jpg" else "t", "d", "k")
+            for i, name in enumerate(names, start=2)]
+
+
+def test_parallel_results_in_order_with_window_of_one():
+    jobs = parallel_jobs([f"{i}.jpg" for i in range(6)])
+    items = jobs[:3] + [iptc_core.RowResult(99, "x", iptc_core.ERROR, "skipped")] + jobs[3:]
+    results = list(iptc_core.process_jobs_parallel(items, crashing_writer, workers=2, max_in_flight=1))
+    assert [r.row for r in results] == [2, 3, 4, 99, 5, 6, 7]
+    assert [r.status for r in results].count(iptc_core.OK) == 6
+
+
+def test_parallel_crash_fails_only_the_crashing_job():
+    names = [f"{i}.jpg" for i in range(7)]
+    names[3] = "crash.jpg"
+    names[5] = "bad.jpg"
+    results = list(iptc_core.process_jobs_parallel(parallel_jobs(names + ["7.jpg"]), crashing_writer,
+                                                   workers=2))
+    status = {r.filename: (r.status, r.message) for r in results}
+    assert len(results) == 8
+    assert status["crash.jpg"] == (iptc_core.ERROR, "Error processing crash.jpg: the worker process crashed")
+    assert status["bad.jpg"] == (iptc_core.ERROR, "Error processing bad.jpg: bad title")
+    assert all(s == iptc_core.OK for name, (s, _) in status.items() if name not in ("crash.jpg", "bad.jpg"))
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, image_path, title, description, keywords):
+        self.calls.append(os.path.basename(image_path))
+
+
+def make_rows(tmp_path, n):
+    for i in range(n):
+        (tmp_path / f"{i}.jpg").write_bytes(b"")
+    return [[f"{i}.jpg", "t", "d", "k"] for i in range(n)]
+
+
+def test_process_rows_is_lazy_and_in_order(tmp_path):
+    writer = RecordingWriter()
+    results = iptc_core.process_rows(make_rows(tmp_path, 5), iptc_core.ColumnMap(0, 1, 2, 3), str(tmp_path),
+                                     writer=writer)
+    assert writer.calls == []
+    assert next(results).row == 2
+    # File berikutnya baru ditulis setelah hasil sebelumnya diambil
+    assert writer.calls == ["0.jpg"]
+    assert [r.row for r in results] == [3, 4, 5, 6]
+    assert writer.calls == [f"{i}.jpg" for i in range(5)]
+
+
+@pytest.mark.parametrize("cancelled", [True, False])
+def test_process_rows_pause_resume_and_cancel_between_files(tmp_path, cancelled):
+    import threading
+
+    writer = RecordingWriter()
+    resume, cancel, paused = threading.Event(), threading.Event(), threading.Event()
+    seen = []
+
+    def consume():
+        # Loop yang sama dengan BatchWorker.run
+        results = iptc_core.process_rows(make_rows(tmp_path, 10), iptc_core.ColumnMap(0, 1, 2, 3),
+                                         str(tmp_path), writer=writer)
+        for result in results:
+            seen.append(result.row)
+            paused.set()
+            resume.wait()
+            if cancel.is_set():
+                break
+        results.close()
+
+    thread = threading.Thread(target=consume)
+    thread.start()
+    assert paused.wait(5)
+    # Pause setelah hasil pertama: tidak ada file lain yang ditulis
+    assert seen == [2] and writer.calls == ["0.jpg"]
+    if cancelled:
+        cancel.set()
+    resume.set()
+    thread.join(5)
+    assert not thread.is_alive()
+    if cancelled:
+        assert seen == [2] and writer.calls == ["0.jpg"]
+    else:
+        assert seen == list(range(2, 12)) and writer.calls == [f"{i}.jpg" for i in range(10)]
+
+
+def test_cache_hits_are_counted_per_thread():
+    import threading
+
+    import metrics
+    iptc_core.clear_caches()
+    key = iptc_core.fields_key(iptc_core.IPTC_FIELD_MAP)
+    barrier = threading.Barrier(4)
+    counts = []
+
+    def lookups(n):
+        metrics.begin_job()
+        barrier.wait()
+        for _ in range(50):
+            for title in (f"a{n}", f"b{n}"):
+                iptc_core.cached_encode("fields", title, "", "", key)
+        counts.append(metrics.end_job())
+
+    threads = [threading.Thread(target=lookups, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counts == [{"fields_cache_misses": 2, "fields_cache_hits": 98}] * 4
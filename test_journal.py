@@ -0,0 +1,139 @@
+import os
+import sqlite3
+
+import pytest
+
+import iptc_core
+from journal import CheckpointJournal, FingerprintJournal, metadata_hash, prune_checkpoints, writer_mode
+
+
+def test_checkpoint_ignores_torn_last_line(tmp_path):
+    cp = CheckpointJournal("k", folder=str(tmp_path), resume=False)
+    results = [iptc_core.RowResult(2, "a", iptc_core.OK, ""),
+               iptc_core.RowResult(3, "b", iptc_core.ERROR, ""),
+               iptc_core.RowResult(4, "c", iptc_core.SKIPPED, "")]
+    assert list(cp.record_results(results)) == results
+    cp.close()
+
+    # Simulasi crash di tengah menulis record
+    with open(cp.path, "a") as f:
+        f.write("12")
+
+    cp = CheckpointJournal("k", folder=str(tmp_path))
+    assert cp.completed == {2, 4}
+    cp.record(5)
+    cp.close()
+    assert CheckpointJournal("k", folder=str(tmp_path)).completed == {2, 4, 5}
+    assert CheckpointJournal("k", folder=str(tmp_path), resume=False).completed == set()
+
+
+def test_old_checkpoints_are_pruned(tmp_path):
+    now = 1_000_000_000
+    for i in range(5):
+        path = tmp_path / f"{i}.log"
+        path.write_text("2\n")
+        os.utime(path, (now - i * 3600, now - i * 3600))
+    (tmp_path / "old.log").write_text("2\n")
+    os.utime(tmp_path / "old.log", (now - 90 * 24 * 3600,) * 2)
+
+    assert prune_checkpoints(str(tmp_path), keep=3, max_age=30 * 24 * 3600, now=now) == 3
+    assert sorted(os.listdir(tmp_path)) == ["0.log", "1.log", "2.log"]
+
+    # Checkpoint yang dibuka lagi untuk resume tidak ikut terhapus
+    os.utime(tmp_path / "2.log", (now - 365 * 24 * 3600,) * 2)
+    assert CheckpointJournal("2", folder=str(tmp_path)).completed == {2}
+    assert "2.log" in os.listdir(tmp_path)
+
+
+def test_undo_rollback_restores_original_bytes(tmp_path):
+    PIL_Image = pytest.importorskip("PIL.Image")
+    piexif = pytest.importorskip("piexif")
+    import cli
+    import rollback
+
+    originals = {}
+    for name in ("a.jpg", "b.jpg"):
+        path = tmp_path / name
+        PIL_Image.new("RGB", (16, 16), (10, 20, 30)).save(str(path), exif=piexif.dump({"0th": {271: b"Cam"}}))
+        originals[name] = path.read_bytes()
+    manifest = tmp_path / "m.csv"
+    manifest.write_text("Filename,Title,Description,Keywords\na.jpg,T,D,k\nb.jpg,T,D,k\n")
+    undo_path = str(tmp_path / "undo.sqlite")
+
+    assert cli.main([str(tmp_path), str(manifest), "-q", "--exif", "--padding", "512", "--undo",
+                     "--undo-journal", undo_path, "--checkpoint-dir", str(tmp_path / "ck")]) == 0
+    assert (tmp_path / "a.jpg").read_bytes() != originals["a.jpg"]
+
+    # Data gambar b.jpg diganti setelah batch: tidak boleh di-rollback
+    data = bytearray((tmp_path / "b.jpg").read_bytes())
+    data[-3] ^= 0xff
+    (tmp_path / "b.jpg").write_bytes(bytes(data))
+
+    assert rollback.main(["last", "-q", "--journal", undo_path]) == 1
+    assert (tmp_path / "a.jpg").read_bytes() == originals["a.jpg"]
+    assert (tmp_path / "b.jpg").read_bytes() == bytes(data)
+    # Rollback kedua: tidak ada yang berubah lagi
+    assert rollback.main(["1", "-q", "--journal", undo_path]) == 1
+
+
+def test_undo_restores_in_place_edits_in_place(tmp_path):
+    PIL_Image = pytest.importorskip("PIL.Image")
+    import journal
+
+    path = str(tmp_path / "a.jpg")
+    PIL_Image.new("RGB", (16, 16)).save(path)
+    iptc_core.write_iptc_data(path, "T", "D", "k", padding=1024)
+    with open(path, "rb") as fh:
+        original = fh.read()
+    entry = journal.capture(path)
+    iptc_core.write_iptc_data(path, "New", "", "x, y", padding=1024)
+    inode = (tmp_path / "a.jpg").stat().st_ino
+
+    assert journal.restore(entry) is True
+    assert (tmp_path / "a.jpg").stat().st_ino == inode
+    with open(path, "rb") as fh:
+        assert fh.read() == original
+    assert journal.restore(entry) is False
+
+
+def test_fingerprint_sees_replaced_file_and_changed_options(tmp_path):
+    path = tmp_path / "a.jpg"
+    path.write_bytes(b"one")
+    st = os.stat(path)
+    journal = FingerprintJournal(str(tmp_path / "fp.sqlite"))
+    h = metadata_hash("T", "D", "k", writer_mode("iptc", padding=0))
+    journal.record(str(path), h)
+    assert journal.is_unchanged(str(path), h)
+    assert not journal.is_unchanged(str(path), metadata_hash("T", "D", "k", writer_mode("iptc", padding=4096)))
+
+    # File lain dengan ukuran dan mtime sama menggantikan yang lama
+    other = tmp_path / "b.jpg"
+    other.write_bytes(b"two")
+    os.utime(other, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(other, path)
+    assert not journal.is_unchanged(str(path), h)
+    journal.close()
+
+
+def test_fingerprint_follows_the_target_and_drops_old_schema(tmp_path):
+    db = str(tmp_path / "fp.sqlite")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE fingerprints (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER,"
+                 " meta_hash TEXT) WITHOUT ROWID")
+    conn.commit()
+    conn.close()
+
+    image = tmp_path / "a.jpg"
+    image.write_bytes(b"jpeg")
+    sidecar = tmp_path / "a.xmp"
+    item = iptc_core.Job(2, "a.jpg", str(image), "T", "D", "k")
+    journal = FingerprintJournal(db, writer_mode("xmp"), target=lambda p: os.path.splitext(p)[0] + ".xmp")
+    assert list(journal.skip_unchanged([item])) == [item]
+    sidecar.write_bytes(b"<x/>")
+    list(journal.record_results([iptc_core.RowResult(2, "a.jpg", iptc_core.OK, "")]))
+    assert [r.status for r in journal.skip_unchanged([item])] == [iptc_core.SKIPPED]
+
+    # Sidecar dihapus: gambar tidak berubah, tapi harus ditulis lagi
+    sidecar.unlink()
+    assert list(journal.skip_unchanged([item])) == [item]
+    journal.close()
@@ -0,0 +1,151 @@
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("PIL.Image")
+pytest.importorskip("iptcinfo3")
+
+import iptc_core
+import jpeg_segments
+
+# EXIF seperti dari kamera, untuk file yang sudah punya APP1
+CAMERA_EXIF = {0x010e: "exif description"}
+
+
+def write_both(tmp_path, src, title, description, keywords):
+    native = str(tmp_path / "native.jpg")
+    legacy = str(tmp_path / "legacy.jpg")
+    shutil.copy(src, native)
+    shutil.copy(src, legacy)
+    iptc_core.write_iptc_data(native, title, description, keywords)
+    iptc_core.write_iptc_data_iptcinfo3(legacy, title, description, keywords)
+    with open(native, "rb") as a, open(legacy, "rb") as b:
+        return a.read(), b.read()
+
+
+@pytest.mark.parametrize("exif", [False, True])
+def test_parity_with_iptcinfo3_new_segment(tmp_path, exif, make_jpeg):
+    src = str(tmp_path / "src.jpg")
+    make_jpeg(src, exif=CAMERA_EXIF if exif else None)
+    native, legacy = write_both(tmp_path, src, "Judul", "Deskripsi é ü", "a; b, c,,a")
+    assert native == legacy
+
+
+def test_parity_with_iptcinfo3_existing_segment(tmp_path, make_jpeg):
+    src = str(tmp_path / "src.jpg")
+    make_jpeg(src, exif=CAMERA_EXIF)
+    iptc_core.write_iptc_data_iptcinfo3(src, "Old title", "Old caption", "x,y")
+    native, legacy = write_both(tmp_path, src, "", "New caption", "z")
+    assert native == legacy
+    assert not os.path.exists(str(tmp_path / "native.jpg~"))
+
+
+def test_scan_data_is_untouched(tmp_path, make_jpeg):
+    src = str(tmp_path / "src.jpg")
+    make_jpeg(src)
+    with open(src, "rb") as fh:
+        original = fh.read()
+        scan = jpeg_segments.read_header(fh).scan_offset
+
+    iptc_core.write_iptc_data(src, "t", "d", "k")
+    with open(src, "rb") as fh:
+        data = fh.read()
+        header = jpeg_segments.read_header(fh)
+    assert data[header.scan_offset:] == original[scan:]
+    assert jpeg_segments.find_photoshop_segment(header) is not None
+
+
+def test_not_a_jpeg_is_left_alone(tmp_path):
+    path = tmp_path / "fake.jpg"
+    path.write_bytes(b"not a jpeg")
+    with pytest.raises(Exception):
+        iptc_core.write_iptc_data(str(path), "t", "d", "k")
+    assert path.read_bytes() == b"not a jpeg"
+
+
+@pytest.mark.parametrize("exif", [False, True])
+def test_combined_writer_matches_separate_passes(tmp_path, exif, make_jpeg):
+    piexif = pytest.importorskip("piexif")
+    src = str(tmp_path / "src.jpg")
+    make_jpeg(src, exif=CAMERA_EXIF if exif else None)
+    iptc_core.write_iptc_data(src, "Old title", "", "x")
+    with open(src, "rb") as fh:
+        original = fh.read()
+        scan = jpeg_segments.read_header(fh).scan_offset
+
+    separate = str(tmp_path / "separate.jpg")
+    shutil.copy(src, separate)
+    iptc_core.write_iptc_data(separate, "Judul", "Deskripsi é", "a, b")
+    exif_dict = piexif.load(separate)
+    exif_dict["0th"][piexif.ImageIFD.ImageDescription] = "Judul".encode("utf-8")
+    exif_dict["Exif"][piexif.ExifIFD.UserComment] = "Deskripsi é".encode("utf-8")
+    exif_dict["0th"][piexif.ImageIFD.XPKeywords] = "a, b".encode("utf-16le")
+    piexif.insert(piexif.dump(exif_dict), separate)
+
+    combined = str(tmp_path / "combined.jpg")
+    shutil.copy(src, combined)
+    iptc_core.write_metadata(combined, "Judul", "Deskripsi é", "a, b")
+
+    assert piexif.load(combined) == piexif.load(separate)
+    with open(combined, "rb") as a, open(separate, "rb") as b:
+        ha, hb = jpeg_segments.read_header(a), jpeg_segments.read_header(b)
+        assert (jpeg_segments.find_photoshop_segment(ha).payload
+                == jpeg_segments.find_photoshop_segment(hb).payload)
+        a.seek(0)
+        data = a.read()
+    # Data gambar tidak berubah dan APP0 (JFIF) tetap ada
+    assert data[ha.scan_offset:] == original[scan:]
+    assert ha.segments[0].marker == jpeg_segments.APP0
+
+
+def read_iptc(path):
+    from iptcinfo3 import IPTCInfo
+    info = IPTCInfo(path, force=True, inp_charset="utf-8")
+    return info["object name"], [k.decode() if isinstance(k, bytes) else k for k in info["keywords"]]
+
+
+def test_padding_allows_in_place_updates(tmp_path, make_jpeg):
+    piexif = pytest.importorskip("piexif")
+    path = str(tmp_path / "a.jpg")
+    make_jpeg(path, exif=CAMERA_EXIF)
+    iptc_core.write_metadata(path, "First", "Caption", "a, b", padding=512)
+    size, inode = os.path.getsize(path), os.stat(path).st_ino
+    with open(path, "rb") as fh:
+        scan = fh.read()[jpeg_segments.read_header(fh).scan_offset:]
+
+    # Muat di padding: file ditimpa di tempat, ukuran dan data gambar tetap
+    iptc_core.write_metadata(path, "Second title", "Caption", "a, b, c, d", padding=512)
+    assert os.path.getsize(path) == size and os.stat(path).st_ino == inode
+    with open(path, "rb") as fh:
+        data = fh.read()
+        assert data[jpeg_segments.read_header(fh).scan_offset:] == scan
+    assert read_iptc(path) == ("Second title", ["a", "b", "c", "d"])
+    assert piexif.load(path)["0th"][piexif.ImageIFD.ImageDescription] == b"Second title"
+
+    # Padding habis: ditulis ulang dengan padding baru
+    iptc_core.write_metadata(path, "x" * 1000, "Caption", "a", padding=512)
+    assert os.path.getsize(path) > size and os.stat(path).st_ino != inode
+    assert read_iptc(path) == ("x" * 1000, ["a"])
+    assert os.listdir(tmp_path) == ["a.jpg"]
+
+
+@pytest.mark.parametrize("copy_file_range,sendfile", [(True, True), (False, True), (False, False)])
+def test_copy_tail_methods(tmp_path, monkeypatch, copy_file_range, sendfile):
+    monkeypatch.setattr(jpeg_segments, "USE_COPY_FILE_RANGE", copy_file_range and hasattr(os, "copy_file_range"))
+    monkeypatch.setattr(jpeg_segments, "USE_SENDFILE", sendfile and hasattr(os, "sendfile"))
+    monkeypatch.setattr(jpeg_segments, "COPY_CHUNK", 4096)
+    data = os.urandom(300000)
+    (tmp_path / "src").write_bytes(data)
+    with open(tmp_path / "src", "rb") as src, open(tmp_path / "dst", "wb") as dst:
+        dst.write(b"head")
+        jpeg_segments.copy_tail(src, dst, 1000)
+        dst.write(b"end")
+    assert (tmp_path / "dst").read_bytes() == b"head" + data[1000:] + b"end"
+
+
+def test_copy_tail_without_file_descriptors():
+    import io
+    src, dst = io.BytesIO(b"0123456789"), io.BytesIO()
+    jpeg_segments.copy_tail(src, dst, 3)
+    assert dst.getvalue() == b"3456789"
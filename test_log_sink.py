@@ -0,0 +1,36 @@
+import os
+
+import log_sink
+
+
+def test_levels_ring_buffer_and_drop_count(tmp_path):
+    path = tmp_path / "run.log"
+    sink = log_sink.LogSink(capacity=3, level=log_sink.WARNING, path=str(path))
+    for i in range(5):
+        sink.write(f"OK: img{i}.jpg")
+    for i in range(4):
+        sink.write(f"Warning: File not found: x{i}.jpg")
+
+    lines = sink.drain()
+    assert lines[0] == "... 1 lines omitted (see log file)"
+    assert lines[1:] == [f"Warning: File not found: x{i}.jpg" for i in (1, 2, 3)]
+    assert sink.drain() == []
+    assert len(sink.lines()) == 3
+
+    sink.close_file()
+    assert path.read_text().count("\n") == 9
+
+
+def test_set_level_replays_buffer():
+    sink = log_sink.LogSink(capacity=10)
+    sink.write("OK: a.jpg")
+    sink.write("Error processing b.jpg: boom")
+    assert sink.set_level(log_sink.ERROR) == ["Error processing b.jpg: boom"]
+    assert sink.set_level(log_sink.INFO) == ["OK: a.jpg", "Error processing b.jpg: boom"]
+
+
+def test_run_names_are_unique_within_a_second(tmp_path):
+    names = [log_sink.new_run_name(str(tmp_path)) for _ in range(3)]
+    assert len(set(names)) == 3
+    assert names[1] == names[0] + "-2" or names[1][:19] != names[0][:19]
+    assert sorted(os.listdir(tmp_path)) == sorted(n + ".log" for n in names)
@@ -0,0 +1,65 @@
+import codecs
+
+import pytest
+
+import iptc_core
+from manifest import PREFIX_SIZE, Manifest
+
+
+def test_utf8_bom_and_semicolon_dialect(tmp_path):
+    path = tmp_path / "m.csv"
+    path.write_bytes(codecs.BOM_UTF8 + "Filename;Title\n a.jpg ;Café\nb.jpg;\"x;y\"\n".encode("utf-8"))
+    m = Manifest(str(path))
+    assert m.headers == ["Filename", "Title"]
+    assert list(m.rows()) == [["a.jpg", "Café"], ["b.jpg", "x;y"]]
+    assert m.estimate_rows() == 2
+
+
+def test_utf16_and_rows_are_lazy(tmp_path):
+    path = tmp_path / "m.csv"
+    lines = ["Filename,Title"] + [f"img{i}.jpg,t{i}" for i in range(1000)]
+    path.write_bytes(("\r\n".join(lines)).encode("utf-16"))
+    m = Manifest(str(path))
+    assert m.encoding == "utf-16"
+    rows = m.rows()
+    assert next(rows) == ["img0.jpg", "t0"]
+    assert sum(1 for _ in rows) == 999
+    assert m.estimate_rows() == 1000
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "m.csv"
+    path.write_bytes(b"")
+    m = Manifest(str(path))
+    assert m.headers == []
+    assert list(m.rows()) == []
+
+
+def test_estimate_rows_from_prefix(tmp_path):
+    path = tmp_path / "m.csv"
+    lines = ["Filename,Title"] + [f"img{i:06}.jpg,title {i:06}" for i in range(20000)]
+    path.write_text("\n".join(lines) + "\n")
+    m = Manifest(str(path))
+    assert m.size > PREFIX_SIZE
+    assert abs(m.estimate_rows() - 20000) < 200
+
+
+def test_invalid_prefix_fails_at_open(tmp_path):
+    path = tmp_path / "m.csv"
+    path.write_bytes(b"Filename,Title\na.jpg,Caf\xe9\n")
+    with pytest.raises(ValueError, match="not valid"):
+        Manifest(str(path))
+
+
+def test_invalid_bytes_after_prefix_fail_only_that_row(tmp_path):
+    path = tmp_path / "m.csv"
+    filler = "".join(f"f{i:05}.jpg,t\n" for i in range(PREFIX_SIZE // 10))
+    path.write_bytes(("Filename,Title,Description,Keywords\n" + filler).encode("utf-8")
+                     + b"bad.jpg,Caf\xe9,d,k\nlast.jpg,t,d,k\n")
+    m = Manifest(str(path))
+    rows = list(m.rows())
+    assert rows[-1] == ["last.jpg", "t", "d", "k"]
+    tail = rows[-2:]
+    results = list(iptc_core.process_rows(tail, iptc_core.ColumnMap(0, 1, 2, 3), str(tmp_path)))
+    assert results[0].message == "Warning: Row 2 is not valid text in the CSV encoding, skipping"
+    assert results[1].message.startswith("Warning: File not found: last.jpg")
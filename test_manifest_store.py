@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from manifest import Manifest
+from manifest_store import ManifestStore, filename_key
+
+
+def write_manifest(path, n):
+    lines = ["Title,Filename,Keywords"] + [f"t{i},Dir\\IMG_{i:04}.JPG,\"a, b\"" for i in range(n)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_import_once_and_reopen(tmp_path):
+    path = tmp_path / "m.csv"
+    write_manifest(path, 2500)
+    cache = str(tmp_path / "cache")
+
+    store = ManifestStore(str(path), cache_dir=cache)
+    assert store.imported
+    assert store.headers == ["Title", "Filename", "Keywords"]
+    assert store.filename_column == 1
+    assert store.count == store.estimate_rows() == 2500
+    assert list(store.rows()) == list(Manifest(str(path)).rows())
+    store.close()
+
+    store = ManifestStore(str(path), cache_dir=cache)
+    assert not store.imported
+    assert store.count == 2500
+    store.close()
+
+
+def test_page_find_and_search(tmp_path):
+    path = tmp_path / "m.csv"
+    write_manifest(path, 2500)
+    store = ManifestStore(str(path), cache_dir=str(tmp_path / "cache"))
+
+    assert store.page(0, 2) == [["t0", "Dir\\IMG_0000.JPG", "a, b"], ["t1", "Dir\\IMG_0001.JPG", "a, b"]]
+    assert store.page(2499, 10) == [["t2499", "Dir\\IMG_2499.JPG", "a, b"]]
+    # Nama file dicocokkan seperti di plan_jobs: separator dan huruf besar/kecil diabaikan
+    assert store.find("dir/img_1234.jpg") == [(1236, ["t1234", "Dir\\IMG_1234.JPG", "a, b"])]
+    assert store.find("missing.jpg") == []
+    assert [row for row, _ in store.search("Dir/IMG_01", limit=3)] == [102, 103, 104]
+    assert filename_key(' "./a\\B.JPG" ') == filename_key("a/b.jpg")
+    store.close()
+
+
+def test_reimport_when_csv_or_column_changes(tmp_path):
+    path = tmp_path / "m.csv"
+    write_manifest(path, 10)
+    cache = str(tmp_path / "cache")
+    ManifestStore(str(path), cache_dir=cache).close()
+
+    write_manifest(path, 20)
+    os.utime(path, ns=(0, 10 ** 9))
+    store = ManifestStore(str(path), cache_dir=cache)
+    assert store.imported and store.count == 20
+    store.close()
+
+    store = ManifestStore(str(path), cache_dir=cache, filename_column=0)
+    assert store.imported
+    assert store.find("T7")[0][0] == 9
+    store.close()
+    assert not [name for name in os.listdir(cache) if not name.endswith(".sqlite")]
+
+
+def test_import_progress_and_cancel(tmp_path, monkeypatch):
+    import manifest_store
+    monkeypatch.setattr(manifest_store, "IMPORT_BATCH", 100)
+    path = tmp_path / "m.csv"
+    write_manifest(path, 250)
+    cache = tmp_path / "cache"
+
+    def cancel(done, total):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        ManifestStore(str(path), cache_dir=str(cache), progress=cancel)
+    assert os.listdir(cache) == []
+
+    calls = []
+    store = ManifestStore(str(path), cache_dir=str(cache), progress=lambda *a: calls.append(a))
+    assert calls == [(100, 250), (200, 250), (250, 250)]
+    assert store.find("dir/img_0007.jpg")[0][0] == 9
+    store.close()
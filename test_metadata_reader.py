@@ -0,0 +1,39 @@
+import pytest
+
+PIL_Image = pytest.importorskip("PIL.Image")
+
+import iptc_core
+import metadata_reader
+
+
+def test_read_metadata_after_combined_write(tmp_path, make_jpeg):
+    pytest.importorskip("piexif")
+    path = str(tmp_path / "a.jpg")
+    make_jpeg(path)
+    iptc_core.write_metadata(path, "Judul é", "Deskripsi", "satu; dua", padding=64)
+    meta = metadata_reader.read_metadata(path)
+    assert meta.title == "Judul é"
+    assert meta.description == "Deskripsi"
+    assert meta.keywords == ["satu", "dua"]
+    assert meta.exif == {"ImageDescription": "Judul é", "UserComment": "Deskripsi", "XPKeywords": "satu; dua"}
+
+
+def test_read_metadata_big_endian_user_comment(tmp_path, make_jpeg):
+    exif = PIL_Image.Exif()
+    exif[0x010e] = "desc"
+    path = str(tmp_path / "a.jpg")
+    make_jpeg(path, exif)
+    meta = metadata_reader.read_metadata(path)
+    assert meta == metadata_reader.Metadata("", "", [], {"ImageDescription": "desc"})
+
+    tiff = b"MM\x00\x2a\x00\x00\x00\x08" + b"\x00\x01" + b"\x92\x86\x00\x07\x00\x00\x00\x0c\x00\x00\x00\x1a" \
+        + b"\x00\x00\x00\x00" + b"UNICODE\x00" + "hi".encode("utf-16-be")
+    assert metadata_reader.decode_exif(b"Exif\x00\x00" + tiff) == {"UserComment": "hi"}
+
+
+def test_read_metadata_rejects_non_jpeg(tmp_path):
+    for data in (b"", b"not a jpeg", b"\xff\xd8\xff\xe1\x00"):
+        path = tmp_path / "x.jpg"
+        path.write_bytes(data)
+        with pytest.raises(ValueError):
+            metadata_reader.read_metadata(str(path))
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+import metrics
+
+PIL_Image = pytest.importorskip("PIL.Image")
+
+import cli
+import iptc_core
+
+
+def test_stage_only_records_inside_job():
+    with metrics.stage("header"):
+        pass
+    assert metrics.end_job() == {}
+
+    metrics.begin_job()
+    with metrics.stage("header"):
+        pass
+    with metrics.stage("header"):
+        pass
+    stats = metrics.end_job()
+    assert list(stats) == ["header"] and stats["header"] >= 0
+
+
+def test_recorder_buckets_and_prometheus(tmp_path):
+    rec = metrics.Recorder()
+    rec.observe("copy", 0.0002)
+    rec.observe("copy", 30.0)
+    rec.add_result(iptc_core.RowResult(2, "a.jpg", iptc_core.OK, "OK: a.jpg",
+                                       {"copy": 0.001, "iim_cache_hits": 3, "iim_cache_misses": 1}))
+    rec.finish()
+
+    data = rec.to_dict()
+    assert data["counters"] == {"rows_ok": 1, "iim_cache_hits": 3, "iim_cache_misses": 1}
+    assert data["cache_hit_rate"] == {"iim": 0.75}
+    assert data["stages"]["copy"]["count"] == 3
+    assert data["stages"]["copy"]["buckets"]["+Inf"] == 1
+
+    path = str(tmp_path / "iptc.prom")
+    rec.write_prometheus(path)
+    text = open(path).read()
+    assert 'iptc_writer_rows{status="ok"} 1' in text
+    assert "# TYPE iptc_writer_rows gauge" in text
+    assert 'iptc_writer_stage_seconds_bucket{stage="copy",le="+Inf"} 3' in text
+    assert 'iptc_writer_stage_seconds_count{stage="copy"} 3' in text
+    assert 'iptc_writer_cache_lookups{cache="iim",result="miss"} 1' in text
+
+
+def test_cli_metrics_outputs(tmp_path):
+    PIL_Image.new("RGB", (8, 8)).save(str(tmp_path / "a.jpg"))
+    manifest = tmp_path / "m.csv"
+    manifest.write_text("Filename,Title,Description,Keywords\na.jpg,T,D,k\nb.jpg,T,D,k\n")
+    json_path = tmp_path / "metrics.json"
+    prom_path = tmp_path / "metrics.prom"
+
+    assert cli.main([str(tmp_path), str(manifest), "-q", "--checkpoint-dir", str(tmp_path / "ck"),
+                     "--metrics-json", str(json_path), "--metrics-prom", str(prom_path)]) == 1
+
+    data = json.loads(json_path.read_text())
+    assert data["counters"]["rows_ok"] == 1 and data["counters"]["rows_error"] == 1
+    assert "fields" in data["cache_hit_rate"]
+    for name in ("index", "csv", "lookup", "header", "encode", "copy", "replace", "job"):
+        assert name in data["stages"], name
+    assert data["stages"]["job"]["count"] == 1
+    assert "iptc_writer_run_duration_seconds" in prom_path.read_text()
@@ -0,0 +1,94 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+PIL_Image = pytest.importorskip("PIL.Image")
+
+import cli
+import iptc_core
+import jpeg_segments
+import xmp
+
+NS = {"rdf": xmp.RDF, "dc": xmp.DC}
+
+LIGHTROOM_SIDECAR = b"""<x:xmpmeta xmlns:x="adobe:ns:meta/">
+ <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+  <rdf:Description rdf:about="" xmlns:crs="http://ns.adobe.com/camera-raw-settings/1.0/"
+    xmlns:dc="http://purl.org/dc/elements/1.1/" crs:Exposure2012="+0.50">
+   <dc:title><rdf:Alt><rdf:li xml:lang="x-default">Old</rdf:li></rdf:Alt></dc:title>
+  </rdf:Description>
+ </rdf:RDF>
+</x:xmpmeta>
+"""
+
+
+def fields(packet):
+    desc = ET.fromstring(packet).find("rdf:RDF/rdf:Description", NS)
+    return (desc.findtext("dc:title/rdf:Alt/rdf:li", namespaces=NS),
+            desc.findtext("dc:description/rdf:Alt/rdf:li", namespaces=NS),
+            [li.text for li in desc.findall("dc:subject/rdf:Bag/rdf:li", NS)])
+
+
+def test_render_escapes_and_splits_keywords():
+    packet = xmp.render("Fish & <Chips>", "", "a; b,c")
+    assert fields(packet) == ("Fish & <Chips>", None, ["a", "b", "c"])
+
+
+def test_merge_does_not_take_prefixes_from_the_file():
+    # dc terikat ke URI lain di elemen luar, DC asli memakai prefix d
+    hostile = (b'<x:xmpmeta xmlns:x="adobe:ns:meta/" xmlns:dc="urn:evil">'
+               + LIGHTROOM_SIDECAR.split(b"\n", 1)[1].replace(b"dc:", b"d:").replace(b"xmlns:dc=", b"xmlns:d="))
+    packet = xmp.merge(hostile, "New", "", "")
+    assert fields(packet)[0] == "New"
+    namespace_map = ET.register_namespace.__globals__["_namespace_map"]
+    assert namespace_map[xmp.DC] == "dc" and "urn:evil" not in namespace_map
+    assert b"<dc:title>" in packet and b'crs:Exposure2012="+0.50"' in packet
+
+
+def test_sidecar_leaves_image_untouched_and_keeps_other_data(tmp_path, make_jpeg):
+    image = str(tmp_path / "IMG_1.jpg")
+    make_jpeg(image)
+    with open(image, "rb") as fh:
+        original = fh.read()
+
+    xmp.write_xmp(image, "T", "D", "k1, k2")
+    with open(tmp_path / "IMG_1.xmp", "rb") as fh:
+        assert fields(fh.read()) == ("T", "D", ["k1", "k2"])
+    with open(image, "rb") as fh:
+        assert fh.read() == original
+
+    (tmp_path / "IMG_1.xmp").write_bytes(LIGHTROOM_SIDECAR)
+    xmp.write_xmp(image, "New", "", "k3")
+    packet = (tmp_path / "IMG_1.xmp").read_bytes()
+    assert fields(packet) == ("New", None, ["k3"])
+    assert b'crs:Exposure2012="+0.50"' in packet
+    assert sorted(os.listdir(tmp_path)) == ["IMG_1.jpg", "IMG_1.xmp"]
+
+
+def test_small_images_are_embedded(tmp_path, make_jpeg):
+    image = str(tmp_path / "a.jpg")
+    make_jpeg(image)
+    xmp.write_xmp(image, "T", "D", "k", embed_below=1 << 20)
+    xmp.write_xmp(image, "T2", "", "", embed_below=1 << 20)
+    assert os.listdir(tmp_path) == ["a.jpg"]
+    with open(image, "rb") as fh:
+        header = jpeg_segments.read_header(fh, keep=(jpeg_segments.APP1,))
+    segments = [s for s in header.segments if s.payload is not None and s.payload.startswith(jpeg_segments.XMP_SIG)]
+    assert len(segments) == 1
+    packet = segments[0].payload[len(jpeg_segments.XMP_SIG):]
+    assert packet.startswith(b"<?xpacket begin=") and packet.endswith(b'<?xpacket end="w"?>')
+    body = packet[packet.index(b"<x:xmpmeta"):packet.rindex(b"<?xpacket")]
+    assert fields(body) == ("T2", "D", ["k"])
+    PIL_Image.open(image).load()
+
+
+def test_cli_xmp_mode(tmp_path, make_jpeg):
+    make_jpeg(str(tmp_path / "a.jpg"))
+    manifest = tmp_path / "m.csv"
+    manifest.write_text("Filename,Title,Description,Keywords\na.jpg,T,D,k\n")
+    iptc_core.clear_caches()
+    assert cli.main([str(tmp_path), str(manifest), "-q", "--xmp",
+                     "--checkpoint-dir", str(tmp_path / "ck")]) == 0
+    assert fields((tmp_path / "a.xmp").read_bytes()) == ("T", "D", ["k"])
+    assert iptc_core.cache_stats()["xmp"]["misses"] == 1
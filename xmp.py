@@ -0,0 +1,223 @@
+"""Tulis metadata sebagai XMP tanpa menulis ulang gambar asli.
+
+dc:title, dc:description dan dc:subject diisi dari kolom CSV yang sama
+dengan IPTC, ke sidecar IMG_1.xmp di samping gambar (konvensi Lightroom /
+Bridge, jadi RAW dan JPEG dengan nama sama berbagi satu sidecar), atau ke
+segmen APP1 XMP di dalam JPEG yang kecil. Paket baru disusun dari
+template dan hasilnya di-memoize per kombinasi field; paket yang sudah ada
+(mis. sidecar Lightroom) digabung lewat ElementTree supaya isi lainnya
+tetap ada.
+"""
+import functools
+import os
+import shutil
+import tempfile
+from string import Template
+
+import iptc_core
+from file_index import TEMP_PREFIX
+from metrics import stage
+
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+DC = "http://purl.org/dc/elements/1.1/"
+
+SIDECAR_EXT = ".xmp"
+
+# Prefix tetap untuk menulis paket hasil merge; prefix dari file tidak didaftarkan
+# (peta prefix ElementTree berlaku untuk seluruh proses dan semua thread)
+NAMESPACES = {
+    "x": "adobe:ns:meta/",
+    "rdf": RDF,
+    "dc": DC,
+    "xmp": "http://ns.adobe.com/xap/1.0/",
+    "xmpMM": "http://ns.adobe.com/xap/1.0/mm/",
+    "xmpRights": "http://ns.adobe.com/xap/1.0/rights/",
+    "stEvt": "http://ns.adobe.com/xap/1.0/sType/ResourceEvent#",
+    "stRef": "http://ns.adobe.com/xap/1.0/sType/ResourceRef#",
+    "photoshop": "http://ns.adobe.com/photoshop/1.0/",
+    "tiff": "http://ns.adobe.com/tiff/1.0/",
+    "exif": "http://ns.adobe.com/exif/1.0/",
+    "exifEX": "http://cipa.jp/exif/1.0/",
+    "aux": "http://ns.adobe.com/exif/1.0/aux/",
+    "crs": "http://ns.adobe.com/camera-raw-settings/1.0/",
+    "lr": "http://ns.adobe.com/lightroom/1.0/",
+    "Iptc4xmpCore": "http://iptc.org/std/Iptc4xmpCore/1.0/xmlns/",
+}
+
+PACKET = Template("""\
+<x:xmpmeta xmlns:x="adobe:ns:meta/">
+ <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+  <rdf:Description rdf:about=""
+    xmlns:dc="http://purl.org/dc/elements/1.1/">
+$fields  </rdf:Description>
+ </rdf:RDF>
+</x:xmpmeta>
+""")
+ALT = Template("""\
+   <dc:$name>
+    <rdf:Alt>
+     <rdf:li xml:lang="x-default">$value</rdf:li>
+    </rdf:Alt>
+   </dc:$name>
+""")
+BAG = Template("""\
+   <dc:$name>
+    <rdf:Bag>
+$items    </rdf:Bag>
+   </dc:$name>
+""")
+BAG_ITEM = Template("""\
+     <rdf:li>$value</rdf:li>
+""")
+
+# Pembungkus paket untuk APP1 di dalam JPEG (sidecar tidak memakainya)
+PACKET_BEGIN = '<?xpacket begin="\ufeff" id="W5M0MpCehiHzreSzNTczkc9d"?>\n'.encode("utf-8")
+PACKET_END = b'<?xpacket end="w"?>'
+
+# Escape XML sekaligus buang karakter kontrol yang tidak boleh ada di XML 1.0
+_TEXT = dict.fromkeys(c for c in range(0x20) if c not in (0x09, 0x0a, 0x0d))
+_TEXT.update({ord("&"): "&amp;", ord("<"): "&lt;", ord(">"): "&gt;"})
+
+
+def _text(value: str) -> str:
+    return value.translate(_TEXT)
+
+
+@functools.lru_cache(maxsize=None)
+def _etree():
+    """ElementTree dengan NAMESPACES terdaftar; diimport saat merge pertama saja."""
+    # Import di sini: ElementTree hanya dibutuhkan untuk menggabung paket yang sudah ada
+    import xml.etree.ElementTree as ET
+    for prefix, uri in NAMESPACES.items():
+        ET.register_namespace(prefix, uri)
+    return ET
+
+
+def fields_xml(title, description, keywords) -> str:
+    """Elemen dc:* untuk field yang tidak kosong."""
+    parts = []
+    if title:
+        parts.append(ALT.substitute(name="title", value=_text(title)))
+    if description:
+        parts.append(ALT.substitute(name="description", value=_text(description)))
+    if keywords:
+        items = "".join(BAG_ITEM.substitute(value=_text(kw)) for kw in iptc_core.keyword_list(keywords))
+        if items:
+            parts.append(BAG.substitute(name="subject", items=items))
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=iptc_core.ENCODE_CACHE_SIZE)
+def render(title, description, keywords) -> bytes:
+    """Paket XMP baru (UTF-8, tanpa xpacket), di-memoize per kombinasi field."""
+    iptc_core.cache_miss()
+    return PACKET.substitute(fields=fields_xml(title, description, keywords)).encode("utf-8")
+
+
+iptc_core.ENCODE_CACHES["xmp"] = render
+
+
+def merge(existing: bytes, title, description, keywords) -> bytes:
+    """Ganti dc:title, dc:description dan dc:subject di paket XMP existing.
+
+    Field kosong tidak diubah; elemen dan atribut lain tetap ada. Namespace
+    di luar NAMESPACES ditulis ulang dengan prefix ns0, ns1, ... (URI-nya sama).
+    """
+    ET = _etree()
+    root = ET.fromstring(existing)
+    rdf = root if root.tag == f"{{{RDF}}}RDF" else root.find(f"{{{RDF}}}RDF")
+    if rdf is None:
+        raise ValueError("XMP packet has no rdf:RDF element")
+    descriptions = rdf.findall(f"{{{RDF}}}Description")
+
+    for name, value in (("title", title), ("description", description), ("subject", keywords)):
+        if not value:
+            continue
+        tag = f"{{{DC}}}{name}"
+        for desc in descriptions:
+            desc.attrib.pop(tag, None)
+            for child in desc.findall(tag):
+                desc.remove(child)
+
+    if descriptions:
+        target = descriptions[0]
+    else:
+        target = ET.SubElement(rdf, f"{{{RDF}}}Description", {f"{{{RDF}}}about": ""})
+    new = ET.fromstring(render(title, description, keywords)).find(f"{{{RDF}}}RDF/{{{RDF}}}Description")
+    target.extend(new)
+    return ET.tostring(root, encoding="utf-8", xml_declaration=False)
+
+
+def sidecar_path(image_path: str) -> str:
+    """IMG_1.jpg -> IMG_1.xmp."""
+    return os.path.splitext(image_path)[0] + SIDECAR_EXT
+
+
+def write_small_file(path: str, data: bytes, mode_from: str, fsync: bool = False):
+    """Tulis file kecil lewat temp file + os.replace; permission disalin dari mode_from."""
+    folder = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(prefix=TEMP_PREFIX, suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        # mkstemp membuat file 0600
+        shutil.copymode(mode_from, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def output_path(image_path: str, embed_below: int = 0) -> str:
+    """File yang ditulis write_xmp untuk image_path: gambarnya sendiri atau sidecar."""
+    if embed_below and os.path.getsize(image_path) <= embed_below:
+        return image_path
+    return sidecar_path(image_path)
+
+
+def write_sidecar(image_path, title, description, keywords, fsync=False) -> str:
+    """Buat atau perbarui sidecar XMP untuk image_path; kembalikan path sidecar."""
+    path = sidecar_path(image_path)
+    try:
+        with open(path, "rb") as f:
+            existing = f.read()
+    except FileNotFoundError:
+        existing = None
+    with stage("encode"):
+        if existing is None:
+            data = iptc_core.cached_encode("xmp", title, description, keywords)
+        else:
+            data = merge(existing, title, description, keywords)
+    with stage("write"):
+        write_small_file(path, data, path if existing is not None else image_path, fsync)
+    return path
+
+
+def embedded_packet(old, title, description, keywords) -> bytes:
+    """build_xmp untuk iptc_core.update_segments: paket lengkap dengan xpacket."""
+    if old:
+        body = merge(old, title, description, keywords)
+    else:
+        body = iptc_core.cached_encode("xmp", title, description, keywords)
+    return PACKET_BEGIN + body + PACKET_END
+
+
+def write_xmp(image_path, title, description, keywords, embed_below=0, fsync=False, backup=False):
+    """Writer mode XMP: sidecar, atau APP1 XMP di dalam JPEG bila file <= embed_below byte.
+
+    Tanpa embed_below gambar tidak pernah dibuka untuk ditulis. backup
+    hanya berlaku untuk tulis di dalam file (lihat atomic_rewrite).
+    """
+    try:
+        if output_path(image_path, embed_below) == image_path:
+            iptc_core.update_segments(
+                image_path, build_xmp=lambda old: embedded_packet(old, title, description, keywords),
+                fsync=fsync, backup=backup)
+        else:
+            write_sidecar(image_path, title, description, keywords, fsync=fsync)
+    except Exception as e:
+        raise Exception(f"Failed to write XMP: {str(e)}")